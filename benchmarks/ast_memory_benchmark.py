@@ -0,0 +1,39 @@
+import argparse
+import gc
+import tracemalloc
+
+from interpreter.lexer_analyzer.lexer import Lexer
+from interpreter.syntax_analyzer.parser import Parser
+from interpreter.syntax_analyzer.arena import Arena
+from .generate import generate_program
+
+
+def allocated(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory used by the syntax tree forms')
+    parser.add_argument('-l', '--lines', type=int, default=20000, help='Size of generated program')
+    args = parser.parse_args()
+
+    code = generate_program(args.lines)
+    tokens = Lexer(code).tokenize()
+    tree, tree_size = allocated(lambda: Parser(tokens).parse())
+    shared, shared_size = allocated(lambda: Parser(tokens, share_leaves=True).parse())
+    arena, arena_size = allocated(lambda: Arena.pack(shared))
+
+    print('source:             {:8.1f} MB'.format(len(code) / 2 ** 20))
+    print('tree:               {:8.1f} MB'.format(tree_size / 2 ** 20))
+    print('tree, shared leaves:{:8.1f} MB'.format(shared_size / 2 ** 20))
+    print('arena:              {:8.1f} MB'.format(arena_size / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
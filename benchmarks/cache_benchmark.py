@@ -0,0 +1,34 @@
+import argparse
+import shutil
+import tempfile
+import time
+
+from interpreter.interpreter.interpreter import Interpreter
+from interpreter.utils.cache import CompilationCache
+from .generate import generate_program
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Front end time without, with a cold and with a warm cache')
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=[1000, 10000, 50000],
+                        help='Program sizes in lines')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        cache = CompilationCache(directory)
+        print('{:>8} {:>10} {:>10} {:>10}'.format('lines', 'none (s)', 'cold (s)', 'warm (s)'))
+        for lines in args.sizes:
+            code = generate_program(lines)
+            times = []
+            for program_cache in (None, cache, cache):
+                start = time.perf_counter()
+                Interpreter.compile(code, cache=program_cache)
+                times.append(time.perf_counter() - start)
+            print('{:>8} {:>10.3f} {:>10.3f} {:>10.3f}'.format(lines, *times))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+import argparse
+
+from interpreter.interpreter.interpreter import Interpreter
+from interpreter.interpreter.closures import ClosureInterpreter
+from interpreter.vm.machine import Machine
+
+from .vm_benchmark import PROGRAMS, run
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run time of programs on the tree interpreter, closures and the VM')
+    parser.add_argument('-n', '--iterations', type=int, default=50000, help='Loop iterations')
+    parser.add_argument('-O', '--optimize', action='store_true', help='Optimize the programs first')
+    parser.add_argument('programs', nargs='*', default=sorted(PROGRAMS), help='Programs to run')
+    args = parser.parse_args()
+
+    print('{:>10} {:>12} {:>12} {:>8} {:>12}'.format('program', 'tree (s)', 'closures (s)', 'speedup', 'vm (s)'))
+    for name in args.programs:
+        program = PROGRAMS[name] % args.iterations
+        tree, expected = run(Interpreter, program, args.optimize)
+        closures, output = run(ClosureInterpreter, program, args.optimize)
+        assert output == expected
+        vm, output = run(Machine, program, args.optimize)
+        assert output == expected
+        print('{:>10} {:>12.3f} {:>12.3f} {:>7.2f}x {:>12.3f}'.format(name, tree, closures, tree / closures, vm))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import contextlib
+import io
+import time
+
+from interpreter.interpreter.interpreter import Interpreter
+from interpreter.optimizer.values import ValueNumbering
+
+PROGRAM = '''
+#include <stdio.h>
+void main() {
+    int n = %d;
+    int x = 1;
+    int y = 2;
+    int total = 0;
+    int i = 0;
+    while (i < n) {
+        x = (x * 7 + y) %% 1000;
+        y = (y * 3 + x) %% 1000;
+        total = total + (x * y - x - y) %% 97 + ((x * y - x - y) %% 97) * (x - y);
+        total = total %% 100000 + (x - y) * (x * y - x - y);
+        i++;
+    }
+    printf("%%d\\n", total);
+}
+'''
+
+
+def run(program, optimize):
+    start = time.perf_counter()
+    tree = Interpreter.compile(program)
+    if optimize:
+        ValueNumbering.optimize(tree)
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        Interpreter().interpret(tree)
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run time of a loop with repeated subexpressions, with and without CSE')
+    parser.add_argument('-n', '--iterations', type=int, nargs='+', default=[1000, 10000, 50000],
+                        help='Loop iterations')
+    args = parser.parse_args()
+
+    print('{:>10} {:>12} {:>12} {:>8}'.format('iterations', 'plain (s)', 'cse (s)', 'speedup'))
+    for iterations in args.iterations:
+        program = PROGRAM % iterations
+        plain, expected = run(program, False)
+        optimized, output = run(program, True)
+        assert output == expected
+        print('{:>10} {:>12.3f} {:>12.3f} {:>7.2f}x'.format(
+            iterations, plain, optimized, plain / optimized
+        ))
+
+
+if __name__ == '__main__':
+    main()
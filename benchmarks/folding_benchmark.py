@@ -0,0 +1,56 @@
+import argparse
+import contextlib
+import io
+import time
+
+from interpreter.interpreter.interpreter import Interpreter
+
+PROGRAM = '''
+#include <stdio.h>
+int scale = 3;
+void main() {
+    int limit = %d;
+    int step = 2 * 2 - 3;
+    int total = 0;
+    int i = 0;
+    while (i < limit) {
+        if (0 < 1 && 5 >= 4) {
+            total = total + scale * (10 - 8);
+        } else {
+            total = total - 1;
+        }
+        while (0) { total = 0; }
+        i = i + step;
+    }
+    printf("%%d\\n", total);
+}
+'''
+
+
+def run(program, optimize):
+    start = time.perf_counter()
+    tree = Interpreter.compile(program, optimize=optimize)
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        Interpreter().interpret(tree)
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run time with and without constant folding')
+    parser.add_argument('-n', '--iterations', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Loop iterations')
+    args = parser.parse_args()
+
+    print('{:>10} {:>12} {:>12} {:>8}'.format('iterations', 'plain (s)', 'folded (s)', 'speedup'))
+    for iterations in args.iterations:
+        program = PROGRAM % iterations
+        plain, expected = run(program, False)
+        folded, output = run(program, True)
+        assert output == expected
+        print('{:>10} {:>12.3f} {:>12.3f} {:>7.2f}x'.format(
+            iterations, plain, folded, plain / folded
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+FUNCTION_TEMPLATE = '''int func{index}(int a, int b)
+{{
+int i=0;
+int total=0;
+/* accumulate a small arithmetic series */
+for (i=0;i<a;i++)
+{{
+total+=i*b+{index}%7;
+if (total>1000 && b!=0)
+{{
+total=total/2;
+}}
+else
+{{
+total=total-1;
+}}
+}}
+// done
+return total;
+}}
+'''
+
+MAIN_TEMPLATE = '''void main()
+{{
+int x=0;
+{calls}printf("%d\\n", x);
+}}
+'''
+
+
+def generate_program(lines, calls=1):
+    """ Build a synthetic C program of roughly `lines` lines """
+    function_lines = FUNCTION_TEMPLATE.count('\n')
+    count = max(1, lines // function_lines)
+    parts = ['#include<stdio.h>\n']
+    parts.extend(FUNCTION_TEMPLATE.format(index=i) for i in range(count))
+    parts.append(MAIN_TEMPLATE.format(
+        calls=''.join(
+            'x+=func{}(5, {});\n'.format(i, i % 3) for i in range(min(count, calls))
+        )
+    ))
+    return ''.join(parts)
@@ -0,0 +1,54 @@
+import argparse
+import contextlib
+import io
+import time
+
+from interpreter.interpreter.interpreter import Interpreter
+
+PROGRAM = '''
+#include <stdio.h>
+int square(int x) {
+    return x * x;
+}
+int clamp(int v, int limit) {
+    int over = v > limit;
+    return over ? limit : v;
+}
+void main() {
+    int total = 0;
+    int i;
+    for (i = 0; i < %d; i++) {
+        total = total + clamp(square(i %% 50), 1000);
+    }
+    printf("%%d\\n", total);
+}
+'''
+
+
+def run(program, optimize):
+    start = time.perf_counter()
+    tree = Interpreter.compile(program, optimize=optimize)
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        Interpreter().interpret(tree)
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run time of a loop calling helpers, with and without inlining')
+    parser.add_argument('-n', '--iterations', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Loop iterations')
+    args = parser.parse_args()
+
+    print('{:>10} {:>12} {:>12} {:>8}'.format('iterations', 'calls (s)', 'inlined (s)', 'speedup'))
+    for iterations in args.iterations:
+        program = PROGRAM % iterations
+        calls, expected = run(program, False)
+        inlined, output = run(program, True)
+        assert output == expected
+        print('{:>10} {:>12.3f} {:>12.3f} {:>7.2f}x'.format(
+            iterations, calls, inlined, calls / inlined
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+import argparse
+import contextlib
+import io
+import time
+
+from interpreter.interpreter.interpreter import Interpreter
+from .generate import generate_program
+
+
+def run(code, lazy):
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        Interpreter.run(code, lazy=lazy)
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run time of eager and lazy function bodies')
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=[1000, 10000, 50000],
+                        help='Program sizes in lines')
+    parser.add_argument('-c', '--calls', type=int, default=3,
+                        help='Number of functions called from main')
+    args = parser.parse_args()
+
+    print('{:>8} {:>10} {:>10} {:>8}'.format('lines', 'eager (s)', 'lazy (s)', 'speedup'))
+    for lines in args.sizes:
+        code = generate_program(lines, args.calls)
+        eager, eager_output = run(code, lazy=False)
+        lazy, lazy_output = run(code, lazy=True)
+        assert eager_output == lazy_output, 'outputs differ'
+        print('{:>8} {:>10.3f} {:>10.3f} {:>7.1f}x'.format(lines, eager, lazy, eager / lazy))
+
+
+if __name__ == '__main__':
+    main()
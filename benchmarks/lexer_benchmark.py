@@ -0,0 +1,90 @@
+import argparse
+import time
+import tracemalloc
+
+from interpreter.lexer_analyzer.lexer import Lexer
+from interpreter.lexer_analyzer.legacy_lexer import LegacyLexer
+from interpreter.lexer_analyzer.token_type import EOF
+from .generate import generate_program
+
+
+def tokenize(lexer_class, code):
+    lexer = lexer_class(code)
+    tokens = []
+    token = lexer.get_next_token
+    while token.type != EOF:
+        tokens.append((token.type, token.value))
+        token = lexer.get_next_token
+    return tokens
+
+
+def buffered(code):
+    """ The tokens of the TokenBuffer the parser reads """
+    return [(token.type, token.value) for token in Lexer(code).tokenize()][:-1]
+
+
+def measure(lexers, code, repeat):
+    """ Best time of each lexer over repeat rounds, which run them in turn so
+    that load on the machine slows them alike """
+    best = [None] * len(lexers)
+    for _ in range(repeat):
+        for index, lex in enumerate(lexers):
+            start = time.perf_counter()
+            lex(code)
+            elapsed = time.perf_counter() - start
+            if best[index] is None or elapsed < best[index]:
+                best[index] = elapsed
+    return best
+
+
+def allocated(build):
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def token_list(code):
+    lexer = Lexer(code)
+    tokens = [lexer.get_next_token]
+    while tokens[-1].type != EOF:
+        tokens.append(lexer.get_next_token)
+    return tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare tokens per second of the lexers')
+    parser.add_argument('-l', '--lines', type=int, default=20000, help='Size of generated program')
+    parser.add_argument('-r', '--repeat', type=int, default=10, help='Number of runs per lexer')
+    args = parser.parse_args()
+
+    code = generate_program(args.lines)
+    tokens = tokenize(Lexer, code)
+    if tokens != tokenize(LegacyLexer, code) or buffered(code) != tokens:
+        raise Exception('Token streams of the lexers differ')
+
+    # table: a Token object per get_next_token call; buffer: tokenize, which
+    # the parser reads
+    names = ('legacy', 'table', 'buffer')
+    times = measure((
+        lambda code: tokenize(LegacyLexer, code),
+        lambda code: tokenize(Lexer, code),
+        lambda code: Lexer(code).tokenize(),
+    ), code, args.repeat)
+    print('{} lines, {} tokens'.format(code.count('\n'), len(tokens)))
+    for name, elapsed in zip(names, times):
+        print('{:>8}: {:8.3f}s {:12.0f} tokens/s {:6.1f}x'.format(
+            name, elapsed, len(tokens) / elapsed, times[0] / elapsed
+        ))
+
+    objects, objects_size = allocated(lambda: token_list(code))
+    buffer, buffer_size = allocated(lambda: Lexer(code).tokenize())
+    if [(t.type, t.value, t.start, t.end) for t in buffer] != [(t.type, t.value, t.start, t.end) for t in objects]:
+        raise Exception('Token buffer differs from the token stream')
+    print('Token objects: {:8.1f} MB'.format(objects_size / 2 ** 20))
+    print('TokenBuffer:   {:8.1f} MB'.format(buffer_size / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import contextlib
+import io
+import time
+
+from interpreter.interpreter.interpreter import Interpreter
+
+PROGRAMS = {
+    'invariant': '''
+#include <stdio.h>
+void main() {
+    int n = %d;
+    int width = 7;
+    int height = 3;
+    int total = 0;
+    int i = 0;
+    while (i < n - 1) {
+        total = total + (width * height + width - height) * 2;
+        i++;
+    }
+    printf("%%d\\n", total);
+}
+''',
+    'induction': '''
+#include <stdio.h>
+void main() {
+    int n = %d;
+    int total = 0;
+    int i;
+    for (i = 0; i < n; i++) {
+        total = total + i * 4 - i * 3 + i * 4;
+    }
+    printf("%%d\\n", total);
+}
+''',
+    'unroll': '''
+#include <stdio.h>
+void main() {
+    int n = %d;
+    int r = 3;
+    int total = 0;
+    int i;
+    int j;
+    for (i = 0; i < n / 4; i++) {
+        for (j = 0; j <= r; j++) {
+            total = total + j * 2 + 1;
+        }
+    }
+    printf("%%d\\n", total);
+}
+''',
+}
+
+
+def run(program, optimize):
+    start = time.perf_counter()
+    tree = Interpreter.compile(program, optimize=optimize)
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        Interpreter().interpret(tree)
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run time of loop-heavy programs with and without -O')
+    parser.add_argument('-n', '--iterations', type=int, default=50000, help='Loop iterations')
+    parser.add_argument('programs', nargs='*', default=sorted(PROGRAMS), help='Programs to run')
+    args = parser.parse_args()
+
+    print('{:>10} {:>12} {:>12} {:>8}'.format('program', 'plain (s)', '-O (s)', 'speedup'))
+    for name in args.programs:
+        program = PROGRAMS[name] % args.iterations
+        plain, expected = run(program, False)
+        optimized, output = run(program, True)
+        assert output == expected
+        print('{:>10} {:>12.3f} {:>12.3f} {:>7.2f}x'.format(
+            name, plain, optimized, plain / optimized
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+import argparse
+import os
+import time
+
+from interpreter.lexer_analyzer.lexer import Lexer
+from interpreter.syntax_analyzer.parser import Parser
+from interpreter.syntax_analyzer import parallel
+from .generate import generate_program
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel parse speedup by number of worker processes')
+    parser.add_argument('-l', '--lines', type=int, default=100000, help='Size of generated program')
+    parser.add_argument('-w', '--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, 8, os.cpu_count() or 1}), help='Worker counts')
+    args = parser.parse_args()
+
+    tokens = Lexer(generate_program(args.lines)).tokenize()
+
+    start = time.perf_counter()
+    Parser(tokens).parse()
+    serial = time.perf_counter() - start
+    print('{} cpus, {} lines'.format(os.cpu_count(), args.lines))
+    print('{:>8} {:>10} {:>8}'.format('workers', 'time (s)', 'speedup'))
+    print('{:>8} {:>10.3f} {:>8.2f}'.format('serial', serial, 1.0))
+
+    for workers in args.workers:
+        start = time.perf_counter()
+        parallel.parse(tokens, workers=workers)
+        elapsed = time.perf_counter() - start
+        print('{:>8} {:>10.3f} {:>8.2f}'.format(workers, elapsed, serial / elapsed))
+
+
+if __name__ == '__main__':
+    main()
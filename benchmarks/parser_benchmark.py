@@ -0,0 +1,31 @@
+import argparse
+import time
+
+from interpreter.lexer_analyzer.lexer import Lexer
+from interpreter.syntax_analyzer.parser import Parser
+from .generate import generate_program
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse time by program size')
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Program sizes in lines')
+    args = parser.parse_args()
+
+    print('{:>8} {:>10} {:>10} {:>12}'.format('lines', 'lex (s)', 'parse (s)', 'us / line'))
+    for lines in args.sizes:
+        code = generate_program(lines)
+
+        start = time.perf_counter()
+        tokens = Lexer(code).tokenize()
+        lexed = time.perf_counter()
+        Parser(tokens).parse()
+        parsed = time.perf_counter()
+
+        print('{:>8} {:>10.3f} {:>10.3f} {:>12.1f}'.format(
+            lines, lexed - start, parsed - lexed, (parsed - start) * 1e6 / lines
+        ))
+
+
+if __name__ == '__main__':
+    main()
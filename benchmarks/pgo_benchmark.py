@@ -0,0 +1,85 @@
+import argparse
+import contextlib
+import io
+import time
+
+from interpreter.interpreter.interpreter import Interpreter
+from interpreter.interpreter.profile import Profile, Recorder, source_key
+
+PROGRAM = '''
+#include <stdio.h>
+int small(int x) {
+    return x * 2 + 1;
+}
+int medium(int x) {
+    int a = x * 3 + 1;
+    int b = a * a - x;
+    int c = b %% 7 + a %% 5;
+    int d = c * c + b * 2 - a;
+    int e = d %% 11 + c * 3 - b %% 13;
+    return e + d - c + b - a;
+}
+int rare(int x) {
+    return x - 1;
+}
+int work(int n, int w) {
+    int i, j, total = 0;
+    for (i = 0; i < n; i++) {
+        if (i %% 1000 == 999 && w > 2) {
+            total = total + rare(i);
+        }
+        if (w > 2 && i %% 97 == 0) {
+            total = total + 1;
+        }
+        total = total + medium(i) + small(i);
+        for (j = 0; j < 20; j++) {
+            total = total + j;
+        }
+        total = total %% 100000;
+    }
+    return total;
+}
+void main() {
+    printf("%%d\\n", work(%d, 5));
+}
+'''
+
+
+def run(program, optimize, profile=None, recorder=None):
+    start = time.perf_counter()
+    tree = Interpreter.compile(program, optimize=optimize, profile=profile)
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        Interpreter(recorder=recorder).interpret(tree)
+    if recorder is not None:
+        profile = Profile(source_key(program))
+        profile.record(tree, recorder)
+        return profile
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run time of a program optimized with and without a profile')
+    parser.add_argument('-n', '--iterations', type=int, nargs='+', default=[1000, 5000, 20000],
+                        help='Loop iterations')
+    parser.add_argument('--train', type=int, default=500, help='Loop iterations of the training run')
+    args = parser.parse_args()
+
+    print('{:>10} {:>12} {:>12} {:>12} {:>8}'.format('iterations', 'plain (s)', '-O (s)', 'profile (s)', 'speedup'))
+    for iterations in args.iterations:
+        program = PROGRAM % iterations
+        # the training run loops less; the count is the last literal of the
+        # source, so the other nodes keep their positions
+        profile = run(PROGRAM % args.train, False, recorder=Recorder())
+        profile.key = source_key(program)
+        plain, expected = run(program, False)
+        optimized, output = run(program, True)
+        assert output == expected
+        guided, output = run(program, True, profile)
+        assert output == expected
+        print('{:>10} {:>12.3f} {:>12.3f} {:>12.3f} {:>7.2f}x'.format(
+            iterations, plain, optimized, guided, optimized / guided
+        ))
+
+
+if __name__ == '__main__':
+    main()
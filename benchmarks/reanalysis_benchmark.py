@@ -0,0 +1,48 @@
+import argparse
+import time
+
+from interpreter.lexer_analyzer.incremental import IncrementalLexer
+from interpreter.syntax_analyzer.parser import Parser
+from interpreter.semantic_analyzer.analyzer import SemanticAnalyzer
+from interpreter.semantic_analyzer.incremental import IncrementalAnalyzer
+from .generate import generate_program
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analysis time after editing one function')
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=[1000, 10000, 50000],
+                        help='Program sizes in lines')
+    args = parser.parse_args()
+
+    print('{:>8} {:>10} {:>12} {:>12} {:>12}'.format(
+        'lines', 'full (s)', 'reanalyzed', 'first (ms)', 'next (ms)'
+    ))
+    for lines in args.sizes:
+        lexer = IncrementalLexer(generate_program(lines))
+        analyzer = IncrementalAnalyzer()
+        analyzer.analyze(Parser(lexer.tokens).parse(), lexer.text)
+
+        full, edits = 0, []
+        for edit in range(2):
+            # add a line to the middle function, moving all those after it
+            offset = lexer.text.index('int func{}('.format(lines // 40))
+            offset = lexer.text.index('return total;', offset)
+            lexer.edit(offset, 0, 'total=total+1;\n')
+
+            tree = Parser(lexer.tokens).parse()
+            start = time.perf_counter()
+            SemanticAnalyzer.analyze(tree)
+            full = time.perf_counter() - start
+
+            tree = Parser(lexer.tokens).parse()
+            start = time.perf_counter()
+            analyzer.analyze(tree, lexer.text)
+            edits.append((time.perf_counter() - start) * 1000)
+
+        print('{:>8} {:>10.3f} {:>12} {:>12.1f} {:>12.1f}'.format(
+            lines, full, len(analyzer.reanalyzed), *edits
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+import argparse
+import time
+
+from interpreter.lexer_analyzer.lexer import Lexer
+from interpreter.lexer_analyzer.incremental import IncrementalLexer
+from .generate import generate_program
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare a full re-lex with an incremental one')
+    parser.add_argument('-l', '--lines', type=int, default=50000, help='Size of generated program')
+    args = parser.parse_args()
+
+    code = generate_program(args.lines)
+    lexer = IncrementalLexer(code)
+    offset = code.index('total+=i*b', len(code) // 2)
+
+    edits = (
+        ('replace one character', offset + len('total+=i*'), 1, 'a'),
+        ('open a comment', offset, 0, '/*'),
+        ('close it again', offset, 2, ''),
+        ('insert a line', offset, 0, 'x=x+1;\n'),
+    )
+    for name, at, deleted, inserted in edits:
+        start = time.perf_counter()
+        index, removed, added = lexer.edit(at, deleted, inserted)
+        incremental = time.perf_counter() - start
+
+        start = time.perf_counter()
+        tokens = Lexer(lexer.text).tokenize()
+        full = time.perf_counter() - start
+
+        if list(tokens.kinds) != list(lexer.tokens.kinds) or list(tokens.starts) != list(lexer.tokens.starts):
+            raise Exception('Incremental tokens differ from a full re-lex')
+        print('{:>22}: {:3} tokens re-lexed, incremental {:8.2f} ms, full {:8.2f} ms'.format(
+            name, added, incremental * 1000, full * 1000
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+import argparse
+import contextlib
+import io
+import time
+
+from interpreter.interpreter.interpreter import Interpreter
+from interpreter.vm.machine import Machine
+
+from .loop_benchmark import PROGRAMS
+
+PROGRAMS = dict(PROGRAMS, calls='''
+#include <stdio.h>
+int collatz(int x) {
+    int steps = 0;
+    while (x != 1) {
+        steps++;
+        x = x %% 2 == 0 ? x / 2 : 3 * x + 1;
+    }
+    return steps;
+}
+void main() {
+    int n = %d;
+    int total = 0;
+    int i;
+    for (i = 1; i <= n / 50; i++) {
+        total = total + collatz(i);
+    }
+    printf("%%d\\n", total);
+}
+''')
+
+
+def run(engine, program, optimize):
+    tree = Interpreter.compile(program, optimize=optimize)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        engine().interpret(tree)
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run time of programs on the tree interpreter and the bytecode VM')
+    parser.add_argument('-n', '--iterations', type=int, default=50000, help='Loop iterations')
+    parser.add_argument('-O', '--optimize', action='store_true', help='Optimize the programs first')
+    parser.add_argument('programs', nargs='*', default=sorted(PROGRAMS), help='Programs to run')
+    args = parser.parse_args()
+
+    print('{:>10} {:>12} {:>12} {:>8}'.format('program', 'tree (s)', 'vm (s)', 'speedup'))
+    for name in args.programs:
+        program = PROGRAMS[name] % args.iterations
+        tree, expected = run(Interpreter, program, args.optimize)
+        vm, output = run(Machine, program, args.optimize)
+        assert output == expected
+        print('{:>10} {:>12.3f} {:>12.3f} {:>7.2f}x'.format(name, tree, vm, tree / vm))
+
+
+if __name__ == '__main__':
+    main()
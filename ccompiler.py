@@ -1,10 +1,39 @@
 from interpreter.interpreter.interpreter import Interpreter
+from interpreter.utils.cache import CompilationCache, ResultCache, DEFAULT_DIRECTORY
 import argparse
 
 
 parser = argparse.ArgumentParser(description='Execute .c file')
 parser.add_argument('-f', '--file', help='File with C code')
 parser.add_argument('-c', '--code', help='Code of C code')
+parser.add_argument('-l', '--lazy', action='store_true',
+                    help='Parse and analyze function bodies on their first call')
+parser.add_argument('-m', '--memoize', action='store_true',
+                    help='Cache the results of calls to pure functions')
+parser.add_argument('--memo-stats', action='store_true',
+                    help='Print memoization hits and misses to stderr')
+parser.add_argument('-O', '--optimize', action='store_true',
+                    help='Inline small functions, fold constants, remove dead code and optimize loops before running')
+parser.add_argument('--opt-stats', action='store_true',
+                    help='Print what the optimizer did to stderr')
+parser.add_argument('--ir', action='store_true',
+                    help='Run the program lowered to a control-flow graph in SSA form')
+parser.add_argument('--dump-ir', action='store_true',
+                    help='Print the SSA form of each function to stderr (implies --ir)')
+parser.add_argument('--vm', action='store_true',
+                    help='Run the program compiled to bytecode on a virtual machine')
+parser.add_argument('--dump-bytecode', action='store_true',
+                    help='Print the bytecode of each function to stderr (implies --vm)')
+parser.add_argument('--closures', action='store_true',
+                    help='Run the program compiled to nested closures')
+parser.add_argument('--train-profile', metavar='FILE',
+                    help='Count what this run executes and add it to the profile in FILE')
+parser.add_argument('--profile', metavar='FILE',
+                    help='Optimize with the profile of training runs in FILE (implies -O)')
+parser.add_argument('--cache', action='store_true',
+                    help='Keep analyzed programs and the output of input-free programs in --cache-dir')
+parser.add_argument('--cache-dir', default=DEFAULT_DIRECTORY,
+                    help='Directory of the caches (default: %(default)s)')
 
 args = parser.parse_args()
 if not args.file and not args.code:
@@ -13,10 +42,29 @@ if not args.file and not args.code:
 elif args.file and args.code:
     argparse.ArgumentParser().error('YChoose only one argument from -f or -c')
 
-code = ''
+elif (args.memoize or args.memo_stats) and (
+        args.ir or args.dump_ir or args.vm or args.dump_bytecode or args.closures):
+    parser.error('-m/--memoize and --memo-stats only apply to the tree interpreter, '
+                 'not to --ir, --vm or --closures')
+
+cache = CompilationCache(args.cache_dir) if args.cache else None
+results = ResultCache(args.cache_dir) if args.cache else None
+
 if args.file:
+    # without the caches, the lexer reads the file in chunks instead of
+    # loading it at once
     with open(args.file, 'r') as file:
-        code = file.read()
+        Interpreter.run(file, lazy=args.lazy, cache=cache, results=results,
+                        memoize=args.memoize, memo_stats=args.memo_stats,
+                        optimize=args.optimize, opt_stats=args.opt_stats,
+                        ir=args.ir, dump_ir=args.dump_ir,
+                        vm=args.vm, dump_bytecode=args.dump_bytecode, closures=args.closures,
+                        profile=args.profile, train=args.train_profile)
 else:
-    code = args.code
-Interpreter.run(code)
+    Interpreter.run(args.code, lazy=args.lazy, cache=cache, results=results,
+                    memoize=args.memoize, memo_stats=args.memo_stats,
+                    optimize=args.optimize, opt_stats=args.opt_stats,
+                    ir=args.ir, dump_ir=args.dump_ir,
+                    vm=args.vm, dump_bytecode=args.dump_bytecode, closures=args.closures,
+                    profile=args.profile, train=args.train_profile)
+
@@ -1,6 +1,6 @@
 from ..utils.utils import definition
 import math
 
-@definition(return_type='double', arg_types=['double'])
-def sqrt(a):
+@definition(return_type='double', arg_types=['double'], pure=True)
+def sqrt(context, a):
     return math.sqrt(a)
\ No newline at end of file
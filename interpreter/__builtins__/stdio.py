@@ -2,27 +2,24 @@ from ..utils.utils import definition
 from ..interpreter.number import Number
 
 @definition(return_type='int', arg_types=None)
-def printf(*args):
-    fmt, *params = args
-    message = fmt % tuple([param.value for param in params])
-    result = len(message)
+def printf(context, fmt, *params):
+    message = fmt % params
     print(message, end='')
-    return result
+    return len(message)
 
-@definition(return_type='char', arg_types=[])
-def getchar():
+@definition(return_type='char', arg_types=[], reads_input=True)
+def getchar(context):
     import sys
     return ord(sys.stdin.read(1))
 
-@definition(return_type='int', arg_types=None)
-def scanf(*args):
+@definition(return_type='int', arg_types=None, reads_input=True)
+def scanf(context, fmt, *params):
     import re
     def cast(flag):
         if flag[-1] == 'd':
             return 'int'
         raise Exception('You are not allowed to use \'{}\' other type'.format(flag))
 
-    fmt, *params, memory = args
     fmt = re.sub(r'\s+', '', fmt)
     all_flags = re.findall('%[^%]*[dfi]', fmt)
     if len(all_flags) != len(params):
@@ -35,7 +32,7 @@ def scanf(*args):
         str = input()
         elements.extend(str.split())
     for flag, param, val in zip(all_flags, params, elements):
-        memory[param] = Number(cast(flag), val)
+        context.memory[param] = Number(cast(flag), val)
 
     return len(elements)
 
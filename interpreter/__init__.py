@@ -1,6 +1,12 @@
+__version__ = '0.4.0'
+
 from . import utils
 from . import lexer_analyzer
 from . import syntax_analyzer
+# before semantic_analyzer, whose analyzer imports interpreter.number while
+# this package's modules import the analyzer
+from . import interpreter
 from . import semantic_analyzer
-
-
+from . import optimizer
+from . import ir
+from . import vm
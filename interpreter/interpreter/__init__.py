@@ -1,2 +1,5 @@
 from . import memory_mgmt
+from . import memo
+from . import profile
+from . import closures
 from . import interpreter
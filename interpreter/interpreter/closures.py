@@ -0,0 +1,471 @@
+from .memory_mgmt import Memory, UNINITIALIZED
+from .number import Number, BINARY_FUNCTIONS, ASSIGN_FUNCTIONS, TESTS, box
+from ..lexer_analyzer.token_type import *
+from ..semantic_analyzer.analyzer import SemanticAnalyzer
+from ..semantic_analyzer.mem import GLOBAL
+from ..syntax_analyzer.syntax_tree import *
+from ..utils.registry import Context, library
+
+ONE = Number('int', 1)
+ZERO = Number('int', 0)
+MINUS_ONE = Number('int', -1)
+
+
+def literal(node):
+    if node.type == INTEGER_CONST:
+        return Number('int', node.value)
+    elif node.type == CHAR_CONST:
+        return Number('char', node.value)
+    return Number('float', node.value)
+
+
+class Function(object):
+    """ Body of a user function compiled to a closure """
+    __slots__ = ('name', 'body', 'frame_size')
+
+    def __init__(self, name, body, frame_size):
+        self.name = name
+        self.body = body
+        self.frame_size = frame_size
+
+
+class ClosureCompiler(NodeVisitor):
+    """ Compiles the nodes of an analyzed tree to nested closures
+
+    The closure of a node takes the slot list of the running frame and
+    returns the value of the node, as the interpreter's visit_ method
+    does. The method, the operator, the depth and slot of a variable and
+    the types of coercions are picked once, when the closure is made.
+
+    Closures do what the interpreter does, in the same order: only a
+    return at the top level of a body ends the call, and nodes the
+    interpreter has no visit_ method for raise when they run.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def body(self, statements, returned=None):
+        """ Closure of statements run in order, then returned for the value """
+        statements = tuple(self.visit(statement) for statement in statements)
+        if returned is None:
+            def body(local):
+                for statement in statements:
+                    statement(local)
+            return body
+
+        returned = self.visit(returned)
+
+        def body_return(local):
+            for statement in statements:
+                statement(local)
+            return returned(local)
+        return body_return
+
+    def function(self, node):
+        statements = []
+        for child in node.body.children:
+            if isinstance(child, ReturnStmt):
+                return Function(node.func_name, self.body(statements, child), node.frame_size)
+            statements.append(child)
+        return Function(node.func_name, self.body(statements), node.frame_size)
+
+    def generic_visit(self, node):
+        message = 'No visit_{} method'.format(type(node).__name__)
+
+        def fail(local):
+            raise Exception(message)
+        return fail
+
+    def condition(self, node):
+        """ Closure of a node whose value is only tested for truth, which
+        returns a value just as true """
+        if isinstance(node, Expression) and len(node.children) == 1:
+            node = node.children[0]
+        if not isinstance(node, BinaryOperator):
+            return self.visit(node)
+        op = node.op.type
+        if op in (LOG_AND_OP, LOG_OR_OP):
+            left, right = self.condition(node.left), self.condition(node.right)
+            if op == LOG_AND_OP:
+                def both(local):
+                    return left(local) and right(local)
+                return both
+
+            def either(local):
+                return left(local) or right(local)
+            return either
+        if node.operation is None or node.operation.function not in TESTS:
+            return self.visit(node)
+
+        # the Number of the comparison is never made
+        test = TESTS[node.operation.function]
+        if self.local(node.left) and self.local(node.right):
+            left, right = node.left.slot, node.right.slot
+
+            def compare_locals(local):
+                return test(local[left].value, local[right].value)
+            return compare_locals
+        if self.local(node.left) and self.constant(node.right) is not None:
+            slot, value = node.left.slot, self.constant(node.right)
+
+            def compare_local_constant(local):
+                return test(local[slot].value, value)
+            return compare_local_constant
+
+        left, right = self.visit(node.left), self.visit(node.right)
+
+        def compare(local):
+            first = left(local)
+            second = right(local)
+            return test(first.value, second.value)
+        return compare
+
+    @staticmethod
+    def local(node):
+        return isinstance(node, Var) and node.depth != GLOBAL
+
+    @staticmethod
+    def constant(node):
+        """ Value of a constant operand, None for other nodes """
+        if isinstance(node, Num):
+            return literal(node).value
+        if isinstance(node, Constant):
+            return node.number.value
+        return None
+
+    def visit_NoOp(self, node):
+        def noop(local):
+            return None
+        return noop
+
+    def constant_closure(self, value):
+        def constant(local):
+            return value
+        return constant
+
+    def visit_Num(self, node):
+        return self.constant_closure(literal(node))
+
+    def visit_Constant(self, node):
+        return self.constant_closure(node.number)
+
+    def visit_String(self, node):
+        return self.constant_closure(node.value)
+
+    def visit_Var(self, node):
+        slot = node.slot
+        if node.depth == GLOBAL:
+            variables = self.engine.memory.globals
+
+            def global_var(local):
+                return variables[slot]
+            return global_var
+
+        def local_var(local):
+            return local[slot]
+        return local_var
+
+    def store(self, var, value):
+        """ Closure that assigns what the closure value returns to var and
+        returns it """
+        slot = var.slot
+        if var.depth == GLOBAL:
+            variables = self.engine.memory.globals
+
+            def store_global(local):
+                variables[slot] = result = value(local)
+                return result
+            return store_global
+
+        def store_local(local):
+            local[slot] = result = value(local)
+            return result
+        return store_local
+
+    def visit_VarDeclaration(self, node):
+        store = self.store(node.var_node, self.constant_closure(UNINITIALIZED))
+
+        def declaration(local):
+            store(local)
+        return declaration
+
+    def visit_BinaryOperator(self, node):
+        op = node.op.type
+        if op in (LOG_AND_OP, LOG_OR_OP):
+            test = self.condition(node)
+
+            def logical(local):
+                return ONE if test(local) else ZERO
+            return logical
+        if node.operation is None:
+            if op not in BINARY_FUNCTIONS:
+                # fails when it runs, not when the closures are built
+                message = 'No binary operator {}'.format(node.op.value)
+
+                def fail(local):
+                    raise Exception(message)
+                return fail
+            function = BINARY_FUNCTIONS[op]
+            left, right = self.visit(node.left), self.visit(node.right)
+
+            def binary(local):
+                return function(left(local), right(local))
+            return binary
+
+        function, ttype = node.operation.function, node.operation.type
+        new = object.__new__
+        if self.local(node.left) and self.local(node.right):
+            left, right = node.left.slot, node.right.slot
+
+            def operation_locals(local):
+                number = new(Number)
+                number.type = ttype
+                number.value = function(local[left].value, local[right].value)
+                return number
+            return operation_locals
+
+        value = self.constant(node.right)
+        if self.local(node.left) and value is not None:
+            slot = node.left.slot
+
+            def operation_local_constant(local):
+                number = new(Number)
+                number.type = ttype
+                number.value = function(local[slot].value, value)
+                return number
+            return operation_local_constant
+
+        left = self.visit(node.left)
+        if value is not None:
+            def operation_constant(local):
+                number = new(Number)
+                number.type = ttype
+                number.value = function(left(local).value, value)
+                return number
+            return operation_constant
+
+        right = self.visit(node.right)
+
+        def operation(local):
+            first = left(local)
+            second = right(local)
+            number = new(Number)
+            number.type = ttype
+            number.value = function(first.value, second.value)
+            return number
+        return operation
+
+    def update(self, node):
+        """ ++ and -- """
+        var, increment, prefix = node.expr, node.op.type == INC_OP, node.prefix
+        step = 1 if increment else -1
+        types = Number.types
+        new = object.__new__
+        variables = self.engine.memory.globals if var.depth == GLOBAL else None
+        slot = var.slot
+
+        def update(local):
+            slots = local if variables is None else variables
+            old = slots[slot]
+            if type(old) is Number:
+                # what += Number('int', 1) makes of a Number
+                value = new(Number)
+                value.type = old.type
+                value.value = types[old.type](old.value) + step
+            else:
+                # raises, as += does in the interpreter
+                value = old
+                if increment:
+                    value += ONE
+                else:
+                    value -= ONE
+            slots[slot] = value
+            return value if prefix else old
+        return update
+
+    def visit_UnaryOperator(self, node):
+        op = node.op.type
+        if op in (INC_OP, DEC_OP):
+            return self.update(node)
+        if not node.prefix or op == ADD_OP:
+            return self.visit(node.expr)
+        if op == AND_OP:
+            return self.constant_closure((node.expr.depth, node.expr.slot))
+
+        expr = self.visit(node.expr)
+        if op == SUB_OP:
+            def negate(local):
+                return MINUS_ONE * expr(local)
+            return negate
+        elif op == LOG_NEG:
+            def negation(local):
+                return expr(local)._not()
+            return negation
+
+        ttype = node.op.value
+
+        def cast(local):
+            return Number(ttype, expr(local).value)
+        return cast
+
+    def visit_Assign(self, node):
+        function = ASSIGN_FUNCTIONS.get(node.op.type)
+        right = self.visit(node.right)
+        if function is not None:
+            load = self.visit(node.left)
+
+            def compound(local):
+                old = load(local)
+                return function(old, right(local))
+            return self.store(node.left, compound)
+        if node.coerce is None:
+            return self.store(node.left, right)
+
+        ttype = node.coerce
+
+        def coerce(local):
+            return Number(ttype, right(local).value)
+        return self.store(node.left, coerce)
+
+    def visit_Expression(self, node):
+        if len(node.children) == 1:
+            return self.visit(node.children[0])
+        children = tuple(self.visit(child) for child in node.children)
+
+        def expression(local):
+            value = None
+            for child in children:
+                value = child(local)
+            return value
+        return expression
+
+    def visit_FunctionCall(self, node):
+        args = tuple(self.visit(arg) for arg in node.args)
+        name, call = node.name, self.engine.call
+        if node.coerce is None:
+            def function_call(local):
+                return call(name, [arg(local) for arg in args])
+            return function_call
+
+        coerce = tuple(node.coerce)
+
+        def coerced_call(local):
+            values = [arg(local) for arg in args]
+            return call(name, [
+                value if ttype is None else Number(ttype, value.value)
+                for ttype, value in zip(coerce, values)
+            ])
+        return coerced_call
+
+    def visit_TernaryOperator(self, node):
+        condition = self.condition(node.condition)
+        texpression, fexpression = self.visit(node.texpression), self.visit(node.fexpression)
+        ttype = node.coerce
+
+        def ternary(local):
+            if condition(local):
+                return texpression(local)
+            value = fexpression(local)
+            # as in the interpreter, only the false value is coerced
+            if ttype is not None:
+                return Number(ttype, value.value)
+            return value
+        return ternary
+
+    def visit_ReturnStmt(self, node):
+        expression = self.visit(node.expression)
+        if node.coerce is None:
+            return expression
+
+        ttype = node.coerce
+
+        def coerced_return(local):
+            return Number(ttype, expression(local).value)
+        return coerced_return
+
+    def visit_CompoundStatement(self, node):
+        return self.body(node.children)
+
+    def visit_IfStatement(self, node):
+        condition, tbody, fbody = self.condition(node.condition), self.visit(node.tbody), self.visit(node.fbody)
+
+        def if_statement(local):
+            if condition(local):
+                tbody(local)
+            else:
+                fbody(local)
+        return if_statement
+
+    def visit_WhileStatement(self, node):
+        condition, body = self.condition(node.condition), self.visit(node.body)
+
+        def while_statement(local):
+            while condition(local):
+                body(local)
+        return while_statement
+
+    def visit_ForStatement(self, node):
+        setup, condition = self.visit(node.setup), self.condition(node.condition)
+        body, increment = self.visit(node.body), self.visit(node.increment)
+
+        def for_statement(local):
+            setup(local)
+            while condition(local):
+                body(local)
+                increment(local)
+        return for_statement
+
+
+class ClosureInterpreter(object):
+    """ Runs a program compiled to closures, as the interpreter runs its tree
+
+    A function is compiled on its first call, after its body is parsed if
+    the program was parsed lazily.
+    """
+
+    def __init__(self):
+        self.memory = Memory()
+        self.context = Context(self.memory)
+        self.functions = {}
+        # name -> compiled Function, or a builtin
+        self.compiled = {}
+        # the interpreter's memos; calls are not memoized here
+        self.memos = {}
+
+    def interpret(self, tree):
+        for node in tree.children:
+            if isinstance(node, IncludeLibrary):
+                self.functions.update(library(node.library_name))
+            elif isinstance(node, FunctionDeclaration):
+                self.functions[node.func_name] = node
+        self.memory = Memory(tree.global_size)
+        self.context = Context(self.memory)
+        ClosureCompiler(self).body([
+            node for node in tree.children if not isinstance(node, (FunctionDeclaration, IncludeLibrary))
+        ])(self.memory.globals)
+        return self.call('main', [])
+
+    def load(self, name):
+        function = self.functions[name]
+        if isinstance(function, FunctionDeclaration):
+            if isinstance(function.body, LazyFunctionBody):
+                SemanticAnalyzer.load_body(function)
+            function = ClosureCompiler(self).function(function)
+        self.compiled[name] = function
+        return function
+
+    def call(self, name, args):
+        function = self.compiled.get(name) or self.load(name)
+        if type(function) is Function:
+            memory = self.memory
+            # params have the first slots of the frame
+            memory.new_frame(name, function.frame_size)
+            memory.locals[:len(args)] = args
+            res = function.body(memory.locals)
+            memory.del_frame()
+            return res
+        # builtins take raw values; addresses and strings are passed as is
+        return box(function.return_type, function(self.context, *[
+            arg.value if type(arg) is Number else arg for arg in args
+        ]))
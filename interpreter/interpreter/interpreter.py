@@ -1,40 +1,64 @@
+import contextlib
+import sys
+
 from .memory_mgmt import *
-from .number import Number
+from .number import Number, box
 from ..lexer_analyzer.lexer import Lexer
 from ..lexer_analyzer.token_type import *
 from ..syntax_analyzer.parser import Parser
 from ..syntax_analyzer.syntax_tree import *
 from ..semantic_analyzer.analyzer import SemanticAnalyzer
-from ..utils.utils import get_functions, MessageColor
+from ..semantic_analyzer.mem import GLOBAL
+from ..semantic_analyzer.effects import input_free, pure_functions
+from ..optimizer.folding import ConstantFolder
+from ..optimizer.inliner import Inliner
+from ..optimizer.loops import LoopOptimizer
+from ..optimizer.values import ValueNumbering
+from ..optimizer.branches import BranchOrder
+from .memo import Memo, MISSING
+from .profile import Profile, Recorder
+from .closures import ClosureInterpreter
+from ..utils.utils import MessageColor, Tee
+from ..utils.registry import Context, library
 
 class Interpreter(NodeVisitor):
 
-    def __init__(self):
+    def __init__(self, memoize=False, recorder=None):
+        """ memoize: cache the results of calls to pure functions; recorder:
+        a Recorder counting the nodes visited, for a training run """
         self.memory = Memory()
+        self.context = Context(self.memory)
+        self.functions = {}
+        self.memoize = memoize
+        self.memos = {}
+        self.recorder = recorder
+        if recorder is not None:
+            self.visit = self.recording_visit
+
+    def recording_visit(self, node):
+        result = NodeVisitor.visit(self, node)
+        self.recorder.counts[id(node)] += 1
+        if type(result) is Number and result.value:
+            self.recorder.trues[id(node)] += 1
+        return result
 
     def load_libs(self, tree):
         for node in filter(lambda o: isinstance(o, IncludeLibrary), tree.children):
-            functions = get_functions('interpreter.__builtins__.{}'.format(
-                node.library_name
-            ))
-
-            for function in functions:
-                self.memory[function.__name__] = function
+            self.functions.update(library(node.library_name))
 
     def load_functs(self, tree):
         for node in filter(lambda o: isinstance(o, FunctionDeclaration), tree.children):
-            self.memory[node.func_name] = node
+            self.functions[node.func_name] = node
 
     def visit_Program(self, node):
         for var in filter(lambda self: not isinstance(self, (FunctionDeclaration, IncludeLibrary)), node.children):
             self.visit(var)
 
     def visit_VarDeclaration(self, node):
-        self.memory.declare(node.var_node.value)
+        var = node.var_node
+        self.memory.declare((var.depth, var.slot))
 
     def visit_FunctionDeclaration(self, node):
-        for i, param in enumerate(node.params):
-            self.memory[param.var_node.value] = self.memory.stack.current_frame.current_scope._values.pop(i)
         return self.visit(node.body)
 
     def visit_FunctionBody(self, node):
@@ -52,32 +76,53 @@ class Interpreter(NodeVisitor):
     def visit_FunctionCall(self, node):
 
         args = [self.visit(arg) for arg in node.args]
-        if node.name == 'scanf':
-            args.append(self.memory)
-
-        if isinstance(self.memory[node.name], Node):
-            self.memory.new_frame(node.name)
-
-            for i, arg in enumerate(args):
-                self.memory.declare(i)
-                self.memory[i] = arg
-
-            res = self.visit(self.memory[node.name])
+        if node.coerce is not None:
+            args = [
+                arg if ttype is None else Number(ttype, arg.value)
+                for ttype, arg in zip(node.coerce, args)
+            ]
+
+        function = self.functions[node.name]
+        if isinstance(function, Node):
+            memo = self.memos.get(node.name)
+            if memo is not None:
+                key = memo.key(args)
+                if key is None:
+                    memo = None
+                else:
+                    res = memo.get(key)
+                    if res is not MISSING:
+                        return res
+
+            if isinstance(function.body, LazyFunctionBody):
+                SemanticAnalyzer.load_body(function)
+            # params have the first slots of the frame
+            self.memory.new_frame(node.name, function.frame_size)
+            self.memory.locals[:len(args)] = args
+
+            res = self.visit(function)
             self.memory.del_frame()
+            if memo is not None:
+                memo.put(key, res)
             return res
         else:
-            return Number(self.memory[node.name].return_type, self.memory[node.name](*args))
+            # builtins take raw values; addresses and strings are passed as is
+            return box(function.return_type, function(self.context, *[
+                arg.value if type(arg) is Number else arg for arg in args
+            ]))
 
     def visit_UnaryOperator(self, node):
         if node.prefix:
             if node.op.type == AND_OP:
-                return node.expr.value
+                return node.expr.depth, node.expr.slot
             elif node.op.type == INC_OP :
-                self.memory[node.expr.value] += Number('int', 1)
-                return self.memory[node.expr.value]
+                address = node.expr.depth, node.expr.slot
+                self.memory[address] += Number('int', 1)
+                return self.memory[address]
             elif node.op.type == DEC_OP:
-                self.memory[node.expr.value] -= Number('int', 1)
-                return self.memory[node.expr.value]
+                address = node.expr.depth, node.expr.slot
+                self.memory[address] -= Number('int', 1)
+                return self.memory[address]
             elif node.op.type == SUB_OP:
                 return Number('int', -1) * self.visit(node.expr)
             elif node.op.type == ADD_OP:
@@ -90,40 +135,46 @@ class Interpreter(NodeVisitor):
                 return Number(node.op.value, res.value)
         else:
             if node.op.type == INC_OP :
-                var = self.memory[node.expr.value]
-                self.memory[node.expr.value] += Number('int', 1)
+                address = node.expr.depth, node.expr.slot
+                var = self.memory[address]
+                self.memory[address] += Number('int', 1)
                 return var
             elif node.op.type == DEC_OP:
-                var = self.memory[node.expr.value]
-                self.memory[node.expr.value] -= Number('int', 1)
+                address = node.expr.depth, node.expr.slot
+                var = self.memory[address]
+                self.memory[address] -= Number('int', 1)
                 return var
 
         return self.visit(node.expr)
 
     def visit_CompoundStatement(self, node):
-        self.memory.new_scope()
-
+        # variables of the block have slots of their own in the frame
         for child in node.children:
             self.visit(child)
 
-        self.memory.del_scope()
-
     def visit_ReturnStmt(self, node):
-        return self.visit(node.expression)
+        value = self.visit(node.expression)
+        if node.coerce is not None:
+            return Number(node.coerce, value.value)
+        return value
 
     def visit_Num(self, node):
-        if node.token.type == INTEGER_CONST:
+        if node.type == INTEGER_CONST:
             return Number(ttype="int", value=node.value)
-        elif node.token.type == CHAR_CONST:
+        elif node.type == CHAR_CONST:
             return Number(ttype="char", value=node.value)
         else:
             return Number(ttype="float", value=node.value)
 
+    def visit_Constant(self, node):
+        return node.number
+
     def visit_Var(self, node):
-        return self.memory[node.value]
+        memory = self.memory
+        return (memory.globals if node.depth == GLOBAL else memory.locals)[node.slot]
 
     def visit_Assign(self, node):
-        var_name = node.left.value
+        var_name = node.left.depth, node.left.slot
         if node.op.type == ADD_ASSIGN:
             self.memory[var_name] += self.visit(node.right)
         elif node.op.type == SUB_ASSIGN:
@@ -133,13 +184,21 @@ class Interpreter(NodeVisitor):
         elif node.op.type == DIV_ASSIGN:
             self.memory[var_name] /= self.visit(node.right)
         else:
-            self.memory[var_name] = self.visit(node.right)
+            value = self.visit(node.right)
+            if node.coerce is not None:
+                value = Number(node.coerce, value.value)
+            self.memory[var_name] = value
         return self.memory[var_name]
 
     def visit_NoOp(self, node):
         pass
 
     def visit_BinaryOperator(self, node):
+        operation = node.operation
+        if operation is not None:
+            return operation(self.visit(node.left), self.visit(node.right))
+
+        # operators the analyzer did not specialize, and trees it did not see
         if node.op.type == ADD_OP:
             return self.visit(node.left) + self.visit(node.right)
         elif node.op.type == SUB_OP:
@@ -163,9 +222,9 @@ class Interpreter(NodeVisitor):
         elif node.op.type == NE_OP:
             return self.visit(node.left) != self.visit(node.right)
         elif node.op.type == LOG_AND_OP:
-            return self.visit(node.left) and self.visit(node.right)
+            return Number('int', 1 if self.visit(node.left) and self.visit(node.right) else 0)
         elif node.op.type == LOG_OR_OP:
-            return self.visit(node.left) or self.visit(node.right)
+            return Number('int', 1 if self.visit(node.left) or self.visit(node.right) else 0)
         elif node.op.type == AND_OP:
             return self.visit(node.left) & self.visit(node.right)
         elif node.op.type == OR_OP:
@@ -173,6 +232,14 @@ class Interpreter(NodeVisitor):
         elif node.op.type == XOR_OP:
             return self.visit(node.left) ^ self.visit(node.right)
 
+    def visit_TernaryOperator(self, node):
+        if self.visit(node.condition):
+            return self.visit(node.texpression)
+        value = self.visit(node.fexpression)
+        if node.coerce is not None:
+            return Number(node.coerce, value.value)
+        return value
+
     def visit_String(self, node):
         return node.value
 
@@ -195,21 +262,141 @@ class Interpreter(NodeVisitor):
     def interpret(self, tree):
         self.load_libs(tree)
         self.load_functs(tree)
+        if self.memoize:
+            self.memos = {name: Memo(name) for name in pure_functions(tree)}
+        self.memory = Memory(tree.global_size)
+        self.context = Context(self.memory)
         self.visit(tree)
-        self.memory.new_frame('main')
-        node = self.memory['main']
+        node = self.functions['main']
+        if isinstance(node.body, LazyFunctionBody):
+            SemanticAnalyzer.load_body(node)
+        self.memory.new_frame('main', node.frame_size)
         res = self.visit(node)
         self.memory.del_frame()
         return res
 
     @staticmethod
-    def run(program):
-        try:
-            lexer = Lexer(program)
-            parser = Parser(lexer)
-            tree = parser.parse()
+    def compile(program, lazy=False, cache=None, optimize=False, opt_stats=False, profile=None):
+        """ Lex, parse and analyze a program, or load it from a CompilationCache
+
+        Lazily parsed programs are not cached. optimize: inline small
+        functions, fold constants, remove dead code, optimize loops and
+        eliminate common subexpressions in the analyzed tree; opt_stats:
+        print what that did to stderr. profile: a Profile of training runs
+        of the program, which guides inlining and unrolling and orders the
+        operands of && and ||; it implies optimize unless it has no runs.
+        """
+        tree = Interpreter._compile(program, lazy, cache)
+        if profile is not None and not profile.runs:
+            profile = None
+        if optimize or profile is not None:
+            # while the operands are the nodes the profile counted
+            reordered = BranchOrder.optimize(tree, profile) if profile is not None else 0
+            inlined = Inliner.optimize(tree, profile=profile)
+            removed = ConstantFolder.optimize(tree)
+            hoisted, reduced, unrolled = LoopOptimizer.optimize(tree, profile=profile)
+            # unrolled bodies read their induction variables as constants
+            removed += ConstantFolder.optimize(tree)
+            eliminated = ValueNumbering.optimize(tree)
+            if opt_stats:
+                print('Inlined {} calls'.format(inlined), file=sys.stderr)
+                print('Constant folding removed {} nodes'.format(removed), file=sys.stderr)
+                print('Hoisted {} invariant expressions, reduced {} multiplications, unrolled {} loops'.format(
+                    hoisted, reduced, unrolled
+                ), file=sys.stderr)
+                print('Eliminated {} common subexpressions'.format(eliminated), file=sys.stderr)
+                if profile is not None:
+                    print('Reordered {} && and || operands'.format(reordered), file=sys.stderr)
+        return tree
+
+    @staticmethod
+    def _compile(program, lazy, cache):
+        if cache is None or lazy:
+            tree = Parser(Lexer(program), lazy=lazy).parse()
             SemanticAnalyzer.analyze(tree)
-            status = Interpreter().interpret(tree)
+            return tree
+
+        source = program if isinstance(program, str) else program.read()
+        key = cache.key(source)
+        entry = cache.load(key)
+        if entry is None:
+            tree = Parser(Lexer(source)).parse()
+            entry = tree, SemanticAnalyzer.analyze(tree)
+            cache.store(key, entry)
+        else:
+            tree, warnings = entry
+            for message in warnings:
+                SemanticAnalyzer.report(message)
+        return tree
+
+    @staticmethod
+    def run(program, lazy=False, cache=None, results=None, memoize=False, memo_stats=False,
+            optimize=False, opt_stats=False, ir=False, dump_ir=False, vm=False, dump_bytecode=False,
+            closures=False, profile=None, train=None):
+        """ Run a program and print its output and status
+
+        results: a ResultCache; the output and status of input-free programs
+        are stored in it, and a program found there is not run again. It is
+        not used when stats or dumps are asked for, which a cached run
+        would not print.
+        memoize and memo_stats apply to the tree interpreter only;
+        memo_stats: print the hits and misses of each memoized function to
+        stderr. optimize and opt_stats: as for compile. ir: run the program
+        lowered to the control-flow graph IR instead of its tree; dump_ir:
+        print the SSA form of its functions to stderr. vm: run the program
+        compiled to bytecode on the virtual machine; dump_bytecode: print
+        the code of each function to stderr. closures: run the program
+        compiled to closures. profile: path of a
+        profile file to optimize the program with; train: path of one to
+        add the counts of this run to, which runs the tree and skips the
+        output cache.
+        """
+        if profile is not None or train is not None:
+            if not isinstance(program, str):
+                program = program.read()
+            if profile is not None:
+                profile = Profile.load(profile, program)
+        recorder = None
+        if train is not None:
+            results = None
+            recorder = Recorder()
+        if memo_stats or opt_stats or dump_ir or dump_bytecode:
+            results = None
+
+        key = output = None
+        if results is not None:
+            if not isinstance(program, str):
+                program = program.read()
+            key = results.key(program)
+            entry = results.load(key)
+            if entry is not None:
+                text, status = entry
+                sys.stdout.write(text)
+                Interpreter.report(status)
+                return
+            output = Tee(sys.stdout)
+
+        if (ir or dump_ir) and recorder is None:
+            # imported here since the IR imports this package
+            from ..ir.executor import Executor
+            interpreter = Executor(sys.stderr if dump_ir else None)
+        elif (vm or dump_bytecode) and recorder is None:
+            from ..vm.machine import Machine
+            interpreter = Machine(sys.stderr if dump_bytecode else None)
+        elif closures and recorder is None:
+            interpreter = ClosureInterpreter()
+        else:
+            interpreter = Interpreter(memoize, recorder)
+        try:
+            with contextlib.redirect_stdout(output or sys.stdout):
+                tree = Interpreter.compile(program, lazy, cache, optimize, opt_stats, profile)
+                status = interpreter.interpret(tree)
+            if recorder is not None:
+                trained = Profile.load(train, program)
+                trained.record(tree, recorder)
+                trained.save(train)
+            if output is not None and input_free(tree):
+                results.store(key, (output.getvalue(), status))
         except Exception as message:
             print("{}[{}] {} {}".format(
                 MessageColor.FAIL,
@@ -218,5 +405,12 @@ class Interpreter(NodeVisitor):
                 MessageColor.ENDC
             ))
             status = -1
+        if memo_stats:
+            for memo in interpreter.memos.values():
+                print(memo, file=sys.stderr)
+        Interpreter.report(status)
+
+    @staticmethod
+    def report(status):
         print()
         print(MessageColor.OKBLUE + "Process terminated with status {}".format(status) + MessageColor.ENDC)
\ No newline at end of file
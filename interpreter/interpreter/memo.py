@@ -0,0 +1,49 @@
+from collections import OrderedDict
+
+from .number import Number
+
+DEFAULT_SIZE = 4096
+MISSING = object()
+
+
+class Memo(object):
+    """ Results of a pure function by argument values, least recently used
+    evicted past `size` entries """
+    __slots__ = ('name', 'size', 'table', 'hits', 'misses')
+
+    def __init__(self, name, size=DEFAULT_SIZE):
+        self.name = name
+        self.size = size
+        self.table = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(args):
+        """ Hashable key of a call's arguments, None if one is not a Number """
+        key = []
+        for arg in args:
+            if not isinstance(arg, Number):
+                return None
+            key.append(arg.type)
+            key.append(arg.value)
+        return tuple(key)
+
+    def get(self, key):
+        value = self.table.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.table.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.table[key] = value
+        if len(self.table) > self.size:
+            self.table.popitem(last=False)
+
+    def __str__(self):
+        return '{}: {} hits, {} misses, {} entries'.format(
+            self.name, self.hits, self.misses, len(self.table)
+        )
@@ -1,71 +1,27 @@
 import random
 
-class Scope(object):
-    def __init__(self, scope_name, parent_scope=None):
-        self.scope_name = scope_name
-        self.parent_scope = parent_scope
-        self._values = dict()
+from ..semantic_analyzer.mem import GLOBAL
 
-    
-    def __getitem__(self, item):
-        return self._values[item]
-
-
-    def __setitem__(self, key, value):
-        self._values[key] = value
-
-    def __contains__(self, key):
-        return key in self._values
-
-    def __repr__(self):
-        lines = [
-            '{}:{}'.format(key, val) for key, val in self._values.items()
-        ]
-        title = '{}\n'.format(self.scope_name)
-        return title + '\n'.join(lines)
+# value of a variable that was declared but not assigned
+UNINITIALIZED = random.randint(0, 2**32)
 
 
 class Frame(object):
-    def __init__(self, frame_name, global_scope):
-        self.frame_name = frame_name
-        self.current_scope = Scope(
-            '{}.scope_00'.format(frame_name),
-            global_scope
-        )
-        self.scopes = [self.current_scope]
-
-    def new_scope(self):
-        self.current_scope = Scope(
-            '{}{:02d}'.format(
-                self.current_scope.scope_name[:-2],
-                int(self.current_scope.scope_name[-2:]) + 1
-            ),
-            self.current_scope
-        )
-        self.scopes.append(self.current_scope)
+    """ Variables of one function call, by the slots the analyzer gave them """
+    __slots__ = ('frame_name', 'slots')
 
-    def del_scope(self):
-        current_scope = self.current_scope
-        self.current_scope = current_scope.parent_scope
-        self.scopes.pop(-1)
-        del current_scope
-
-    def __contains__(self, key):
-        return key in self.current_scope
+    def __init__(self, frame_name, size):
+        self.frame_name = frame_name
+        self.slots = [UNINITIALIZED] * size
 
     def __repr__(self):
         lines = [
-            '{}\n{}'.format(
-                scope,
-                '-' * 40
-            ) for scope in self.scopes
+            '{}:{}'.format(slot, val) for slot, val in enumerate(self.slots)
         ]
-
         title = 'Frame: {}\n{}\n'.format(
             self.frame_name,
             '*' * 40
         )
-
         return title + '\n'.join(lines)
 
 
@@ -77,8 +33,8 @@ class Stack(object):
     def __bool__(self):
         return bool(self.frames)
 
-    def new_frame(self, frame_name, global_scope=None):
-        frame = Frame(frame_name, global_scope=global_scope)
+    def new_frame(self, frame_name, size):
+        frame = Frame(frame_name, size)
         self.frames.append(frame)
         self.current_frame = frame
 
@@ -94,39 +50,38 @@ class Stack(object):
 
 
 class Memory(object):
-    def __init__(self):
-        self.global_frame = Frame('GLOBAL_MEMORY', None)
+    """ Global variables and the call stack
+
+    A variable is addressed by the (depth, slot) the semantic analyzer
+    resolved it to: depth GLOBAL is the global segment, LOCAL the frame of
+    the running call. `globals` and `locals` are the slot lists of both.
+    """
+
+    def __init__(self, global_size=0):
+        self.global_frame = Frame('GLOBAL_MEMORY', global_size)
         self.stack = Stack()
+        self.globals = self.global_frame.slots
+        self.locals = self.globals
 
-    def declare(self, key, value=random.randint(0, 2**32)):
-        ins_scope = self.stack.current_frame.current_scope if self.stack.current_frame else self.global_frame.current_scope
-        ins_scope[key] = value
+    def declare(self, address, value=UNINITIALIZED):
+        self[address] = value
 
-    def __setitem__(self, key, value):
-        ins_scope = self.stack.current_frame.current_scope if self.stack.current_frame else self.global_frame.current_scope
-        curr_scope = ins_scope
-        while curr_scope and key not in curr_scope:
-            curr_scope = curr_scope.parent_scope
-        ins_scope = curr_scope if curr_scope else ins_scope
-        ins_scope[key] = value
+    def __setitem__(self, address, value):
+        depth, slot = address
+        (self.globals if depth == GLOBAL else self.locals)[slot] = value
 
-    def __getitem__(self, item):
-        curr_scope = self.stack.current_frame.current_scope if self.stack.current_frame else self.global_frame.current_scope
-        while curr_scope and item not in curr_scope:
-            curr_scope = curr_scope.parent_scope
-        return curr_scope[item]
+    def __getitem__(self, address):
+        depth, slot = address
+        return (self.globals if depth == GLOBAL else self.locals)[slot]
 
-    def new_frame(self, frame_name):
-        self.stack.new_frame(frame_name, self.global_frame.current_scope)
+    def new_frame(self, frame_name, size):
+        self.stack.new_frame(frame_name, size)
+        self.locals = self.stack.current_frame.slots
 
     def del_frame(self):
         self.stack.del_frame()
-
-    def new_scope(self):
-        self.stack.current_frame.new_scope()
-
-    def del_scope(self):
-        self.stack.current_frame.del_scope()
+        frame = self.stack.current_frame or self.global_frame
+        self.locals = frame.slots
 
     def __repr__(self):
         return "{}\nStack\n{}\n{}".format(
@@ -137,5 +92,3 @@ class Memory(object):
 
     def __str__(self):
         return self.__repr__()
-
-
@@ -1,3 +1,12 @@
+import operator
+
+from ..lexer_analyzer.token_type import (
+    ADD_OP, SUB_OP, MUL_OP, DIV_OP, MOD_OP, AND_OP, OR_OP, XOR_OP,
+    LT_OP, GT_OP, LE_OP, GE_OP, EQ_OP, NE_OP,
+    ADD_ASSIGN, SUB_ASSIGN, MUL_ASSIGN, DIV_ASSIGN,
+)
+
+
 class Number(object):
     types = dict(char=int, int=int, float=float, double=float)
     order = ('char', 'int', 'float', 'double')
@@ -110,4 +119,107 @@ class Number(object):
         )
 
     def __str__(self):
-        return self.__repr__()
\ No newline at end of file
+        return self.__repr__()
+
+
+def box(ttype, value):
+    """ Number of type ttype holding value, which already has its Python type """
+    number = object.__new__(Number)
+    number.type = ttype
+    number.value = value
+    return number
+
+
+def lt(left, right):
+    return int(left < right)
+
+
+def gt(left, right):
+    return int(left > right)
+
+
+def le(left, right):
+    return int(left <= right)
+
+
+def ge(left, right):
+    return int(left >= right)
+
+
+def eq(left, right):
+    return int(left == right)
+
+
+def ne(left, right):
+    return int(left != right)
+
+
+COMPARISONS = {LT_OP: lt, GT_OP: gt, LE_OP: le, GE_OP: ge, EQ_OP: eq, NE_OP: ne}
+
+# Python promotes an int operand of a float operation by itself, so the
+# type of the result is all that picks the function
+FUNCTIONS = {
+    int: dict(COMPARISONS, **{
+        ADD_OP: operator.add, SUB_OP: operator.sub, MUL_OP: operator.mul,
+        DIV_OP: operator.floordiv, MOD_OP: operator.mod,
+        AND_OP: operator.and_, OR_OP: operator.or_, XOR_OP: operator.xor,
+    }),
+    float: dict(COMPARISONS, **{
+        ADD_OP: operator.add, SUB_OP: operator.sub, MUL_OP: operator.mul,
+        DIV_OP: operator.truediv,
+    }),
+}
+
+
+class Operation(object):
+    """ Binary operator whose result type the analyzer worked out
+
+    Calling it applies the function to the operand values and wraps the
+    result in a Number of that type, with no type lookups.
+    """
+    __slots__ = ('function', 'type')
+    _operations = {}
+
+    def __init__(self, function, ttype):
+        self.function = function
+        self.type = ttype
+
+    def __call__(self, left, right):
+        number = object.__new__(Number)
+        number.type = self.type
+        number.value = self.function(left.value, right.value)
+        return number
+
+    @staticmethod
+    def select(op_type, ttype):
+        """ Shared Operation for an operator and result type, or None when
+        the operator has no specialized form for that type """
+        key = op_type, ttype
+        operation = Operation._operations.get(key)
+        if operation is None:
+            function = FUNCTIONS[Number.types[ttype]].get(op_type)
+            if function is None:
+                return None
+            operation = Operation._operations[key] = Operation(function, ttype)
+        return operation
+
+
+# operators the analyzer did not specialize, as the interpreter applies them
+BINARY_FUNCTIONS = {
+    ADD_OP: operator.add, SUB_OP: operator.sub, MUL_OP: operator.mul, DIV_OP: operator.truediv,
+    MOD_OP: operator.mod, LT_OP: operator.lt, GT_OP: operator.gt, LE_OP: operator.le,
+    GE_OP: operator.ge, EQ_OP: operator.eq, NE_OP: operator.ne, AND_OP: operator.and_,
+    OR_OP: operator.or_, XOR_OP: operator.xor,
+}
+# compound assignments keep the type of the variable
+ASSIGN_FUNCTIONS = {
+    ADD_ASSIGN: operator.iadd, SUB_ASSIGN: operator.isub,
+    MUL_ASSIGN: operator.imul, DIV_ASSIGN: operator.itruediv,
+}
+# specialized comparison -> the test of the operand values, for conditions
+# that only need to know whether it holds
+TESTS = {
+    COMPARISONS[LT_OP]: operator.lt, COMPARISONS[GT_OP]: operator.gt,
+    COMPARISONS[LE_OP]: operator.le, COMPARISONS[GE_OP]: operator.ge,
+    COMPARISONS[EQ_OP]: operator.eq, COMPARISONS[NE_OP]: operator.ne,
+}
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import defaultdict
+
+from ..syntax_analyzer.syntax_tree import *
+from ..optimizer.transformer import walk
+
+# share of the count of the most executed node that makes a node hot
+HOT_SHARE = 0.01
+
+
+def source_key(source):
+    return hashlib.sha256(source.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def node_key(node):
+    """ Name of a node that stays the same across parses of its source """
+    return '{}@{}:{}'.format(type(node).__name__, node.start, node.end)
+
+
+class Recorder(object):
+    """ Counts of the nodes an interpreter visits during a training run, by
+    node identity, and how many of the visits gave a true value """
+    __slots__ = ('counts', 'trues')
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.trues = defaultdict(int)
+
+
+class Profile(object):
+    """ Execution counts of the nodes of one program, summed over runs
+
+    counts and trues are by node_key: how many times a node was evaluated,
+    and how many of those its value was true. A file holds the profiles of
+    many programs, each under the hash of its source, as JSON whose
+    'branches' (taken, not taken) of each if and loop and 'calls' counts of
+    each call site are there for people to read; optimizers use counts
+    and trues.
+    """
+
+    def __init__(self, key, runs=0, counts=None, trues=None, branches=None, calls=None):
+        self.key = key
+        self.runs = runs
+        self.counts = counts if counts is not None else {}
+        self.trues = trues if trues is not None else {}
+        self.branches = branches if branches is not None else {}
+        self.calls = calls if calls is not None else {}
+        self.peak = max(self.counts.values()) if self.counts else 0
+
+    def count(self, node):
+        return self.counts.get(node_key(node), 0)
+
+    def taken(self, node):
+        """ Share of the evaluations of a condition that were true, None if
+        it was never evaluated """
+        count = self.count(node)
+        if not count:
+            return None
+        return self.trues.get(node_key(node), 0) / count
+
+    def hot(self, node):
+        count = self.count(node)
+        return count > 0 and count >= self.peak * HOT_SHARE
+
+    def record(self, tree, recorder):
+        """ Add the counts a training run of tree recorded """
+        self.runs += 1
+        for node in walk(tree):
+            count = recorder.counts.get(id(node))
+            if count is None:
+                continue
+            key = node_key(node)
+            self.counts[key] = self.counts.get(key, 0) + count
+            trues = recorder.trues.get(id(node))
+            if trues:
+                self.trues[key] = self.trues.get(key, 0) + trues
+
+        for node in walk(tree):
+            if isinstance(node, (IfStatement, WhileStatement, ForStatement)):
+                count = self.count(node.condition)
+                if count:
+                    trues = self.trues.get(node_key(node.condition), 0)
+                    self.branches[node_key(node)] = [trues, count - trues]
+            elif isinstance(node, FunctionCall):
+                count = self.count(node)
+                if count:
+                    self.calls['{} {}'.format(node_key(node), node.name)] = count
+        self.peak = max(self.counts.values()) if self.counts else 0
+
+    @staticmethod
+    def load(path, source):
+        """ Profile of source in the file at path, empty if it has none """
+        key = source_key(source)
+        entry = Profile.read(path).get(key)
+        if entry is None:
+            return Profile(key)
+        return Profile(key, entry['runs'], entry['counts'], entry['trues'], entry['branches'], entry['calls'])
+
+    @staticmethod
+    def read(path):
+        try:
+            with open(path, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self, path):
+        """ Store this profile in the file at path, keeping the others """
+        profiles = Profile.read(path)
+        profiles[self.key] = dict(
+            runs=self.runs, counts=self.counts, trues=self.trues,
+            branches=self.branches, calls=self.calls,
+        )
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as file:
+                json.dump(profiles, file, indent=1, sort_keys=True)
+            os.replace(temporary, path)
+        except OSError:
+            os.remove(temporary)
+            raise
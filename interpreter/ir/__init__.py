@@ -0,0 +1,7 @@
+from . import cfg
+from . import builder
+from . import analysis
+from . import ssa
+from . import verify
+from . import printer
+from . import executor
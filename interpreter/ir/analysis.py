@@ -0,0 +1,161 @@
+from .cfg import Instruction
+
+
+def reverse_postorder(function):
+    """ Blocks reachable from the entry, each after its dominators """
+    order, seen = [], set([function.entry])
+    stack = [(function.entry, iter(function.entry.successors))]
+    while stack:
+        block, successors = stack[-1]
+        for successor in successors:
+            if successor not in seen:
+                seen.add(successor)
+                stack.append((successor, iter(successor.successors)))
+                break
+        else:
+            stack.pop()
+            order.append(block)
+    order.reverse()
+    return order
+
+
+def dominators(function):
+    """ block -> its immediate dominator, the entry -> None, for the reachable
+    blocks (Cooper, Harvey and Kennedy's iterative algorithm) """
+    order = reverse_postorder(function)
+    position = dict((block, index) for index, block in enumerate(order))
+    predecessors = function.predecessors()
+    idom = {function.entry: function.entry}
+
+    def intersect(left, right):
+        while left is not right:
+            while position[left] > position[right]:
+                left = idom[left]
+            while position[right] > position[left]:
+                right = idom[right]
+        return left
+
+    changed = True
+    while changed:
+        changed = False
+        for block in order[1:]:
+            new = None
+            for predecessor in predecessors[block]:
+                if predecessor in idom:
+                    new = predecessor if new is None else intersect(predecessor, new)
+            if idom.get(block) is not new:
+                idom[block] = new
+                changed = True
+    idom[function.entry] = None
+    return idom
+
+
+def dominator_tree(idom):
+    """ block -> the blocks it immediately dominates """
+    children = dict((block, []) for block in idom)
+    for block, parent in idom.items():
+        if parent is not None:
+            children[parent].append(block)
+    return children
+
+
+def dominates(idom, dominator, block):
+    while block is not None:
+        if block is dominator:
+            return True
+        block = idom[block]
+    return False
+
+
+def dominance_frontiers(function, idom):
+    """ block -> the blocks where its dominance ends """
+    frontiers = dict((block, set()) for block in idom)
+    for block, predecessors in function.predecessors().items():
+        if block not in idom or len(predecessors) < 2:
+            continue
+        for predecessor in predecessors:
+            if predecessor not in idom:
+                continue
+            runner = predecessor
+            while runner is not idom[block]:
+                frontiers[runner].add(block)
+                runner = idom[runner]
+    return frontiers
+
+
+def liveness(function):
+    """ (live_in, live_out): block -> the values live where it starts and ends
+
+    A phi reads its args at the end of the blocks they come from, so they
+    are live out of those blocks, not into the block of the phi.
+    """
+    uses, definitions, phi_uses = {}, {}, dict((block, set()) for block in function.blocks)
+    for block in function.blocks:
+        used, defined = set(), set()
+        for instruction in block.instructions:
+            if instruction.opcode == 'phi':
+                for source, value in zip(instruction.blocks, instruction.args):
+                    if isinstance(value, Instruction):
+                        phi_uses[source].add(value)
+            else:
+                used.update(
+                    value for value in instruction.args
+                    if isinstance(value, Instruction) and value not in defined
+                )
+            if instruction.opcode == 'copy':
+                defined.add(instruction.target)
+            else:
+                defined.add(instruction)
+        uses[block], definitions[block] = used, defined
+
+    live_in = dict((block, set()) for block in function.blocks)
+    live_out = dict((block, set()) for block in function.blocks)
+    order = list(reversed(reverse_postorder(function)))
+    changed = True
+    while changed:
+        changed = False
+        for block in order:
+            out = set(phi_uses[block])
+            for successor in block.successors:
+                out |= live_in[successor]
+            new = uses[block] | (out - definitions[block])
+            if out != live_out[block] or new != live_in[block]:
+                live_out[block], live_in[block] = out, new
+                changed = True
+    return live_in, live_out
+
+
+def reaching_definitions(function):
+    """ (reach_in, reach_out): block -> the stores whose value a variable may
+    still hold where it starts and ends
+
+    Only the stores of the function count: a call may also change globals
+    and variables whose address it was given.
+    """
+    generated, killed_addresses = {}, {}
+    for block in function.blocks:
+        last = {}
+        for instruction in block.instructions:
+            if instruction.opcode == 'store':
+                last[instruction.address] = instruction
+        generated[block] = set(last.values())
+        killed_addresses[block] = set(last)
+
+    predecessors = function.predecessors()
+    reach_in = dict((block, set()) for block in function.blocks)
+    reach_out = dict((block, set(generated[block])) for block in function.blocks)
+    order = reverse_postorder(function)
+    changed = True
+    while changed:
+        changed = False
+        for block in order:
+            new_in = set()
+            for predecessor in predecessors[block]:
+                new_in |= reach_out[predecessor]
+            new_out = generated[block] | set(
+                store for store in new_in if store.address not in killed_addresses[block]
+            )
+            if new_in != reach_in[block] or new_out != reach_out[block]:
+                reach_in[block], reach_out[block] = new_in, new_out
+                changed = True
+    return reach_in, reach_out
@@ -0,0 +1,252 @@
+from ..interpreter.number import Number
+from ..lexer_analyzer.token_type import *
+from ..semantic_analyzer.analyzer import SemanticAnalyzer
+from ..syntax_analyzer.syntax_tree import *
+from .cfg import Const, Function, Instruction, Module, UNDEF
+
+UPDATE_OPERATORS = {ADD_ASSIGN: ADD_OP, SUB_ASSIGN: SUB_OP, MUL_ASSIGN: MUL_OP, DIV_ASSIGN: DIV_OP}
+NONE = Const(None)
+ONE = Const(Number('int', 1))
+ZERO = Const(Number('int', 0))
+MINUS_ONE = Const(Number('int', -1))
+
+
+def load_bodies(tree):
+    """ Parse and analyze the bodies a lazily parsed program left for later """
+    for node in tree.children:
+        if isinstance(node, FunctionDeclaration) and isinstance(node.body, LazyFunctionBody):
+            SemanticAnalyzer.load_body(node)
+
+
+def build(tree):
+    """ Module of an analyzed program, its functions in load/store form """
+    load_bodies(tree)
+    functions = {}
+    libraries = []
+    statements = []
+    for node in tree.children:
+        if isinstance(node, FunctionDeclaration):
+            functions[node.func_name] = Builder().lower(node)
+        elif isinstance(node, IncludeLibrary):
+            libraries.append(node.library_name)
+        else:
+            statements.append(node)
+    init = Builder().body(Function('<globals>', 'void', [], 0), statements)
+    return Module(functions, init, libraries, tree.global_size)
+
+
+class Builder(NodeVisitor):
+    """ Lowers a function to a control-flow graph
+
+    Every variable lives in its slot: reading it is a load, and assigning
+    or declaring it a store, so the graph has no phis but those joining
+    the values of ?:, && and ||. ssa.construct then promotes the locals.
+
+    The graph does what the interpreter does, in the same order: as there,
+    only a return at the top level of the body ends the call, one in a
+    nested statement evaluates its value and goes on.
+    """
+
+    def __init__(self):
+        self.function = self.current = None
+
+    def lower(self, node):
+        params = [param.var_node.value for param in node.params]
+        function = Function(node.func_name, node.type_node.value, params, node.frame_size)
+        entry = function.block('entry')
+        for index, param in enumerate(node.params):
+            var = param.var_node
+            value = entry.append(Instruction('arg', param=index))
+            entry.append(Instruction('store', [value], address=(var.depth, var.slot)))
+        return self.body(function, node.body.children)
+
+    def body(self, function, statements):
+        self.function = function
+        self.current = function.blocks[0] if function.blocks else function.block('entry')
+        for child in statements:
+            if isinstance(child, ReturnStmt):
+                self.emit('return', [self.visit(child)])
+                return function
+            self.visit(child)
+        self.emit('return', [NONE])
+        return function
+
+    def generic_visit(self, node):
+        # the interpreter has no visit_ method for it either, and raises
+        # only when the code runs
+        self.emit('fail', message='No visit_{} method'.format(type(node).__name__))
+        return NONE
+
+    def emit(self, opcode, args=(), **attrs):
+        return self.current.append(Instruction(opcode, args, **attrs))
+
+    def jump(self, target):
+        self.emit('jump', targets=[target])
+
+    def branch(self, condition, taken, not_taken):
+        self.emit('branch', [condition], targets=[taken, not_taken])
+
+    def join(self, values, kind):
+        """ Phi in a new block, of the values the current blocks computed """
+        block = self.function.block(kind)
+        for source, _ in values:
+            source.append(Instruction('jump', targets=[block]))
+        self.current = block
+        return self.emit('phi', [value for _, value in values], blocks=[source for source, _ in values])
+
+    def visit_NoOp(self, node):
+        return NONE
+
+    def visit_Num(self, node):
+        if node.type == INTEGER_CONST:
+            return Const(Number('int', node.value))
+        elif node.type == CHAR_CONST:
+            return Const(Number('char', node.value))
+        return Const(Number('float', node.value))
+
+    def visit_Constant(self, node):
+        return Const(node.number)
+
+    def visit_String(self, node):
+        return Const(node.value)
+
+    def visit_Var(self, node):
+        return self.emit('load', address=(node.depth, node.slot))
+
+    def visit_VarDeclaration(self, node):
+        var = node.var_node
+        self.emit('store', [UNDEF], address=(var.depth, var.slot))
+
+    def visit_BinaryOperator(self, node):
+        if node.op.type in (LOG_AND_OP, LOG_OR_OP):
+            return self.logical(node)
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        return self.emit('binary', [left, right], op=node.op.type, operation=node.operation)
+
+    def logical(self, node):
+        """ && and ||: the right operand is evaluated only when it decides """
+        decided = ZERO if node.op.type == LOG_AND_OP else ONE
+        left = self.visit(node.left)
+        right_block = self.function.block('logical.right')
+        short = self.function.block('logical.short')
+        if node.op.type == LOG_AND_OP:
+            self.branch(left, right_block, short)
+        else:
+            self.branch(left, short, right_block)
+
+        self.current = right_block
+        right = self.visit(node.right)
+        taken = self.function.block('logical.true')
+        not_taken = self.function.block('logical.false')
+        self.branch(right, taken, not_taken)
+        return self.join([(short, decided), (taken, ONE), (not_taken, ZERO)], 'logical.end')
+
+    def visit_UnaryOperator(self, node):
+        op = node.op.type
+        if op in (INC_OP, DEC_OP):
+            address = node.expr.depth, node.expr.slot
+            old = self.emit('load', address=address)
+            new = self.emit('update', [old, ONE], op=ADD_OP if op == INC_OP else SUB_OP)
+            self.emit('store', [new], address=address)
+            return new if node.prefix else old
+        if not node.prefix:
+            return self.visit(node.expr)
+        if op == AND_OP:
+            return self.emit('address', address=(node.expr.depth, node.expr.slot))
+        if op == SUB_OP:
+            return self.emit('binary', [MINUS_ONE, self.visit(node.expr)], op=MUL_OP, operation=None)
+        if op == ADD_OP:
+            return self.visit(node.expr)
+        if op == LOG_NEG:
+            return self.emit('not', [self.visit(node.expr)])
+        return self.emit('cast', [self.visit(node.expr)], type=node.op.value)
+
+    def visit_Assign(self, node):
+        address = node.left.depth, node.left.slot
+        op = UPDATE_OPERATORS.get(node.op.type)
+        if op is not None:
+            old = self.emit('load', address=address)
+            value = self.emit('update', [old, self.visit(node.right)], op=op)
+        else:
+            value = self.visit(node.right)
+            if node.coerce is not None:
+                value = self.emit('cast', [value], type=node.coerce)
+        self.emit('store', [value], address=address)
+        return value
+
+    def visit_Expression(self, node):
+        value = NONE
+        for child in node.children:
+            value = self.visit(child)
+        return value
+
+    def visit_FunctionCall(self, node):
+        args = [self.visit(arg) for arg in node.args]
+        if node.coerce is not None:
+            args = [
+                arg if ttype is None else self.emit('cast', [arg], type=ttype)
+                for ttype, arg in zip(node.coerce, args)
+            ]
+        return self.emit('call', args, name=node.name)
+
+    def visit_TernaryOperator(self, node):
+        condition = self.visit(node.condition)
+        true_block = self.function.block('ternary.true')
+        false_block = self.function.block('ternary.false')
+        self.branch(condition, true_block, false_block)
+
+        self.current = true_block
+        true_value = self.visit(node.texpression)
+        true_block = self.current
+        self.current = false_block
+        false_value = self.visit(node.fexpression)
+        # as in the interpreter, only the false value is coerced
+        if node.coerce is not None:
+            false_value = self.emit('cast', [false_value], type=node.coerce)
+        false_block = self.current
+        return self.join([(true_block, true_value), (false_block, false_value)], 'ternary.end')
+
+    def visit_ReturnStmt(self, node):
+        value = self.visit(node.expression)
+        if node.coerce is not None:
+            value = self.emit('cast', [value], type=node.coerce)
+        return value
+
+    def visit_CompoundStatement(self, node):
+        for child in node.children:
+            self.visit(child)
+
+    def visit_IfStatement(self, node):
+        condition = self.visit(node.condition)
+        then = self.function.block('if.then')
+        otherwise = self.function.block('if.else')
+        end = self.function.block('if.end')
+        self.branch(condition, then, otherwise)
+        for block, body in ((then, node.tbody), (otherwise, node.fbody)):
+            self.current = block
+            self.visit(body)
+            self.jump(end)
+        self.current = end
+
+    def visit_WhileStatement(self, node):
+        self.loop(node.condition, node.body, None)
+
+    def visit_ForStatement(self, node):
+        self.visit(node.setup)
+        self.loop(node.condition, node.body, node.increment)
+
+    def loop(self, condition, body, increment):
+        header = self.function.block('loop.cond')
+        self.jump(header)
+        self.current = header
+        value = self.visit(condition)
+        body_block = self.function.block('loop.body')
+        end = self.function.block('loop.end')
+        self.branch(value, body_block, end)
+        self.current = body_block
+        self.visit(body)
+        if increment is not None:
+            self.visit(increment)
+        self.jump(header)
+        self.current = end
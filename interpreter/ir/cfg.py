@@ -0,0 +1,188 @@
+from ..interpreter.memory_mgmt import UNINITIALIZED
+
+# opcodes that end a block
+TERMINATORS = ('jump', 'branch', 'return')
+# opcodes that produce no value
+STATEMENTS = ('store', 'copy', 'fail') + TERMINATORS
+
+
+class IRError(Exception):
+    pass
+
+
+class Const(object):
+    """ Operand whose value is known: a Number, a string, an address or None """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class Undef(Const):
+    """ Value of a variable that was declared but not assigned """
+    __slots__ = ()
+
+    def __init__(self):
+        Const.__init__(self, UNINITIALIZED)
+
+
+UNDEF = Undef()
+
+
+class Instruction(object):
+    """ One operation of a block; it is also the value it produces
+
+    args are the operands, Instructions or Consts. What else an opcode
+    needs is in attrs:
+
+        arg                  param: index of the param
+        load, address        address: (depth, slot) of a variable
+        store                address; args: the value
+        binary               op: operator token type, operation: the
+                             Operation the analyzer chose or None
+        update               op: the operator of a compound assignment,
+                             which keeps the type of the variable
+        not                  args: the operand
+        cast                 type: type name
+        call                 name: function name
+        phi                  blocks: the predecessor each arg comes from
+        copy                 target: the phi whose register it sets;
+                             args: the value
+        move                 args: the value, read before copies change it
+        fail                 message: of the exception it raises
+        jump                 targets: [block]
+        branch               targets: [block taken, block not taken]
+        return               args: the value, None for no value
+    """
+    __slots__ = ('opcode', 'args', 'attrs', 'block', 'index')
+
+    def __init__(self, opcode, args=(), **attrs):
+        self.opcode = opcode
+        self.args = list(args)
+        self.attrs = attrs
+        self.block = None
+        # register of the value when the function runs
+        self.index = None
+
+    def __getattr__(self, name):
+        try:
+            return self.attrs[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    @property
+    def targets(self):
+        return self.attrs.get('targets', ())
+
+
+class Block(object):
+    __slots__ = ('label', 'instructions')
+
+    def __init__(self, label):
+        self.label = label
+        self.instructions = []
+
+    @property
+    def terminator(self):
+        if self.instructions and self.instructions[-1].opcode in TERMINATORS:
+            return self.instructions[-1]
+        return None
+
+    @property
+    def successors(self):
+        terminator = self.terminator
+        return list(terminator.targets) if terminator is not None else []
+
+    @property
+    def phis(self):
+        result = []
+        for instruction in self.instructions:
+            if instruction.opcode != 'phi':
+                break
+            result.append(instruction)
+        return result
+
+    def append(self, instruction):
+        instruction.block = self
+        self.instructions.append(instruction)
+        return instruction
+
+    def insert(self, position, instruction):
+        instruction.block = self
+        self.instructions.insert(position, instruction)
+        return instruction
+
+    def __repr__(self):
+        return '<Block {}>'.format(self.label)
+
+
+class Function(object):
+    """ Control-flow graph of a function; blocks[0] is its entry
+
+    frame_size: the slots of its frame, which still hold the variables that
+    are not in SSA form. form: 'load/store' as built, where every variable
+    lives in its slot; 'ssa' once ssa.construct promoted its locals to
+    values that phis merge; 'copies' once ssa.destruct replaced the phis by
+    copies. registers: the number of values, once numbered.
+    """
+
+    def __init__(self, name, return_type, params, frame_size):
+        self.name = name
+        self.return_type = return_type
+        self.params = params
+        self.frame_size = frame_size
+        self.blocks = []
+        self.form = 'load/store'
+        self.registers = 0
+        self._labels = 0
+
+    @property
+    def entry(self):
+        return self.blocks[0]
+
+    def block(self, kind):
+        """ New block, labeled after kind, at the end of the function """
+        self._labels += 1
+        block = Block('{}{}'.format(kind, self._labels) if self.blocks else kind)
+        self.blocks.append(block)
+        return block
+
+    def instructions(self):
+        for block in self.blocks:
+            for instruction in block.instructions:
+                yield instruction
+
+    def predecessors(self):
+        """ block -> the blocks that jump to it, once per edge """
+        result = dict((block, []) for block in self.blocks)
+        for block in self.blocks:
+            for successor in block.successors:
+                result[successor].append(block)
+        return result
+
+    def number(self):
+        """ Give every value a register; the phis that copies set keep theirs """
+        numbered = set()
+        for instruction in self.instructions():
+            if instruction.opcode == 'copy':
+                values = [instruction.target] + instruction.args
+            else:
+                values = instruction.args
+                if instruction.opcode not in STATEMENTS:
+                    values = [instruction] + values
+            for value in values:
+                if isinstance(value, Instruction) and id(value) not in numbered:
+                    value.index = len(numbered)
+                    numbered.add(id(value))
+        self.registers = len(numbered)
+        return self.registers
+
+
+class Module(object):
+    """ Functions of a program; init holds the code of its global declarations """
+
+    def __init__(self, functions, init, libraries, global_size):
+        self.functions = functions
+        self.init = init
+        self.libraries = libraries
+        self.global_size = global_size
@@ -0,0 +1,115 @@
+from ..interpreter.memory_mgmt import Memory
+from ..interpreter.number import Number, BINARY_FUNCTIONS, ASSIGN_FUNCTIONS, box
+from ..lexer_analyzer.token_type import *
+from ..utils.registry import Context, library
+from .builder import build, UPDATE_OPERATORS
+from .cfg import Function, Instruction
+from .printer import format_function
+from .ssa import construct, destruct
+from .verify import verify
+
+# update instructions name a compound assignment by its operator
+UPDATE = dict((UPDATE_OPERATORS[op], function) for op, function in ASSIGN_FUNCTIONS.items())
+
+
+def lower(tree, dump=None):
+    """ Module of an analyzed program whose functions are verified, went
+    through SSA form and are ready to run; dump: a file the SSA form of
+    each function is printed to """
+    module = build(tree)
+    for function in [module.init] + list(module.functions.values()):
+        verify(function)
+        verify(construct(function))
+        if dump is not None:
+            print(format_function(function), file=dump, end='\n\n')
+        verify(destruct(function))
+        function.number()
+    return module
+
+
+class Executor(object):
+    """ Runs a program lowered to the IR, as the interpreter runs its tree
+
+    dump: a file the SSA form of the functions is printed to.
+    """
+
+    def __init__(self, dump=None):
+        self.memory = Memory()
+        self.context = Context(self.memory)
+        self.functions = {}
+        self.dump = dump
+        # the interpreter's memos; calls are not memoized here
+        self.memos = {}
+
+    def interpret(self, tree):
+        module = lower(tree, self.dump)
+        for name in module.libraries:
+            self.functions.update(library(name))
+        self.functions.update(module.functions)
+        self.memory = Memory(module.global_size)
+        self.context = Context(self.memory)
+        self.execute(module.init, [])
+        return self.call('main', [])
+
+    def call(self, name, args):
+        function = self.functions[name]
+        if isinstance(function, Function):
+            self.memory.new_frame(name, function.frame_size)
+            res = self.execute(function, args)
+            self.memory.del_frame()
+            return res
+        # builtins take raw values; addresses and strings are passed as is
+        return box(function.return_type, function(self.context, *[
+            arg.value if type(arg) is Number else arg for arg in args
+        ]))
+
+    def execute(self, function, args):
+        registers = [None] * function.registers
+        memory = self.memory
+        block = function.entry
+        while True:
+            for instruction in block.instructions:
+                opcode = instruction.opcode
+                values = [
+                    registers[value.index] if isinstance(value, Instruction) else value.value
+                    for value in instruction.args
+                ]
+                if opcode == 'load':
+                    result = memory[instruction.address]
+                elif opcode == 'store':
+                    memory[instruction.address] = values[0]
+                    continue
+                elif opcode == 'binary':
+                    operation = instruction.operation
+                    if operation is not None:
+                        result = operation(*values)
+                    else:
+                        result = BINARY_FUNCTIONS[instruction.op](*values)
+                elif opcode == 'copy':
+                    registers[instruction.target.index] = values[0]
+                    continue
+                elif opcode == 'branch':
+                    block = instruction.targets[0 if values[0] else 1]
+                    break
+                elif opcode == 'jump':
+                    block = instruction.targets[0]
+                    break
+                elif opcode == 'update':
+                    result = UPDATE[instruction.op](*values)
+                elif opcode == 'call':
+                    result = self.call(instruction.name, values)
+                elif opcode == 'cast':
+                    result = Number(instruction.type, values[0].value)
+                elif opcode == 'not':
+                    result = values[0]._not()
+                elif opcode == 'move':
+                    result = values[0]
+                elif opcode == 'arg':
+                    result = args[instruction.param]
+                elif opcode == 'address':
+                    result = instruction.address
+                elif opcode == 'return':
+                    return values[0]
+                elif opcode == 'fail':
+                    raise Exception(instruction.message)
+                registers[instruction.index] = result
@@ -0,0 +1,108 @@
+from ..interpreter.number import Number
+from ..lexer_analyzer.lexer import OPERATORS
+from ..semantic_analyzer.mem import GLOBAL
+from .analysis import dominators, liveness, reaching_definitions
+from .cfg import Instruction, Undef
+
+# operator token type -> its symbol
+SYMBOLS = dict((token.type, symbol) for symbol, token in OPERATORS.items())
+
+
+def address(value):
+    depth, slot = value
+    return '{}{}'.format('G' if depth == GLOBAL else 'L', slot)
+
+
+def operand(value):
+    if isinstance(value, Instruction):
+        return '%{}'.format(value.index)
+    if isinstance(value, Undef):
+        return 'undef'
+    value = value.value
+    if value is None:
+        return 'none'
+    if isinstance(value, Number):
+        return '{} {}'.format(value.type, value.value)
+    if isinstance(value, tuple):
+        return '&' + address(value)
+    return repr(value)
+
+
+def instruction_text(instruction):
+    opcode = instruction.opcode
+    args = ', '.join(operand(value) for value in instruction.args)
+    if opcode == 'arg':
+        text = 'arg {}'.format(instruction.param)
+    elif opcode in ('load', 'address'):
+        text = '{} {}'.format(opcode, address(instruction.address))
+    elif opcode == 'store':
+        text = 'store {}, {}'.format(address(instruction.address), args)
+    elif opcode in ('binary', 'update'):
+        text = '{} {} {}'.format(opcode, SYMBOLS.get(instruction.op, instruction.op), args)
+    elif opcode == 'cast':
+        text = 'cast {} {}'.format(instruction.type, args)
+    elif opcode == 'call':
+        text = 'call {}({})'.format(instruction.name, args)
+    elif opcode == 'phi':
+        text = 'phi ' + ', '.join(
+            '[{}: {}]'.format(block.label, operand(value))
+            for block, value in zip(instruction.blocks, instruction.args)
+        )
+    elif opcode == 'copy':
+        return '{} <- {}'.format(operand(instruction.target), args)
+    elif opcode == 'fail':
+        text = 'fail {!r}'.format(instruction.message)
+    elif opcode == 'jump':
+        text = 'jump {}'.format(instruction.targets[0].label)
+    elif opcode == 'branch':
+        text = 'branch {}, {}, {}'.format(args, *[block.label for block in instruction.targets])
+    else:
+        text = '{} {}'.format(opcode, args) if args else opcode
+    if opcode in ('store', 'fail', 'jump', 'branch', 'return'):
+        return text
+    return '%{} = {}'.format(instruction.index, text)
+
+
+def store_name(store):
+    """ Name of a store: the variable it writes and the block it is in """
+    return '{}@{}'.format(address(store.address), store.block.label)
+
+
+def format_function(function, annotate=True):
+    """ Text of a function, a block per paragraph; annotate: note the
+    predecessors, immediate dominator, live-in values and reaching stores
+    of each block """
+    function.number()
+    lines = ['function {} {}({}) frame {}, {} form'.format(
+        function.return_type, function.name, ', '.join(function.params),
+        function.frame_size, function.form
+    )]
+    if annotate:
+        idom = dominators(function)
+        predecessors = function.predecessors()
+        live_in, _ = liveness(function)
+        reach_in, _ = reaching_definitions(function)
+    for block in function.blocks:
+        header = block.label + ':'
+        if annotate:
+            notes = []
+            if predecessors[block]:
+                notes.append('preds ' + ', '.join(source.label for source in predecessors[block]))
+            if idom.get(block) is not None:
+                notes.append('idom ' + idom[block].label)
+            if live_in[block]:
+                notes.append('live ' + ', '.join(sorted(
+                    (operand(value) for value in live_in[block]), key=lambda name: int(name[1:])
+                )))
+            if reach_in[block]:
+                notes.append('reach ' + ', '.join(sorted(store_name(store) for store in reach_in[block])))
+            if notes:
+                header = '{:<24}; {}'.format(header, '; '.join(notes))
+        lines.append(header)
+        lines.extend('    ' + instruction_text(instruction) for instruction in block.instructions)
+    return '\n'.join(lines)
+
+
+def format_module(module, annotate=True):
+    functions = [module.init] + list(module.functions.values())
+    return '\n\n'.join(format_function(function, annotate) for function in functions)
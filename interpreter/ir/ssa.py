@@ -0,0 +1,198 @@
+from ..semantic_analyzer.mem import LOCAL
+from .analysis import dominance_frontiers, dominator_tree, dominators
+from .cfg import Instruction, UNDEF
+
+
+def promotable(function):
+    """ Addresses of the locals whose value can live in SSA values: those
+    whose address is never taken, which only the function itself reads
+    and writes """
+    escaped, result = set(), set()
+    for instruction in function.instructions():
+        if instruction.opcode == 'address':
+            escaped.add(instruction.address)
+        elif instruction.opcode in ('load', 'store') and instruction.address[0] == LOCAL:
+            result.add(instruction.address)
+    return result - escaped
+
+
+def resolve(value, replacements):
+    while id(value) in replacements:
+        value = replacements[id(value)]
+    return value
+
+
+def construct(function):
+    """ Put a function in load/store form into SSA form
+
+    The loads and stores of promotable locals are removed: a load is
+    replaced by the value last stored on the way to it, and where those
+    values differ on the paths that meet at a block, by a phi (Cytron et
+    al., with phis placed on the iterated dominance frontiers of the
+    stores). A local read before any store reads UNDEF. Phis whose value
+    is another value, or that nothing but dead phis reads, are removed.
+    """
+    addresses = promotable(function)
+    idom = dominators(function)
+    frontiers = dominance_frontiers(function, idom)
+    # drop the blocks no path reaches, so every block has a dominator
+    function.blocks = [block for block in function.blocks if block in idom]
+
+    phis = {}
+    for address in sorted(addresses):
+        pending = set(
+            instruction.block for instruction in function.instructions()
+            if instruction.opcode == 'store' and instruction.address == address
+        )
+        placed = set()
+        while pending:
+            block = pending.pop()
+            for frontier in frontiers[block]:
+                if frontier not in placed:
+                    placed.add(frontier)
+                    phi = frontier.insert(0, Instruction('phi', blocks=[], variable=address))
+                    phis[id(phi)] = address
+                    pending.add(frontier)
+
+    replacements = {}
+    values = dict((address, [UNDEF]) for address in addresses)
+    children = dominator_tree(idom)
+    # (block, the addresses it pushed a value for) of the blocks being renamed
+    stack = [(function.entry, None)]
+    while stack:
+        block, pushed = stack.pop()
+        if pushed is not None:
+            for address in pushed:
+                values[address].pop()
+            continue
+        pushed = []
+        kept = []
+        for instruction in block.instructions:
+            if id(instruction) in phis:
+                values[phis[id(instruction)]].append(instruction)
+                pushed.append(phis[id(instruction)])
+            elif instruction.opcode == 'load' and instruction.address in addresses:
+                replacements[id(instruction)] = values[instruction.address][-1]
+                continue
+            elif instruction.opcode == 'store' and instruction.address in addresses:
+                values[instruction.address].append(resolve(instruction.args[0], replacements))
+                pushed.append(instruction.address)
+                continue
+            kept.append(instruction)
+        block.instructions = kept
+
+        for successor in block.successors:
+            for phi in successor.phis:
+                if id(phi) in phis:
+                    phi.args.append(values[phis[id(phi)]][-1])
+                    phi.blocks.append(block)
+        stack.append((block, pushed))
+        stack.extend((child, None) for child in reversed(children[block]))
+
+    for instruction in function.instructions():
+        instruction.args = [resolve(value, replacements) for value in instruction.args]
+    simplify(function)
+    function.form = 'ssa'
+    return function
+
+
+def simplify(function):
+    """ Remove the phis that merge one value, and those only dead phis read """
+    replacements = {}
+    changed = True
+    while changed:
+        changed = False
+        for block in function.blocks:
+            for phi in block.phis:
+                if id(phi) in replacements:
+                    continue
+                merged = set(
+                    id(value) for value in (resolve(arg, replacements) for arg in phi.args)
+                    if value is not phi
+                )
+                if len(merged) == 1:
+                    value = next(arg for arg in phi.args if resolve(arg, replacements) is not phi)
+                    replacements[id(phi)] = resolve(value, replacements)
+                    changed = True
+    for block in function.blocks:
+        block.instructions = [
+            instruction for instruction in block.instructions if id(instruction) not in replacements
+        ]
+        for instruction in block.instructions:
+            instruction.args = [resolve(value, replacements) for value in instruction.args]
+
+    live, pending = set(), []
+    for instruction in function.instructions():
+        if instruction.opcode != 'phi':
+            for value in instruction.args:
+                if isinstance(value, Instruction) and value.opcode == 'phi' and id(value) not in live:
+                    live.add(id(value))
+                    pending.append(value)
+    while pending:
+        for value in pending.pop().args:
+            if isinstance(value, Instruction) and value.opcode == 'phi' and id(value) not in live:
+                live.add(id(value))
+                pending.append(value)
+    for block in function.blocks:
+        block.instructions = [
+            instruction for instruction in block.instructions
+            if instruction.opcode != 'phi' or id(instruction) in live
+        ]
+
+
+def destruct(function):
+    """ Replace the phis of a function in SSA form by copies
+
+    Each edge into a block with phis gets the copies that give its phis
+    the values they take on that edge, at the end of the block it leaves.
+    An edge from a block that branches elsewhere too is first split by a
+    block of its own, so its copies run on that edge only. The copies of
+    an edge act at once: one whose target another still reads waits for
+    it, and a cycle of them first moves one value aside.
+    """
+    predecessors = function.predecessors()
+    for block in list(function.blocks):
+        phis = block.phis
+        if not phis:
+            continue
+        sources = predecessors[block]
+        args = [incoming(phi, sources) for phi in phis]
+        for index, source in enumerate(sources):
+            if len(source.successors) > 1:
+                edge = function.block('edge')
+                edge.append(Instruction('jump', targets=[block]))
+                targets = source.terminator.attrs['targets']
+                targets[targets.index(block)] = edge
+                source = edge
+            sequentialize([(phi, values[index]) for phi, values in zip(phis, args)], source)
+        block.instructions = block.instructions[len(phis):]
+    function.form = 'copies'
+    return function
+
+
+def incoming(phi, sources):
+    """ Args of a phi in the order of sources, a block once per edge """
+    pairs = list(zip(phi.blocks, phi.args))
+    args = []
+    for source in sources:
+        index = next(index for index, (block, _) in enumerate(pairs) if block is source)
+        args.append(pairs.pop(index)[1])
+    return args
+
+
+def sequentialize(copies, block):
+    """ Copies doing the parallel copies, before the terminator of block """
+    position = len(block.instructions) - 1
+    pending = [(target, value) for target, value in copies if value is not target]
+    while pending:
+        for index, (target, value) in enumerate(pending):
+            if not any(other is target for _, other in pending):
+                block.insert(position, Instruction('copy', [value], target=target))
+                position += 1
+                del pending[index]
+                break
+        else:
+            target = pending[0][0]
+            moved = block.insert(position, Instruction('move', [target]))
+            position += 1
+            pending = [(other, moved if value is target else value) for other, value in pending]
@@ -0,0 +1,110 @@
+from .analysis import dominates, dominators
+from .cfg import Const, Instruction, IRError, STATEMENTS, TERMINATORS
+from .ssa import promotable
+
+# number of args of each opcode; call and phi take any
+ARITY = {
+    'arg': 0, 'load': 0, 'address': 0, 'store': 1, 'binary': 2, 'update': 2, 'not': 1,
+    'cast': 1, 'move': 1, 'copy': 1, 'fail': 0, 'jump': 0, 'branch': 1, 'return': 1,
+}
+TARGETS = dict(jump=1, branch=2)
+
+
+def verify(function):
+    """ Raise an IRError at the first rule a function breaks, return it
+    otherwise
+
+    Every block ends with its only terminator, jumps to blocks of the
+    function and is reachable; phis come first in a block and have an arg
+    per edge into it; an operand is a Const or a value computed where it
+    dominates the operand, at the end of the block it comes from for a
+    phi. In SSA form no promotable local is loaded or stored any more, and
+    once the phis became copies there are no phis, and copies are what set
+    the registers of the phis they replaced.
+    """
+    def fail(message, block=None):
+        where = function.name if block is None else '{}: {}'.format(function.name, block.label)
+        raise IRError('{}: {}'.format(where, message))
+
+    if not function.blocks:
+        fail('no blocks')
+    blocks = set(function.blocks)
+    if len(set(block.label for block in function.blocks)) != len(function.blocks):
+        fail('duplicate block labels')
+
+    idom = dominators(function)
+    predecessors = function.predecessors()
+    if predecessors[function.entry]:
+        fail('the entry has predecessors')
+
+    # value -> (block, position) where it is computed
+    defined, targets = {}, set()
+    for block in function.blocks:
+        if block not in idom:
+            fail('unreachable', block)
+        if not block.instructions:
+            fail('empty', block)
+        for position, instruction in enumerate(block.instructions):
+            if id(instruction) in defined:
+                fail('instruction in two places', block)
+            if instruction.block is not block:
+                fail('{} does not know its block'.format(instruction.opcode), block)
+            defined[id(instruction)] = block, position
+            if instruction.opcode == 'copy':
+                targets.add(id(instruction.target))
+
+        terminator = block.instructions[-1]
+        if terminator.opcode not in TERMINATORS:
+            fail('no terminator', block)
+        if any(instruction.opcode in TERMINATORS for instruction in block.instructions[:-1]):
+            fail('terminator before the end', block)
+        if len(terminator.targets) != TARGETS.get(terminator.opcode, 0):
+            fail('{} with {} targets'.format(terminator.opcode, len(terminator.targets)), block)
+        for target in terminator.targets:
+            if target not in blocks:
+                fail('jump to a block of another function', block)
+
+    for block in function.blocks:
+        phis = block.phis
+        for position, instruction in enumerate(block.instructions):
+            opcode = instruction.opcode
+            if opcode == 'phi':
+                if function.form == 'copies':
+                    fail('phi left after destruction', block)
+                if position >= len(phis):
+                    fail('phi after other instructions', block)
+                if len(instruction.args) != len(instruction.blocks):
+                    fail('phi with {} args from {} blocks'.format(
+                        len(instruction.args), len(instruction.blocks)
+                    ), block)
+                if sorted(map(id, instruction.blocks)) != sorted(map(id, predecessors[block])):
+                    fail('phi args do not match the predecessors', block)
+            elif opcode == 'call':
+                pass
+            elif opcode not in ARITY:
+                fail('unknown opcode {}'.format(opcode), block)
+            elif len(instruction.args) != ARITY[opcode]:
+                fail('{} with {} args'.format(opcode, len(instruction.args)), block)
+
+            for index, value in enumerate(instruction.args):
+                if isinstance(value, Const):
+                    continue
+                if not isinstance(value, Instruction):
+                    fail('{} operand is not a value'.format(opcode), block)
+                if value.opcode in STATEMENTS:
+                    fail('{} reads a {}, which has no value'.format(opcode, value.opcode), block)
+                if id(value) in targets:
+                    continue
+                if id(value) not in defined:
+                    fail('{} reads a value computed nowhere'.format(opcode), block)
+                source, source_position = defined[id(value)]
+                if opcode == 'phi':
+                    user, position_of_use = instruction.blocks[index], len(instruction.blocks[index].instructions)
+                else:
+                    user, position_of_use = block, position
+                if source is user and source_position >= position_of_use or not dominates(idom, source, user):
+                    fail('{} reads a value before it is computed'.format(opcode), block)
+
+    if function.form == 'ssa' and promotable(function):
+        fail('promotable locals left in memory')
+    return function
@@ -1,3 +1,5 @@
 from . import token_type
 from . import token
-from . import lexer
\ No newline at end of file
+from . import token_buffer
+from . import lexer
+from . import incremental
\ No newline at end of file
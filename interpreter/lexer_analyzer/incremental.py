@@ -0,0 +1,76 @@
+from array import array
+from bisect import bisect_left
+
+from .lexer import Lexer, NEWLINE_REGEX
+from .token_buffer import TokenBuffer
+from .token_type import EOF, KINDS
+
+
+class IncrementalLexer(Lexer):
+    """ Keeps the tokens of a source text up to date across edits
+
+    An edit is re-tokenized from the end of the last token before it, which
+    is always a point where the scanner is outside of any comment or literal,
+    until a new token starts at the same place, after the edit, as an old one.
+    From there on the old tokens are reused, only shifted by the size change.
+    """
+    def __init__(self, text):
+        Lexer.__init__(self, text)
+        self.tokens = self.tokenize()
+
+    @property
+    def text(self):
+        return self.buffer
+
+    def edit(self, offset, deleted, inserted):
+        """ Replace `deleted` characters at `offset` by `inserted`
+
+        Returns (index, removed, added): tokens[index:index + removed] of the
+        old stream were replaced by tokens[index:index + added].
+        """
+        old = self.tokens
+        old_text, old_newlines = self.buffer, self.newlines
+        delta = len(inserted) - deleted
+        edit_end = offset + len(inserted)
+
+        self.buffer = old_text[:offset] + inserted + old_text[offset + deleted:]
+        self.newlines = old_newlines[:bisect_left(old_newlines, offset)] + array(
+            'l', (offset + match.start() for match in NEWLINE_REGEX.finditer(inserted))
+        ) + shifted(old_newlines[bisect_left(old_newlines, offset + deleted):], delta)
+
+        first = bisect_left(old.ends, offset)
+        self.pos = old.ends[first - 1] if first else 0
+
+        tokens = TokenBuffer(self.newlines)
+        tokens.names = old.names
+        eof = KINDS[EOF]
+        try:
+            while True:
+                token = self.scan()
+                start = token[2]
+                if start >= edit_end:
+                    resume = bisect_left(old.starts, start - delta, first)
+                    if resume < len(old) and old.starts[resume] == start - delta:
+                        break
+                tokens.append(*token)
+                if tokens.kinds[-1] == eof:
+                    resume = len(old)
+                    break
+        except Exception:
+            self.buffer, self.newlines = old_text, old_newlines
+            raise
+
+        result = TokenBuffer(self.newlines)
+        result.names = old.names
+        result.kinds = old.kinds[:first] + tokens.kinds + old.kinds[resume:]
+        result.values = old.values[:first] + tokens.values + old.values[resume:]
+        result.starts = old.starts[:first] + tokens.starts + shifted(old.starts[resume:], delta)
+        result.ends = old.ends[:first] + tokens.ends + shifted(old.ends[resume:], delta)
+        self.tokens = result
+        return first, resume - first, len(tokens)
+
+
+def shifted(offsets, delta):
+    if not delta:
+        return offsets
+    return array('l', [offset + delta for offset in offsets])
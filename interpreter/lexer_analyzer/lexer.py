@@ -1,5 +1,10 @@
+import codecs
+import re
+from array import array
+
 from .token_type import *
 from .token import Token
+from .token_buffer import TokenBuffer, position
 
 RESERVED_KEYWORDS = {
     'char': Token(CHAR, 'char'),
@@ -17,335 +22,250 @@ RESERVED_KEYWORDS = {
     'void': Token(VOID, 'void'),    
 }
 
+OPERATORS = {
+    '<<=': Token(LEFT_ASSIGN, '<<='),
+    '>>=': Token(RIGHT_ASSIGN, '>>='),
+    '+=': Token(ADD_ASSIGN, '+='),
+    '-=': Token(SUB_ASSIGN, '-='),
+    '*=': Token(MUL_ASSIGN, '*='),
+    '/=': Token(DIV_ASSIGN, '/='),
+    '%=': Token(MOD_ASSIGN, '%='),
+    '&=': Token(AND_ASSIGN, '&='),
+    '^=': Token(XOR_ASSIGN, '^='),
+    '|=': Token(OR_ASSIGN, '|='),
+    '>>': Token(RIGHT_OP, '>>'),
+    '<<': Token(LEFT_OP, '<<'),
+    '++': Token(INC_OP, '++'),
+    '--': Token(DEC_OP, '--'),
+    '&&': Token(LOG_AND_OP, '&&'),
+    '||': Token(LOG_OR_OP, '||'),
+    '<=': Token(LE_OP, '<='),
+    '>=': Token(GE_OP, '>='),
+    '==': Token(EQ_OP, '=='),
+    '!=': Token(NE_OP, '!='),
+    '<': Token(LT_OP, '<'),
+    '>': Token(GT_OP, '>'),
+    '=': Token(ASSIGN, '='),
+    '!': Token(LOG_NEG, '!'),
+    '&': Token(AND_OP, '&'),
+    '|': Token(OR_OP, '|'),
+    '^': Token(XOR_OP, '^'),
+    '+': Token(ADD_OP, '+'),
+    '-': Token(SUB_OP, '-'),
+    '*': Token(MUL_OP, '*'),
+    '/': Token(DIV_OP, '/'),
+    '%': Token(MOD_OP, '%'),
+    '(': Token(LPAREN, '('),
+    ')': Token(RPAREN, ')'),
+    '{': Token(LBRACKET, '{'),
+    '}': Token(RBRACKET, '}'),
+    ';': Token(SEMICOLON, ';'),
+    ':': Token(COLON, ':'),
+    ',': Token(COMMA, ','),
+    '.': Token(DOT, '.'),
+    '#': Token(HASH, '#'),
+    '?': Token(QUESTION_MARK, '?'),
+}
 
+# token type of every fixed spelling; any other word is an identifier
+WORDS = dict(
+    [(word, token.type) for word, token in RESERVED_KEYWORDS.items()] +
+    [(word, token.type) for word, token in OPERATORS.items()]
+)
+
+# Whitespace and comments are consumed as a prefix of every match and the
+# operators are sorted longest first, so a single regex call yields the next
+# token with longest-match semantics.
+TOKEN_REGEX = re.compile(r'''
+    (?:\s+|//[^\n]*\n?|/\*.*?\*/)*
+    (?:
+      (?P<ID>[^\W\d_][^\W_]*)
+    | (?P<UNTERMINATED_COMMENT>/\*)
+    | (?P<OPERATOR>{operators})
+    | (?P<NUMBER>\d+(?P<FRACTION>\.\d*)?)
+    | (?P<STRING>"(?:[^"\\]|\\.)*")
+    | (?P<CHAR>'(?:[^\\']|\\.)')
+    | (?P<EOF>\Z)
+    | (?P<UNTERMINATED_STRING>")
+    | (?P<UNTERMINATED_CHAR>'.?)
+    | (?P<INVALID>.)
+    )
+'''.format(
+    operators='|'.join(re.escape(op) for op in sorted(OPERATORS, key=len, reverse=True))
+), re.VERBOSE | re.DOTALL)
+
+
+NEWLINE_REGEX = re.compile('\n')
+
+ESCAPE_REGEX = re.compile(r'\\(.)', re.DOTALL)
+
+ESCAPES = {
+    'n': '\n',
+    't': '\t',
+    'r': '\r',
+    'a': '\a',
+    'b': '\b',
+    'f': '\f',
+    'v': '\v',
+    '0': '\0',
+    '\\': '\\',
+    '\'': '\'',
+    '"': '"',
+    '?': '?',
+}
 
+# kinds that may change once more input is available
+INCOMPLETE = ('EOF', 'UNTERMINATED_COMMENT', 'UNTERMINATED_STRING', 'UNTERMINATED_CHAR')
 
-class Lexer(object):
-    def __init__(self, text):
-        self.text = text.replace('\\n', '\n')
-        self.pos = 0
-        self.current_char = self.text[self.pos]
-        self.line = 1
+CHUNK_SIZE = 1 << 16
 
-    def error(self, message):
-        raise LexicalError(message)
-
-    def advance(self):
 
-        self.pos += 1
-        if self.pos > len(self.text) - 1:
-            self.current_char = None  # Indicates end of input
-        else:
-            self.current_char = self.text[self.pos]
+def unescape(match):
+    return ESCAPES.get(match.group(1), match.group(1))
 
-    def peek(self, n):
 
-        peek_pos = self.pos + n
-        if peek_pos > len(self.text) - 1:
-            return None
-        else:
-            return self.text[peek_pos]
-
-    def skip_whitespace(self):
-        while self.current_char is not None and self.current_char.isspace():
-            if self.current_char == '\n':
-                self.line += 1
-            self.advance()
-
-    def skip_comment(self):
-        while self.current_char is not None:
-            if self.current_char == '\n':
-                self.line += 1
-                self.advance()
-                return
-            self.advance()
-
-    def skip_multiline_comment(self):
-        while self.current_char is not None:
-            if self.current_char == '*' and self.peek(1) == '/':
-                self.advance()
-                self.advance()
-                return
-            if self.current_char == '\n':
-                self.line += 1
-            self.advance()
-        self.error("Unterminated comment at line {}".format(self.line))
-
-    def number(self):
-        result = ''
-        while self.current_char is not None and self.current_char.isdigit():
-            result += self.current_char
-            self.advance()
-
-        if self.current_char == '.':
-            result += self.current_char
-            self.advance()
-
-            while (self.current_char is not None and self.current_char.isdigit()):
-                result += self.current_char
-                self.advance()
-
-            token = Token(REAL_CONST, float(result))
+class Lexer(object):
+    """ Tokenizer over a str or a file-like object (text file, binary file or mmap)
+
+    Streams are read `chunk_size` characters at a time and only the part of the
+    source that has not been tokenized yet is kept in `buffer`.
+    """
+    def __init__(self, text, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.offset = 0  # source offset of buffer[0]
+        self.pos = 0
+        self.newlines = array('l')
+        if isinstance(text, str):
+            self.stream = None
+            self.extend(text)
         else:
-            token = Token(INTEGER_CONST, int(result))
+            self.stream = text
+            self.decoder = codecs.getincrementaldecoder('utf-8')()
+            self.read()
+
+    @classmethod
+    def from_file(cls, path, chunk_size=CHUNK_SIZE):
+        """ Lexer over a memory-mapped source file """
+        import mmap
+        with open(path, 'rb') as file:
+            try:
+                source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty files cannot be mapped
+                source = ''
+        return cls(source, chunk_size)
 
-        return token
+    def error(self, message):
+        raise LexicalError(message)
 
-    def string(self):
-        result = ''
-        self.advance()
-        while self.current_char is not '"':
-            if self.current_char is None:
-                self.error(
-                    message='Unfinished string with \'"\' at line {}'.format(self.line)
-                )
-            result += self.current_char
-            self.advance()
-        self.advance()
-        return Token(STRING, result)
-
-    def char(self):
-        self.advance()
-        char = self.current_char
-        self.advance()
-        if self.current_char != '\'':
-            self.error("Unclosed char constant at line {}".format(self.line))
-        self.advance()
-        return Token(CHAR_CONST, ord(char))
-
-    def _id(self):
-        result = ''
-        while self.current_char is not None and self.current_char.isalnum():
-            result += self.current_char
-            self.advance()
-
-        token = RESERVED_KEYWORDS.get(result, Token(ID, result))
-        return token
+    def extend(self, text):
+        base = self.offset + len(self.buffer)
+        self.newlines.extend(base + match.start() for match in NEWLINE_REGEX.finditer(text))
+        self.buffer += text
+
+    def read(self):
+        """ Drop the tokenized part of the buffer and append the next chunk """
+        while True:
+            data = self.stream.read(self.chunk_size)
+            chunk = self.decoder.decode(data, final=not data) if isinstance(data, bytes) else data
+            if chunk or not data:
+                break
+        if not data:
+            self.stream = None
+
+        self.buffer = self.buffer[self.pos - self.offset:]
+        self.offset = self.pos
+        self.extend(chunk)
+
+    def position(self, offset):
+        """ (line, column) of a source offset, both starting at 1 """
+        return position(self.newlines, offset)
 
     @property
-    def get_next_token(self):
+    def line(self):
+        return self.position(self.pos)[0]
 
-        while self.current_char is not None:
-
-            if self.current_char.isspace():
-                self.skip_whitespace()
-                continue
-
-            if self.current_char == '/' and self.peek(1) == '/':
-                self.skip_comment()
-                continue
-
-            if self.current_char == '/' and self.peek(1) == '*':
-                self.skip_multiline_comment()
-                continue
-
-            if self.current_char.isalpha():
-                return self._id()
-
-            if self.current_char.isdigit():
-                return self.number()
-
-            if self.current_char == '"':
-                return self.string()
-
-            if self.current_char == '\'':
-                return self.char()
-
-            if self.current_char == '<' and self.peek(1) == '<' and self.peek(2) == '=':
-                self.advance()
-                self.advance()
-                self.advance()
-                return Token(LEFT_ASSIGN, '<<=')
-
-            if self.current_char == '>' and self.peek(1) == '>' and self.peek(2) == '=':
-                self.advance()
-                self.advance()
-                self.advance()
-                return Token(RIGHT_ASSIGN, '>>=')
-
-            if self.current_char == '+' and self.peek(1) == '=':
-                self.advance()
-                self.advance()
-                return Token(ADD_ASSIGN, '+=')
-
-            if self.current_char == '-' and self.peek(1) == '=':
-                self.advance()
-                self.advance()
-                return Token(SUB_ASSIGN, '-=')
-
-            if self.current_char == '*' and self.peek(1) == '=':
-                self.advance()
-                self.advance()
-                return Token(MUL_ASSIGN, '*=')
-
-            if self.current_char == '/' and self.peek(1) == '=':
-                self.advance()
-                self.advance()
-                return Token(DIV_ASSIGN, '/=')
-
-            if self.current_char == '%' and self.peek(1) == '=':
-                self.advance()
-                self.advance()
-                return Token(MOD_ASSIGN, '%=')
-
-            if self.current_char == '&' and self.peek(1) == '=':
-                self.advance()
-                self.advance()
-                return Token(AND_ASSIGN, '&=')
-
-            if self.current_char == '^' and self.peek(1) == '=':
-                self.advance()
-                self.advance()
-                return Token(XOR_ASSIGN, '^=')
-
-            if self.current_char == '|' and self.peek(1) == '=':
-                self.advance()
-                self.advance()
-                return Token(OR_ASSIGN, '|=')
-
-            if self.current_char == '>' and self.peek(1) == '>':
-                self.advance()
-                self.advance()
-                return Token(RIGHT_OP, '>>')
-
-            if self.current_char == '<' and self.peek(1) == '<':
-                self.advance()
-                self.advance()
-                return Token(LEFT_OP, '<<')
-
-            if self.current_char == '+' and self.peek(1) == '+':
-                self.advance()
-                self.advance()
-                return Token(INC_OP, '++')
-
-            if self.current_char == '-' and self.peek(1) == '-':
-                self.advance()
-                self.advance()
-                return Token(DEC_OP, '--')
-
-            if self.current_char == '&' and self.peek(1) == '&':
-                self.advance()
-                self.advance()
-                return Token(LOG_AND_OP, '&&')
-
-            if self.current_char == '|' and self.peek(1) == '|':
-                self.advance()
-                self.advance()
-                return Token(LOG_OR_OP, '||')
-
-            if self.current_char == '<' and self.peek(1) == '=':
-                self.advance()
-                self.advance()
-                return Token(LE_OP, '<=')
-
-            if self.current_char == '>' and self.peek(1) == '=':
-                self.advance()
-                self.advance()
-                return Token(GE_OP, '>=')
-
-            if self.current_char == '=' and self.peek(1) == '=':
-                self.advance()
-                self.advance()
-                return Token(EQ_OP, '==')
-
-            if self.current_char == '!' and self.peek(1) == '=':
-                self.advance()
-                self.advance()
-                return Token(NE_OP, '!=')
-
-            if self.current_char == '<':
-                self.advance()
-                return Token(LT_OP, '<')
-
-            if self.current_char == '>':
-                self.advance()
-                return Token(GT_OP, '>')
-
-            if self.current_char == '=':
-                self.advance()
-                return Token(ASSIGN, '=')
-
-            if self.current_char == '!':
-                self.advance()
-                return Token(LOG_NEG, '!')
-
-            if self.current_char == '&':
-                self.advance()
-                return Token(AND_OP, '&')
-
-            if self.current_char == '|':
-                self.advance()
-                return Token(OR_OP, '|')
-
-            if self.current_char == '^':
-                self.advance()
-                return Token(XOR_OP, '|')
-
-            if self.current_char == '+':
-                self.advance()
-                return Token(ADD_OP, '+')
-
-            if self.current_char == '-':
-                self.advance()
-                return Token(SUB_OP, '-')
-
-            if self.current_char == '*':
-                self.advance()
-                return Token(MUL_OP, '*')
-
-            if self.current_char == '/':
-                self.advance()
-                return Token(DIV_OP, '/')
-
-            if self.current_char == '%':
-                self.advance()
-                return Token(MOD_OP, '%')
-
-            if self.current_char == '(':
-                self.advance()
-                return Token(LPAREN, '(')
-
-            if self.current_char == ')':
-                self.advance()
-                return Token(RPAREN, ')')
-
-            if self.current_char == '{':
-                self.advance()
-                return Token(LBRACKET, '{')
-
-            if self.current_char == '}':
-                self.advance()
-                return Token(RBRACKET, '}')
-
-            if self.current_char == ';':
-                self.advance()
-                return Token(SEMICOLON, ';')
-
-            if self.current_char == ':':
-                self.advance()
-                return Token(COLON, ':')
-
-            if self.current_char == ',':
-                self.advance()
-                return Token(COMMA, ',')
-
-            if self.current_char == '.':
-                self.advance()
-                return Token(DOT, '.')
+    def string(self, start, end):
+        literal = self.buffer[start + 1 - self.offset:end - 1 - self.offset]
+        if '\\' in literal:
+            literal = ESCAPE_REGEX.sub(unescape, literal)
+        return STRING, literal, start, end
 
-            if self.current_char == '#':
-                self.advance()
-                return Token(HASH, '#')
-
-            if self.current_char == '?':
-                self.advance()
-                return Token(QUESTION_MARK, '?')
+    def char(self, start, end):
+        literal = self.buffer[start + 1 - self.offset:end - 1 - self.offset]
+        if '\\' in literal:
+            literal = ESCAPE_REGEX.sub(unescape, literal)
+        return CHAR_CONST, ord(literal), start, end
 
+    @property
+    def get_next_token(self):
+        return Token(*self.scan())
+
+    def tokenize(self):
+        """ Scan the remaining input into a compact TokenBuffer """
+        tokens = TokenBuffer(self.newlines)
+        append = tokens.append
+        while True:
+            token = self.scan()
+            append(*token)
+            if token[0] == EOF:
+                return tokens
+
+    def scan(self):
+        """ Next token as a (type, value, start, end) tuple """
+        match = TOKEN_REGEX.match(self.buffer, self.pos - self.offset)
+        kind = match.lastgroup
+        while self.stream is not None and (kind in INCOMPLETE or match.end() == len(self.buffer)):
+            self.read()
+            match = TOKEN_REGEX.match(self.buffer, self.pos - self.offset)
+            kind = match.lastgroup
+
+        offset = self.offset
+        start, end = match.span(kind)
+        start += offset
+        self.pos = end = end + offset
+
+        if kind == 'ID':
+            value = match.group(kind)
+            return WORDS.get(value, ID), value, start, end
+
+        if kind == 'OPERATOR':
+            value = match.group(kind)
+            return WORDS[value], value, start, end
+
+        if kind == 'NUMBER':
+            if match.group('FRACTION') is not None:
+                return REAL_CONST, float(match.group(kind)), start, end
+            return INTEGER_CONST, int(match.group(kind)), start, end
+
+        if kind == 'STRING':
+            return self.string(start, end)
+
+        if kind == 'CHAR':
+            return self.char(start, end)
+
+        if kind == 'EOF':
+            return EOF, None, start, end
+
+        if kind == 'UNTERMINATED_COMMENT':
+            self.error("Unterminated comment at line {}".format(
+                self.position(self.offset + len(self.buffer))[0]
+            ))
+
+        if kind == 'UNTERMINATED_STRING':
             self.error(
-                message="Invalid char {} at line {}".format(self.current_char, self.line)
+                message='Unfinished string with \'"\' at line {}'.format(
+                    self.position(self.offset + len(self.buffer))[0]
+                )
             )
 
-        return Token(EOF, None)
+        if kind == 'UNTERMINATED_CHAR':
+            self.error("Unclosed char constant at line {}:{}".format(*self.position(start)))
+
+        self.error(
+            message="Invalid char {} at line {}:{}".format(match.group(kind), *self.position(start))
+        )
 
 class LexicalError(Exception):
 
@@ -1,4 +1,5 @@
 class Token(object):
+    __slots__ = ('type', 'value', 'start', 'end')
 
 
     def __str__(self):
@@ -8,9 +9,11 @@ class Token(object):
         )
 
 
-    def __init__(self, type, value):
+    def __init__(self, type, value, start=None, end=None):
         self.type = type
         self.value = value
+        self.start = start
+        self.end = end
 
 
     def __repr__(self):
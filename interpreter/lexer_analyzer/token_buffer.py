@@ -0,0 +1,60 @@
+from array import array
+from bisect import bisect_left
+
+from .token_type import TOKEN_TYPES, KINDS, STRING
+from .token import Token
+
+
+def position(newlines, offset):
+    """ (line, column) of a source offset given the offsets of all newlines """
+    line = bisect_left(newlines, offset)
+    if line:
+        return line + 1, offset - newlines[line - 1]
+    return 1, offset + 1
+
+
+class TokenBuffer(object):
+    """ Struct-of-arrays token stream
+
+    Token i is described by kinds[i] (an index into TOKEN_TYPES), values[i],
+    starts[i] and ends[i]. Identifiers, keywords and operators are interned
+    in `names`, so every occurrence of a spelling shares one string object.
+    """
+    __slots__ = ('kinds', 'values', 'starts', 'ends', 'names', 'newlines')
+
+    def __init__(self, newlines=None):
+        self.kinds = array('B')
+        self.values = []
+        self.starts = array('l')
+        self.ends = array('l')
+        self.names = {}
+        self.newlines = newlines if newlines is not None else array('l')
+
+    def append(self, type, value, start, end):
+        if type != STRING and value.__class__ is str:
+            value = self.names.setdefault(value, value)
+        self.kinds.append(KINDS[type])
+        self.values.append(value)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        return Token(
+            TOKEN_TYPES[self.kinds[index]],
+            self.values[index],
+            self.starts[index],
+            self.ends[index]
+        )
+
+    def __iter__(self):
+        for index in range(len(self.kinds)):
+            yield self[index]
+
+    def type(self, index):
+        return TOKEN_TYPES[self.kinds[index]]
+
+    def position(self, offset):
+        return position(self.newlines, offset)
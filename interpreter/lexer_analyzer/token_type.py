@@ -29,6 +29,19 @@ BREAK, CONTINUE = 'BREAK', 'CONTINUE'
 
 EOF = 'EOF'
 
-
-
-
+# Fixed order of token types; the index of a type is its compact integer kind
+TOKEN_TYPES = (
+    EOF, ID, CHAR_CONST, INTEGER_CONST, REAL_CONST, STRING,
+    CHAR, INT, FLOAT, DOUBLE, VOID,
+    IF, ELSE, FOR, WHILE, RETURN, DO, BREAK, CONTINUE,
+    ADD_OP, SUB_OP, MUL_OP, DIV_OP, MOD_OP, INC_OP, DEC_OP,
+    AND_OP, OR_OP, XOR_OP, LEFT_OP, RIGHT_OP,
+    LT_OP, GT_OP, LE_OP, GE_OP, EQ_OP, NE_OP,
+    LOG_AND_OP, LOG_OR_OP, LOG_NEG,
+    ASSIGN, MUL_ASSIGN, DIV_ASSIGN, MOD_ASSIGN, ADD_ASSIGN, SUB_ASSIGN,
+    LEFT_ASSIGN, RIGHT_ASSIGN, AND_ASSIGN, XOR_ASSIGN, OR_ASSIGN,
+    LPAREN, RPAREN, LBRACKET, RBRACKET,
+    COMMA, DOT, SEMICOLON, HASH, COLON, QUESTION_MARK,
+)
+
+KINDS = {token_type: kind for kind, token_type in enumerate(TOKEN_TYPES)}
@@ -0,0 +1,7 @@
+from . import transformer
+from . import assignment
+from . import folding
+from . import inliner
+from . import loops
+from . import values
+from . import branches
@@ -0,0 +1,96 @@
+from ..syntax_analyzer.syntax_tree import *
+from .transformer import NodeTransformer, walk
+
+
+def address(var):
+    return var.depth, var.slot
+
+
+def assigned(node):
+    """ Addresses of the variables a statement assigns whenever it completes """
+    if isinstance(node, Assign):
+        result = assigned(node.right)
+        if isinstance(node.left, Var):
+            result.add(address(node.left))
+        return result
+    if isinstance(node, Expression):
+        result = set()
+        for child in node.children:
+            result |= assigned(child)
+        return result
+    if isinstance(node, CompoundStatement):
+        return sequence(node.children)
+    if isinstance(node, ForStatement):
+        return assigned(node.setup)
+    return set()
+
+
+def sequence(children):
+    """ Addresses a list of statements leaves assigned """
+    result = set()
+    for child in children:
+        if isinstance(child, VarDeclaration):
+            result.discard(address(child.var_node))
+        else:
+            result |= assigned(child)
+    return result
+
+
+class DefiniteAssignment(NodeTransformer):
+    """ Transformer that knows which variables are definitely assigned at
+    the statement it visits
+
+    A declared variable holds UNINITIALIZED until it is assigned, and an
+    operation on that value raises, so an expression may only run earlier
+    than the program runs it when it reads variables in `assigned`: the
+    parameters of the function, the globals the top-level statements of
+    the program assign, and what the statements before it in its blocks
+    assign. Assignments in branches and loop bodies do not count after
+    them. Globals count as unassigned when a top-level statement calls a
+    function, which could read them first.
+    """
+
+    def __init__(self):
+        self.assigned = set()
+        self.globals = set()
+
+    def visit_Program(self, node):
+        top = [child for child in node.children if not isinstance(child, FunctionDeclaration)]
+        if any(isinstance(item, FunctionCall) for child in top for item in walk(child)):
+            self.globals = set()
+        else:
+            self.globals = sequence(top)
+        node.children = self.statements(node.children)
+        return node
+
+    def visit_FunctionDeclaration(self, node):
+        before = self.assigned
+        self.assigned = set(self.globals)
+        self.assigned.update(address(param.var_node) for param in node.params)
+        node.body = self.visit(node.body)
+        self.assigned = before
+        return node
+
+    def visit_FunctionBody(self, node):
+        node.children = self.statements(node.children)
+        return node
+
+    def visit_CompoundStatement(self, node):
+        node.children = self.statements(node.children)
+        return node
+
+    def statements(self, children):
+        """ Visit statements in order, each with what those before it
+        assign added to `assigned`, which is left as it was """
+        before = self.assigned
+        self.assigned = set(before)
+        result = []
+        for child in children:
+            child = self.visit(child)
+            result.append(child)
+            if isinstance(child, VarDeclaration):
+                self.assigned.discard(address(child.var_node))
+            else:
+                self.assigned |= assigned(child)
+        self.assigned = before
+        return result
@@ -0,0 +1,51 @@
+from ..lexer_analyzer.token_type import LOG_AND_OP, LOG_OR_OP
+from ..syntax_analyzer.syntax_tree import *
+from .transformer import size
+from .assignment import DefiniteAssignment
+from .loops import invariant
+
+
+class BranchOrder(DefiniteAssignment):
+    """ Orders the operands of && and || by how often they decide
+
+    The right operand of && is only evaluated when the left one is true,
+    and that of || when it is false. With the share of true values a
+    profile of training runs measured for each operand, the operands are
+    swapped when that is expected to evaluate fewer nodes. Both operands
+    must be evaluated in training, cannot raise, have no side effects and
+    only read variables that are definitely assigned where the operator
+    is, so the order only changes the time they take.
+    """
+
+    def __init__(self, profile):
+        DefiniteAssignment.__init__(self)
+        self.profile = profile
+        self.reordered = 0
+
+    @staticmethod
+    def optimize(tree, profile):
+        """ Reorder the operands in an analyzed program in place and return
+        how many pairs were swapped """
+        order = BranchOrder(profile)
+        order.visit(tree)
+        return order.reordered
+
+    def visit_BinaryOperator(self, node):
+        node = self.generic_visit(node)
+        if node.op.type not in (LOG_AND_OP, LOG_OR_OP):
+            return node
+        left, right = self.profile.taken(node.left), self.profile.taken(node.right)
+        if left is None or right is None or not (
+            invariant(node.left, assigned=self.assigned) and
+            invariant(node.right, assigned=self.assigned)
+        ):
+            return node
+        if node.op.type == LOG_OR_OP:
+            left, right = 1 - left, 1 - right
+        # nodes evaluated on average, left first and right first
+        kept = size(node.left) + left * size(node.right)
+        swapped = size(node.right) + right * size(node.left)
+        if swapped < kept:
+            node.left, node.right = node.right, node.left
+            self.reordered += 1
+        return node
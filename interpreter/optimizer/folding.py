@@ -0,0 +1,322 @@
+from ..lexer_analyzer.token_type import INC_OP, DEC_OP, AND_OP, LOG_AND_OP, LOG_OR_OP, ASSIGN
+from ..semantic_analyzer.mem import GLOBAL
+from ..syntax_analyzer.syntax_tree import *
+from .transformer import NodeTransformer, walk, size
+
+# unary operators that write to their operand or take its address
+WRITING_OPERATORS = frozenset((INC_OP, DEC_OP, AND_OP))
+
+
+def located(node_class, node, *args):
+    """ New node_class(*args, line) at the location of node """
+    result = node_class(*(args + (node.line,)))
+    result.column, result.start, result.end = node.column, node.start, node.end
+    return result
+
+
+def writes(nodes):
+    """ (depth, slot) -> number of nodes that assign, increment, decrement or
+    take the address of the variable """
+    counts = {}
+    for node in nodes:
+        if isinstance(node, Assign):
+            target = node.left
+        elif isinstance(node, UnaryOperator) and node.op.type in WRITING_OPERATORS:
+            target = node.expr
+        else:
+            continue
+        if isinstance(target, Var):
+            address = target.depth, target.slot
+            counts[address] = counts.get(address, 0) + 1
+    return counts
+
+
+def reads(nodes):
+    """ Addresses of the variables whose value is used in nodes """
+    targets = set()
+    for node in nodes:
+        if isinstance(node, Assign):
+            targets.add(id(node.left))
+        elif isinstance(node, (VarDeclaration, Param)):
+            targets.add(id(node.var_node))
+    return set(
+        (node.depth, node.slot) for node in nodes
+        if isinstance(node, Var) and id(node) not in targets
+    )
+
+
+class ConstantFolder(NodeTransformer):
+    """ Constant folding, constant propagation and dead code elimination
+
+    Literals, and operators whose operands are constant, become Constant
+    nodes holding the Number they evaluate to. The interpreter itself works
+    them out, so they behave as they would at run time; an operation that
+    raises is left for the program to raise.
+
+    A variable written only once, by a plain assignment of a constant among
+    the top-level statements of a function (or of the program, for a
+    global), is replaced by that constant where it is read after the
+    assignment, and the assignment is dropped when no read is left.
+
+    An if statement with a constant condition is replaced by the branch it
+    takes, a loop whose condition is constantly false by its setup, and
+    statements with no effect or after a top-level return are dropped.
+    """
+
+    def __init__(self):
+        self.interpreter = None
+        # address -> Number of the variables known to be constant
+        self.constants = {}
+        self.writes = {}
+        # whether every write to a global is in a parsed function body
+        self.globals_known = True
+
+    @staticmethod
+    def optimize(tree):
+        """ Optimize an analyzed program in place and return how many nodes
+        it removed """
+        before = size(tree)
+        ConstantFolder().visit(tree)
+        return before - size(tree)
+
+    def evaluate(self, node):
+        """ Constant holding the value of node, or node if evaluating it raises """
+        if self.interpreter is None:
+            # imported here since the interpreter imports this module
+            from ..interpreter.interpreter import Interpreter
+            self.interpreter = Interpreter()
+        try:
+            number = self.interpreter.visit(node)
+        except Exception:
+            return node
+        return located(Constant, node, number)
+
+    def coerce(self, constant, ttype):
+        if ttype is None:
+            return constant
+        number = constant.number
+        return located(Constant, constant, type(number)(ttype, number.value))
+
+    def visit_Program(self, node):
+        # an unparsed body may read or write any global, so none of them is
+        # propagated or has its definition removed
+        self.globals_known = not any(
+            isinstance(child, FunctionDeclaration) and isinstance(child.body, LazyFunctionBody)
+            for child in node.children
+        )
+        global_writes = dict(
+            (address, count) for address, count in writes(walk(node)).items()
+            if address[0] == GLOBAL
+        )
+        self.writes = global_writes
+        definitions = []
+        node.children = self.statements(node.children, definitions)
+
+        # functions run after the global declarations, unless these call
+        # them, and the writes of an unparsed body are not known
+        global_constants = self.constants
+        for child in node.children:
+            if isinstance(child, FunctionDeclaration):
+                if isinstance(child.body, LazyFunctionBody):
+                    global_constants = {}
+            elif any(isinstance(item, FunctionCall) for item in walk(child)):
+                global_constants = {}
+
+        for child in node.children:
+            if isinstance(child, FunctionDeclaration) and isinstance(child.body, FunctionBody):
+                self.constants = dict(global_constants)
+                self.writes = dict(global_writes)
+                self.writes.update(
+                    (address, count) for address, count in writes(walk(child.body)).items()
+                    if address[0] != GLOBAL
+                )
+                self.function(child)
+
+        node.children = self.unused(node.children, definitions, walk(node))
+        return node
+
+    def function(self, node):
+        definitions = []
+        body = node.body
+        body.children = self.statements(body.children, definitions, function=True)
+        # other functions may read a global it defines
+        definitions = [assign for assign in definitions if assign.left.depth != GLOBAL]
+        body.children = self.unused(body.children, definitions, walk(body))
+
+    def visit_FunctionDeclaration(self, node):
+        # optimized by visit_Program once the globals are known
+        return node
+
+    def visit_IncludeLibrary(self, node):
+        return node
+
+    def unused(self, children, definitions, nodes):
+        """ children without the definitions of constants that are no longer
+        read, and their declarations """
+        used = reads(nodes)
+        dead = set()
+        for assign in definitions:
+            if (assign.left.depth, assign.left.slot) not in used:
+                dead.add(id(assign))
+        dead_addresses = set(
+            (child.left.depth, child.left.slot) for child in children if id(child) in dead
+        )
+        return [
+            child for child in children
+            if id(child) not in dead and not (
+                isinstance(child, VarDeclaration) and
+                (child.var_node.depth, child.var_node.slot) in dead_addresses
+            )
+        ]
+
+    def definition(self, node):
+        """ The assignment node is, if it can define a constant """
+        if isinstance(node, Expression) and len(node.children) == 1:
+            node = node.children[0]
+        if (
+            isinstance(node, Assign) and node.op.type == ASSIGN and
+            isinstance(node.left, Var) and
+            (self.globals_known or node.left.depth != GLOBAL) and
+            self.writes.get((node.left.depth, node.left.slot)) == 1
+        ):
+            return node
+        return None
+
+    def statements(self, children, definitions=None, function=False):
+        """ Visit statements in order, leaving out those that do nothing
+
+        definitions: list the top-level assignments that define constants
+        are added to. function: whether they are the children of a function
+        body, where the interpreter stops at the first return.
+        """
+        result = []
+        for child in children:
+            assign = None if definitions is None else self.definition(child)
+            child = self.statement(child)
+            if isinstance(child, NoOp):
+                continue
+            result.append(child)
+            if assign is not None and isinstance(assign.right, Constant):
+                self.constants[assign.left.depth, assign.left.slot] = self.coerce(
+                    assign.right, assign.coerce
+                ).number
+                definitions.append(assign)
+            if function and isinstance(child, ReturnStmt):
+                break
+        return result
+
+    def statement(self, node):
+        """ Visit a statement; one that computes a constant is a NoOp """
+        result = self.visit(node)
+        if isinstance(result, Constant):
+            return located(NoOp, result)
+        return result
+
+    def visit_Num(self, node):
+        return self.evaluate(node)
+
+    def visit_Var(self, node):
+        number = self.constants.get((node.depth, node.slot))
+        if number is None:
+            return node
+        return located(Constant, node, number)
+
+    def visit_BinaryOperator(self, node):
+        node.left = self.visit(node.left)
+        node.right = self.visit(node.right)
+        if not isinstance(node.left, Constant):
+            return node
+        if isinstance(node.right, Constant):
+            return self.evaluate(node)
+        # the right operand is not evaluated
+        left = node.left.number
+        if node.op.type == LOG_AND_OP and not left or node.op.type == LOG_OR_OP and left:
+            return self.evaluate(node)
+        return node
+
+    def visit_UnaryOperator(self, node):
+        if node.op.type in WRITING_OPERATORS:
+            return node
+        node.expr = self.visit(node.expr)
+        if isinstance(node.expr, Constant):
+            return self.evaluate(node)
+        return node
+
+    def visit_TernaryOperator(self, node):
+        node.condition = self.visit(node.condition)
+        if isinstance(node.condition, Constant):
+            if node.condition.number:
+                return self.visit(node.texpression)
+            fexpression = self.visit(node.fexpression)
+            if node.coerce is None:
+                return fexpression
+            if isinstance(fexpression, Constant):
+                return self.coerce(fexpression, node.coerce)
+            node.fexpression = fexpression
+            return node
+        node.texpression = self.visit(node.texpression)
+        node.fexpression = self.visit(node.fexpression)
+        return node
+
+    def visit_Assign(self, node):
+        node.right = self.visit(node.right)
+        return node
+
+    def visit_Expression(self, node):
+        children = [self.visit(child) for child in node.children]
+        # constants before the last child have no effect
+        children = [child for child in children[:-1] if not isinstance(child, Constant)] + children[-1:]
+        if len(children) == 1:
+            return children[0]
+        node.children = children
+        return node
+
+    def visit_IfStatement(self, node):
+        node.condition = self.visit(node.condition)
+        if isinstance(node.condition, Constant):
+            branch = self.statement(node.tbody if node.condition.number else node.fbody)
+            if isinstance(branch, ReturnStmt):
+                # a return in a branch does not end the function
+                return located(CompoundStatement, branch, [branch])
+            return branch
+        node.tbody = self.statement(node.tbody)
+        node.fbody = self.statement(node.fbody)
+        return node
+
+    def visit_WhileStatement(self, node):
+        node.condition = self.visit(node.condition)
+        if isinstance(node.condition, Constant) and not node.condition.number:
+            return located(NoOp, node)
+        node.body = self.statement(node.body)
+        return node
+
+    def visit_ForStatement(self, node):
+        node.setup = self.statement(node.setup)
+        node.condition = self.visit(node.condition)
+        if isinstance(node.condition, Constant) and not node.condition.number:
+            return node.setup
+        node.increment = self.statement(node.increment)
+        node.body = self.statement(node.body)
+        return node
+
+    def visit_CompoundStatement(self, node):
+        node.children = self.statements(node.children)
+        if not node.children:
+            return located(NoOp, node)
+        return node
+
+    def visit_ReturnStmt(self, node):
+        node.expression = self.visit(node.expression)
+        return node
+
+    def visit_VarDeclaration(self, node):
+        return node
+
+    def visit_NoOp(self, node):
+        return node
+
+    def visit_String(self, node):
+        return node
+
+    def visit_Constant(self, node):
+        return node
@@ -0,0 +1,188 @@
+from ..lexer_analyzer.lexer import OPERATORS, RESERVED_KEYWORDS
+from ..semantic_analyzer.effects import calls
+from ..semantic_analyzer.mem import GLOBAL, LOCAL
+from ..syntax_analyzer.syntax_tree import *
+from .transformer import NodeTransformer, clone, size, walk
+from .folding import located, writes
+
+# statements an inlined body may have before its return
+STRAIGHT_STATEMENTS = (VarDeclaration, Expression, Assign, NoOp)
+# arguments whose value cannot change
+CONSTANT_ARGUMENTS = (Num, Constant)
+
+
+def recursive(declarations):
+    """ Names of the functions that can call themselves, directly or not """
+    callees = dict(
+        (name, calls(node.body) & set(declarations)) for name, node in declarations.items()
+    )
+    result = set()
+    for name in declarations:
+        seen, pending = set(), list(callees[name])
+        while pending:
+            callee = pending.pop()
+            if callee == name:
+                result.add(name)
+                break
+            if callee not in seen:
+                seen.add(callee)
+                pending.extend(callees[callee])
+    return result
+
+
+def straight(declaration):
+    """ Whether a body is declarations and expression statements ended by a
+    return, or by nothing in a void function """
+    for child in declaration.body.children:
+        if isinstance(child, ReturnStmt):
+            return True
+        if not isinstance(child, STRAIGHT_STATEMENTS):
+            return False
+    return declaration.type_node.value == 'void'
+
+
+class Relocate(NodeTransformer):
+    """ Moves the locals of an inlined body to the slots given to them and
+    replaces params by the arguments read in their place """
+
+    def __init__(self, depth, base, arguments):
+        self.depth = depth
+        self.base = base
+        # slot of a param -> node read in its place
+        self.arguments = arguments
+
+    def visit_Var(self, node):
+        if node.depth != LOCAL:
+            return node
+        argument = self.arguments.get(node.slot)
+        if argument is not None:
+            return clone(argument)
+        node.depth, node.slot = self.depth, self.base + node.slot
+        return node
+
+
+class Inliner(NodeTransformer):
+    """ Replaces calls to small functions by their bodies
+
+    A function is inlined when it cannot call itself, its body has at most
+    max_size nodes, and it is declarations and expression statements ended
+    by a return (or by nothing, in a void function).
+
+    A call becomes an expression that assigns the arguments to the params
+    and then evaluates the statements and the returned value in turn. The
+    params and locals get slots of their own in the frame of the caller, or
+    in the global segment, so they cannot clash with its variables. A
+    literal argument, or a local of the caller when every argument is a
+    literal or a variable, is read in place of a param the body never
+    writes. The inlined nodes keep the lines they have in the
+    function, and inlining into a caller stops once it grew by budget nodes.
+
+    With a profile of training runs, calls that never ran are left alone,
+    so the budget goes to those that did, and a hot call inlines bodies of
+    up to hot_size nodes.
+    """
+
+    def __init__(self, max_size=40, budget=400, profile=None, hot_size=160):
+        self.max_size = max_size
+        self.budget = budget
+        self.profile = profile
+        self.hot_size = hot_size if profile is not None else max_size
+        # name -> (declaration, size) of the functions that can be inlined,
+        # as they were before any call was inlined into them
+        self.inlinable = {}
+        # depth of the caller's variables and the number of its slots
+        self.depth = self.frame_size = None
+        self.grown = 0
+        self.inlined = 0
+
+    @staticmethod
+    def optimize(tree, max_size=40, budget=400, profile=None):
+        """ Inline calls in an analyzed program in place and return how many
+        calls were inlined; profile: a Profile of training runs """
+        inliner = Inliner(max_size, budget, profile)
+        inliner.visit(tree)
+        return inliner.inlined
+
+    def visit_Program(self, node):
+        declarations = dict(
+            (child.func_name, child) for child in node.children
+            if isinstance(child, FunctionDeclaration) and isinstance(child.body, FunctionBody)
+        )
+        excluded = recursive(declarations)
+        for name, declaration in declarations.items():
+            body_size = size(declaration.body)
+            if name not in excluded and body_size <= self.hot_size and straight(declaration):
+                self.inlinable[name] = clone(declaration), body_size
+
+        self.depth, self.frame_size, self.grown = GLOBAL, node.global_size, 0
+        node.children = [
+            child if isinstance(child, (FunctionDeclaration, IncludeLibrary)) else self.visit(child)
+            for child in node.children
+        ]
+        node.global_size = self.frame_size
+
+        for declaration in declarations.values():
+            self.depth, self.frame_size, self.grown = LOCAL, declaration.frame_size, 0
+            declaration.body = self.visit(declaration.body)
+            declaration.frame_size = self.frame_size
+        return node
+
+    def visit_FunctionCall(self, node):
+        inlinable = self.inlinable.get(node.name)
+        if inlinable is None or self.grown + inlinable[1] > self.budget or inlinable[1] > self.limit(node):
+            return self.generic_visit(node)
+        declaration, body_size = inlinable
+        self.grown += body_size
+        self.inlined += 1
+        # calls in the body are inlined in turn
+        return self.visit(self.expand(node, declaration))
+
+    def limit(self, node):
+        """ Size of the largest body a call may inline """
+        if self.profile is None:
+            return self.max_size
+        if not self.profile.count(node):
+            return -1
+        return self.hot_size if self.profile.hot(node) else self.max_size
+
+    def expand(self, node, declaration):
+        """ Expression evaluating the body of declaration for the call node """
+        base = self.frame_size
+        self.frame_size += declaration.frame_size
+        body = clone(declaration.body)
+        written = writes(walk(body))
+        # with no other side effects among the arguments, a local of the
+        # caller keeps its value until the body reads it
+        simple = all(isinstance(arg, CONSTANT_ARGUMENTS + (Var,)) for arg in node.args)
+
+        children, arguments = [], {}
+        for index, (param, arg) in enumerate(zip(declaration.params, node.args)):
+            slot = param.var_node.slot
+            coerce = node.coerce[index] if node.coerce is not None else None
+            if coerce is None and (LOCAL, slot) not in written and (
+                isinstance(arg, CONSTANT_ARGUMENTS) or
+                simple and isinstance(arg, Var) and arg.depth == LOCAL == self.depth
+            ):
+                arguments[slot] = arg
+                continue
+            var = clone(param.var_node)
+            var.depth, var.slot = self.depth, base + slot
+            assign = located(Assign, node, var, OPERATORS['='], arg)
+            assign.coerce = coerce
+            children.append(assign)
+
+        body = Relocate(self.depth, base, arguments).visit(body)
+        for child in body.children:
+            if isinstance(child, ReturnStmt):
+                value = child.expression
+                if child.coerce is not None:
+                    value = located(UnaryOperator, value, RESERVED_KEYWORDS[child.coerce], value)
+                if not isinstance(value, NoOp):
+                    children.append(value)
+                break
+            if not isinstance(child, (VarDeclaration, NoOp)):
+                children.append(child)
+
+        if len(children) == 1:
+            return children[0]
+        return located(Expression, node, children)
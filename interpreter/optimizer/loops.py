@@ -0,0 +1,410 @@
+from ..lexer_analyzer.lexer import OPERATORS
+from ..lexer_analyzer.token import Token
+from ..lexer_analyzer.token_type import (
+    ID, ADD_OP, SUB_OP, MUL_OP, DIV_OP, MOD_OP, AND_OP, OR_OP, XOR_OP,
+    LT_OP, GT_OP, LE_OP, GE_OP, NE_OP, EQ_OP, LOG_AND_OP, LOG_OR_OP,
+    INC_OP, DEC_OP, ADD_ASSIGN, SUB_ASSIGN, ASSIGN,
+)
+from ..semantic_analyzer.mem import GLOBAL, LOCAL
+from ..syntax_analyzer.syntax_tree import *
+from .transformer import NodeTransformer, clone, size, walk
+from .assignment import DefiniteAssignment, assigned
+from .folding import located, writes, WRITING_OPERATORS
+
+# binary operators that cannot raise on operands of the types the analyzer allows
+SAFE_OPERATORS = frozenset((
+    ADD_OP, SUB_OP, MUL_OP, AND_OP, OR_OP, XOR_OP,
+    LT_OP, GT_OP, LE_OP, GE_OP, EQ_OP, NE_OP, LOG_AND_OP, LOG_OR_OP,
+))
+COMPARISONS = {
+    LT_OP: lambda left, right: left < right,
+    GT_OP: lambda left, right: left > right,
+    LE_OP: lambda left, right: left <= right,
+    GE_OP: lambda left, right: left >= right,
+    NE_OP: lambda left, right: left != right,
+}
+INT_TYPES = ('char', 'int')
+
+
+def single(node):
+    """ The only child of an Expression, or node itself """
+    if isinstance(node, Expression) and len(node.children) == 1:
+        return node.children[0]
+    return node
+
+
+def int_constant(node):
+    """ Value of an int or char Constant, or None """
+    if isinstance(node, Constant) and node.number.type in INT_TYPES:
+        return node.number.value
+    return None
+
+
+def address(node):
+    """ (depth, slot) of a local Var, or None """
+    if isinstance(node, Var) and node.depth == LOCAL:
+        return node.depth, node.slot
+    return None
+
+
+def step(node):
+    """ (address, amount) of a statement that adds a constant int to a local """
+    node = single(node)
+    if isinstance(node, UnaryOperator) and node.op.type in (INC_OP, DEC_OP):
+        target = address(node.expr)
+        if target is not None:
+            return target, 1 if node.op.type == INC_OP else -1
+    elif isinstance(node, Assign) and node.op.type in (ADD_ASSIGN, SUB_ASSIGN):
+        target, amount = address(node.left), int_constant(node.right)
+        if target is not None and amount is not None:
+            return target, amount if node.op.type == ADD_ASSIGN else -amount
+    return None
+
+
+def literal(node):
+    """ Value of a Constant or Num, 0 for other nodes """
+    if isinstance(node, Constant):
+        return node.number.value
+    if isinstance(node, Num):
+        return node.value
+    return 0
+
+
+def invariant(node, written=frozenset(), calls=False, assigned=None):
+    """ Whether an expression cannot raise and only reads variables that
+    are not in written, nor globals when calls, and are in assigned when
+    it is given """
+    if isinstance(node, (Constant, Num)):
+        return True
+    if isinstance(node, Var):
+        target = node.depth, node.slot
+        return (
+            (assigned is None or target in assigned) and target not in written and
+            not (calls and node.depth == GLOBAL)
+        )
+    if isinstance(node, BinaryOperator):
+        op = node.op.type
+        if op not in SAFE_OPERATORS:
+            divisor = literal(node.right)
+            if not divisor or op not in (DIV_OP, MOD_OP) or op == MOD_OP and node.ctype not in INT_TYPES:
+                return False
+        return (
+            invariant(node.left, written, calls, assigned) and
+            invariant(node.right, written, calls, assigned)
+        )
+    if isinstance(node, UnaryOperator):
+        return (
+            node.prefix and node.op.type not in WRITING_OPERATORS and
+            invariant(node.expr, written, calls, assigned)
+        )
+    return False
+
+
+class Substitute(NodeTransformer):
+    """ Replaces the reads of a local by a constant """
+
+    def __init__(self, target, number):
+        self.target = target
+        self.number = number
+
+    def visit_Var(self, node):
+        if address(node) == self.target:
+            return located(Constant, node, self.number)
+        return node
+
+
+def product(node, steps):
+    """ (address, factor) of a multiplication of an induction variable by a
+    constant int, or None """
+    if not isinstance(node, BinaryOperator) or node.op.type != MUL_OP or node.ctype != 'int':
+        return None
+    for var, factor in ((node.left, node.right), (node.right, node.left)):
+        target, factor = address(var), int_constant(factor)
+        if target in steps and factor is not None:
+            return target, factor
+    return None
+
+
+class Reduce(NodeTransformer):
+    """ Replaces multiplications of induction variables by constant ints
+    with the temporaries that hold them """
+
+    def __init__(self, optimizer, steps, keys):
+        self.optimizer = optimizer
+        # address -> amount of the induction variables
+        self.steps = steps
+        # (address, factor) of the products to replace
+        self.keys = keys
+        # (address, factor) -> (temporary, multiplication)
+        self.products = {}
+
+    def visit_BinaryOperator(self, node):
+        node = self.generic_visit(node)
+        key = product(node, self.steps)
+        if key is None or key not in self.keys:
+            return node
+        if key not in self.products:
+            self.products[key] = self.optimizer.temporary(node), clone(node)
+        return clone(self.products[key][0])
+
+
+class LoopOptimizer(DefiniteAssignment):
+    """ Loop-invariant code motion, strength reduction and unrolling
+
+    The loops of each function are optimized innermost first.
+
+    A for loop that steps a local by a constant from a constant while
+    comparing it to a constant, and whose body does not write it, is
+    unrolled when it runs at most max_trips times and the copies of its
+    body add up to at most budget nodes. Each copy reads the value the
+    local has in that iteration, and the local is assigned its final value
+    after them. With a profile, a loop whose body is hot may run up to
+    hot_trips times and grow by hot_budget nodes, and one that never ran
+    is not unrolled.
+
+    In other loops, the largest subexpressions that only read variables
+    the loop does not write and that are definitely assigned before it,
+    and whose operators cannot raise, are evaluated once into temporaries
+    before the loop; when the loop calls a user function, globals count as
+    written. A local that the loop only writes by adding a constant, as a
+    statement run once per iteration, is an induction variable: its
+    products with a constant int that appear more than once are kept in
+    temporaries that are set before the loop and updated by an addition
+    right after each step, when it is assigned before the loop.
+
+    Temporaries get new slots in the frame of the function.
+    """
+
+    def __init__(self, max_trips=16, budget=200, profile=None, hot_trips=64, hot_budget=800):
+        DefiniteAssignment.__init__(self)
+        self.max_trips = max_trips
+        self.budget = budget
+        self.profile = profile
+        self.hot_trips = hot_trips
+        self.hot_budget = hot_budget
+        self.functions = set()
+        self.frame_size = None
+        self.hoisted = self.reduced = self.unrolled = 0
+
+    @staticmethod
+    def optimize(tree, max_trips=16, budget=200, profile=None):
+        """ Optimize the loops of an analyzed program in place and return
+        how many expressions were hoisted, multiplications reduced and
+        loops unrolled; profile: a Profile of training runs """
+        optimizer = LoopOptimizer(max_trips, budget, profile)
+        optimizer.visit(tree)
+        return optimizer.hoisted, optimizer.reduced, optimizer.unrolled
+
+    def number(self, ttype, value):
+        # imported here since the interpreter imports this module
+        from ..interpreter.number import Number
+        return Number(ttype, value)
+
+    def addition(self, var, amount, node):
+        """ var + amount, for int values, at the location of node """
+        from ..interpreter.number import Operation
+        result = located(BinaryOperator, node, clone(var), OPERATORS['+'], located(
+            Constant, node, self.number('int', amount)
+        ))
+        result.ctype = 'int'
+        result.operation = Operation.select(ADD_OP, 'int')
+        return result
+
+    def visit_Program(self, node):
+        self.functions = set(
+            child.func_name for child in node.children
+            if isinstance(child, FunctionDeclaration) and isinstance(child.body, FunctionBody)
+        )
+        return DefiniteAssignment.visit_Program(self, node)
+
+    def visit_FunctionDeclaration(self, node):
+        if not isinstance(node.body, FunctionBody):
+            return node
+        self.frame_size = node.frame_size
+        node = DefiniteAssignment.visit_FunctionDeclaration(self, node)
+        node.frame_size = self.frame_size
+        return node
+
+    def temporary(self, node):
+        """ Var of a new slot of the frame, at the location of node """
+        var = located(Var, node, Token(ID, 'tmp{}'.format(self.frame_size)))
+        var.depth, var.slot = LOCAL, self.frame_size
+        self.frame_size += 1
+        return var
+
+    def assign(self, var, value):
+        return located(Assign, value, clone(var), OPERATORS['='], value)
+
+    def visit_ForStatement(self, node):
+        node.body = self.visit(node.body)
+        unrolled = self.unroll(node)
+        if unrolled is not None:
+            return unrolled
+        before = self.hoist(node, ('condition', 'increment', 'body'))
+        before += self.reduce(node)
+        if before:
+            return located(CompoundStatement, node, before + [node])
+        return node
+
+    def visit_WhileStatement(self, node):
+        node.body = self.visit(node.body)
+        before = self.hoist(node, ('condition', 'body'))
+        before += self.reduce(node)
+        if before:
+            return located(CompoundStatement, node, before + [node])
+        return node
+
+    def visit_DoWhileStatement(self, node):
+        node.body = self.visit(node.body)
+        return node
+
+    def unroll(self, node):
+        """ Statements doing what the for loop node does without looping, or None """
+        setup, condition = single(node.setup), single(node.condition)
+        if not (isinstance(setup, Assign) and setup.op.type == ASSIGN):
+            return None
+        target, first = address(setup.left), int_constant(setup.right)
+        increment = step(node.increment)
+        if target is None or first is None or increment is None or increment[0] != target:
+            return None
+        if not (
+            isinstance(condition, BinaryOperator) and condition.op.type in COMPARISONS and
+            address(condition.left) == target and int_constant(condition.right) is not None
+        ):
+            return None
+        max_trips, budget = self.max_trips, self.budget
+        if self.profile is not None:
+            if not self.profile.count(node):
+                return None
+            if self.profile.hot(node.body):
+                max_trips, budget = self.hot_trips, self.hot_budget
+        nodes = walk(node.body)
+        if target in writes(nodes) or any(
+            isinstance(item, (BreakStatement, ContinueStatement)) for item in nodes
+        ):
+            return None
+
+        # the type the local keeps, and the values it takes
+        ttype = setup.coerce or setup.right.number.type
+        compare, bound = COMPARISONS[condition.op.type], int_constant(condition.right)
+        values, value = [], first
+        while compare(value, bound):
+            if len(values) == max_trips:
+                return None
+            values.append(value)
+            value += increment[1]
+        if len(values) * size(node.body) > budget:
+            return None
+
+        children = [
+            Substitute(target, self.number(ttype, value)).visit(clone(node.body))
+            for value in values
+        ]
+        children.append(self.assign(setup.left, located(Constant, setup, self.number(ttype, value))))
+        self.unrolled += 1
+        return located(CompoundStatement, node, children)
+
+    def variant(self, node, fields):
+        """ Addresses the parts of a loop write or declare, and whether they
+        call a user function """
+        nodes = []
+        for field in fields:
+            nodes.extend(walk(getattr(node, field)))
+        written = set(writes(nodes))
+        written.update(
+            (item.var_node.depth, item.var_node.slot) for item in nodes if isinstance(item, VarDeclaration)
+        )
+        calls = any(isinstance(item, FunctionCall) and item.name in self.functions for item in nodes)
+        return written, calls
+
+    def invariant(self, node, written, calls):
+        return invariant(node, written, calls, self.assigned)
+
+    def hoist(self, node, fields):
+        """ Assignments of the invariant subexpressions of the fields of a
+        loop to the temporaries that replace them """
+        written, calls = self.variant(node, ('setup',) + fields if isinstance(node, ForStatement) else fields)
+        assigns = []
+
+        def replace(item):
+            if isinstance(item, (BinaryOperator, UnaryOperator)) and self.invariant(item, written, calls):
+                var = self.temporary(item)
+                assigns.append(self.assign(var, item))
+                return var
+            for field in item._fields:
+                value = getattr(item, field)
+                if isinstance(value, Node):
+                    setattr(item, field, replace(value))
+                elif isinstance(value, list):
+                    setattr(item, field, [
+                        replace(child) if isinstance(child, Node) else child for child in value
+                    ])
+            return item
+
+        for field in fields:
+            setattr(node, field, replace(getattr(node, field)))
+        self.hoisted += len(assigns)
+        return assigns
+
+    def reduce(self, node):
+        """ Strength-reduce the products of the induction variables of a loop;
+        returns the assignments to run before it """
+        fields = ('condition', 'increment', 'body') if isinstance(node, ForStatement) else ('condition', 'body')
+        counts = {}
+        for field in fields:
+            for target, count in writes(walk(getattr(node, field))).items():
+                counts[target] = counts.get(target, 0) + count
+
+        # statements run once per iteration, by where they are
+        statements = []
+        if isinstance(node, ForStatement):
+            statements.append(('increment', node.increment))
+        body = node.body.children if isinstance(node.body, CompoundStatement) else [node.body]
+        statements.extend(('body', child) for child in body)
+        steps, places = {}, {}
+        for place, statement in statements:
+            found = step(statement)
+            if found is not None and counts.get(found[0]) == 1:
+                steps[found[0]] = found[1]
+                places[found[0]] = place, statement
+
+        # a multiplication costs the interpreter as much as the addition
+        # that updates its temporary, so only repeated products pay off
+        uses = {}
+        for field in fields:
+            for item in walk(getattr(node, field)):
+                key = product(item, steps)
+                if key is not None:
+                    uses[key] = uses.get(key, 0) + 1
+        # the products are computed before the loop, after a for loop's setup
+        available = self.assigned | assigned(node.setup) if isinstance(node, ForStatement) else self.assigned
+        keys = set(key for key, count in uses.items() if count > 1 and key[0] in available)
+        if not keys:
+            return []
+        reduce = Reduce(self, steps, keys)
+        for field in fields:
+            setattr(node, field, reduce.visit(getattr(node, field)))
+        if not reduce.products:
+            return []
+
+        before, after = [], {}
+        for (target, factor), (var, multiplication) in reduce.products.items():
+            before.append(self.assign(var, multiplication))
+            addition = self.addition(var, factor * steps[target], multiplication)
+            after.setdefault(target, []).append(self.assign(var, addition))
+        self.reduced += len(reduce.products)
+
+        for target, updates in after.items():
+            place, statement = places[target]
+            if place == 'increment':
+                node.increment = located(Expression, statement, [statement] + updates)
+            elif isinstance(node.body, CompoundStatement):
+                index = next(i for i, child in enumerate(node.body.children) if child is statement)
+                node.body.children[index + 1:index + 1] = updates
+            else:
+                node.body = located(CompoundStatement, statement, [statement] + updates)
+
+        if isinstance(node, ForStatement):
+            node.setup = located(Expression, node.setup, [node.setup] + before)
+            return []
+        return before
@@ -0,0 +1,61 @@
+from ..syntax_analyzer.syntax_tree import Node, NodeVisitor
+
+
+def walk(node):
+    """ node and every node below it, parents before their children """
+    result = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        result.append(node)
+        children = []
+        for field in node._fields:
+            value = getattr(node, field)
+            if isinstance(value, Node):
+                children.append(value)
+            elif isinstance(value, list):
+                children.extend(item for item in value if isinstance(item, Node))
+        stack.extend(reversed(children))
+    return result
+
+
+def clone(node):
+    """ Copy of a tree; the values of fields that hold no nodes are shared """
+    node_class = type(node)
+    result = node_class.__new__(node_class)
+    result.line, result.column = node.line, node.column
+    result.start, result.end = node.start, node.end
+    for field in node_class._fields:
+        value = getattr(node, field)
+        if isinstance(value, Node):
+            value = clone(value)
+        elif isinstance(value, list):
+            value = [clone(item) if isinstance(item, Node) else item for item in value]
+        setattr(result, field, value)
+    return result
+
+
+def size(node):
+    """ Number of nodes in a tree """
+    return len(walk(node))
+
+
+class NodeTransformer(NodeVisitor):
+    """ Visitor that rewrites a tree in place
+
+    A visit_ method returns the node that takes the place of the one it was
+    given; generic_visit replaces the children of a node by the result of
+    visiting them and returns the node itself.
+    """
+
+    def generic_visit(self, node):
+        for field in node._fields:
+            value = getattr(node, field)
+            if isinstance(value, Node):
+                setattr(node, field, self.visit(value))
+            elif isinstance(value, list):
+                setattr(node, field, [
+                    self.visit(item) if isinstance(item, Node) else item
+                    for item in value
+                ])
+        return node
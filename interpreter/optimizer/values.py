@@ -0,0 +1,233 @@
+from ..lexer_analyzer.lexer import OPERATORS
+from ..lexer_analyzer.token import Token
+from ..lexer_analyzer.token_type import ID, LOG_AND_OP, LOG_OR_OP
+from ..semantic_analyzer.mem import GLOBAL, LOCAL
+from ..syntax_analyzer.syntax_tree import *
+from .transformer import NodeTransformer, walk
+from .folding import located, WRITING_OPERATORS
+
+
+def key(node):
+    """ Hashable form of a pure expression, equal for expressions that
+    evaluate to the same value while their variables keep theirs; None for
+    expressions with side effects """
+    if isinstance(node, Constant):
+        return 'constant', node.number.type, node.number.value
+    if isinstance(node, Num):
+        return 'num', node.type, node.value
+    if isinstance(node, Var):
+        return 'var', node.depth, node.slot
+    if isinstance(node, BinaryOperator):
+        left, right = key(node.left), key(node.right)
+        if left is None or right is None:
+            return None
+        return 'binary', node.op.type, left, right
+    if isinstance(node, UnaryOperator) and node.prefix and node.op.type not in WRITING_OPERATORS:
+        expr = key(node.expr)
+        if expr is None:
+            return None
+        return 'unary', node.op.type, node.op.value, expr
+    return None
+
+
+def addresses(node):
+    """ Addresses of the variables an expression reads """
+    return frozenset((item.depth, item.slot) for item in walk(node) if isinstance(item, Var))
+
+
+class Rewrite(NodeTransformer):
+    """ Stores the first computation of each repeated value in its
+    temporary and replaces the others by reads of it """
+
+    def __init__(self, firsts, reuses):
+        # id of a node -> slot of its temporary
+        self.firsts = firsts
+        self.reuses = reuses
+
+    def visit(self, node):
+        slot = self.reuses.get(id(node))
+        if slot is not None:
+            return self.temporary(node, slot)
+        node = self.generic_visit(node)
+        slot = self.firsts.get(id(node))
+        if slot is not None:
+            return located(Assign, node, self.temporary(node, slot), OPERATORS['='], node)
+        return node
+
+    def temporary(self, node, slot):
+        var = located(Var, node, Token(ID, 'tmp{}'.format(slot)))
+        var.depth, var.slot = LOCAL, slot
+        return var
+
+
+class ValueNumbering(object):
+    """ Common subexpression elimination by value numbering
+
+    The statements of each function body are walked in the order the
+    interpreter evaluates them. A pure operator expression gets a value
+    number, held while the variables it reads keep their values: an
+    assignment, ++ or --, a declaration or taking the address of a
+    variable ends the values that read it, and a call to a user function
+    those that read globals. An expression that evaluates to a value
+    already computed on every path to it is replaced by a read of a
+    temporary, which the first computation stores.
+
+    Code that runs conditionally (if and ternary branches, the right
+    operand of && and ||, loops) can use the values computed before it,
+    but those it computes are forgotten after it, and a loop first ends the
+    values of every variable it writes since they change between
+    iterations.
+    """
+
+    def __init__(self):
+        self.functions = set()
+        # key -> value number of the values available at this point, and
+        # key -> addresses its expression reads
+        self.available = {}
+        self.reads = {}
+        # value number -> node that computes it, and nodes that reuse it
+        self.firsts = {}
+        self.reuses = {}
+        self.eliminated = 0
+
+    @staticmethod
+    def optimize(tree):
+        """ Eliminate repeated expressions in an analyzed program in place
+        and return how many were replaced """
+        numbering = ValueNumbering()
+        numbering.program(tree)
+        return numbering.eliminated
+
+    def program(self, tree):
+        declarations = [
+            child for child in tree.children
+            if isinstance(child, FunctionDeclaration) and isinstance(child.body, FunctionBody)
+        ]
+        self.functions = set(declaration.func_name for declaration in declarations)
+        for declaration in declarations:
+            self.available, self.reads, self.firsts, self.reuses = {}, {}, {}, {}
+            self.statement(declaration.body)
+
+            firsts, reuses = {}, {}
+            frame_size = declaration.frame_size
+            for number, nodes in self.reuses.items():
+                firsts[id(self.firsts[number])] = frame_size
+                for node in nodes:
+                    reuses[id(node)] = frame_size
+                frame_size += 1
+                self.eliminated += len(nodes)
+            declaration.body = Rewrite(firsts, reuses).visit(declaration.body)
+            declaration.frame_size = frame_size
+
+    def kill(self, address):
+        """ Forget the values that read a variable """
+        for expression in [expression for expression, read in self.reads.items() if address in read]:
+            del self.available[expression]
+            del self.reads[expression]
+
+    def kill_globals(self):
+        for expression in [
+            expression for expression, read in self.reads.items()
+            if any(depth == GLOBAL for depth, _ in read)
+        ]:
+            del self.available[expression]
+            del self.reads[expression]
+
+    def kill_all(self, *nodes):
+        """ Forget the values of the variables nodes may write """
+        for node in nodes:
+            for item in walk(node):
+                if isinstance(item, Assign):
+                    self.kill((item.left.depth, item.left.slot))
+                elif isinstance(item, UnaryOperator) and item.op.type in WRITING_OPERATORS:
+                    self.kill((item.expr.depth, item.expr.slot))
+                elif isinstance(item, VarDeclaration):
+                    self.kill((item.var_node.depth, item.var_node.slot))
+                elif isinstance(item, FunctionCall) and item.name in self.functions:
+                    self.kill_globals()
+
+    def conditional(self, method, node):
+        """ Visit code that may not run, keeping the values available before it """
+        available, reads = dict(self.available), dict(self.reads)
+        method(node)
+        self.available, self.reads = available, reads
+        self.kill_all(node)
+
+    def statement(self, node):
+        if isinstance(node, (FunctionBody, CompoundStatement)):
+            for child in node.children:
+                self.statement(child)
+        elif isinstance(node, VarDeclaration):
+            self.kill((node.var_node.depth, node.var_node.slot))
+        elif isinstance(node, IfStatement):
+            self.expression(node.condition)
+            self.conditional(self.statement, node.tbody)
+            if node.fbody is not None:
+                self.conditional(self.statement, node.fbody)
+        elif isinstance(node, ForStatement):
+            self.expression(node.setup)
+            self.kill_all(node.condition, node.body, node.increment)
+            self.conditional(self.loop, node)
+        elif isinstance(node, WhileStatement):
+            self.kill_all(node.condition, node.body)
+            self.conditional(self.loop, node)
+        elif isinstance(node, ReturnStmt):
+            self.expression(node.expression)
+        elif not isinstance(node, (NoOp, BreakStatement, ContinueStatement)):
+            self.expression(node)
+
+    def loop(self, node):
+        if isinstance(node, DoWhileStatement):
+            self.statement(node.body)
+            self.expression(node.condition)
+            return
+        self.expression(node.condition)
+        self.statement(node.body)
+        if isinstance(node, ForStatement):
+            self.expression(node.increment)
+
+    def expression(self, node):
+        if isinstance(node, (BinaryOperator, UnaryOperator)):
+            expression = key(node)
+            if expression is not None:
+                number = self.available.get(expression)
+                if number is not None:
+                    self.reuses.setdefault(number, []).append(node)
+                    return
+        else:
+            expression = None
+
+        if isinstance(node, BinaryOperator):
+            self.expression(node.left)
+            if node.op.type in (LOG_AND_OP, LOG_OR_OP):
+                self.conditional(self.expression, node.right)
+            else:
+                self.expression(node.right)
+        elif isinstance(node, UnaryOperator):
+            if node.op.type in WRITING_OPERATORS:
+                self.kill((node.expr.depth, node.expr.slot))
+            else:
+                self.expression(node.expr)
+        elif isinstance(node, Assign):
+            self.expression(node.right)
+            self.kill((node.left.depth, node.left.slot))
+        elif isinstance(node, FunctionCall):
+            for arg in node.args:
+                self.expression(arg)
+            if node.name in self.functions:
+                self.kill_globals()
+            # builtins write through the addresses they are given
+            self.kill_all(*node.args)
+        elif isinstance(node, TernaryOperator):
+            self.expression(node.condition)
+            self.conditional(self.expression, node.texpression)
+            self.conditional(self.expression, node.fexpression)
+        elif isinstance(node, Expression):
+            for child in node.children:
+                self.expression(child)
+
+        if expression is not None:
+            number = len(self.firsts)
+            self.firsts[number] = node
+            self.available[expression] = number
+            self.reads[expression] = addresses(node)
@@ -1,2 +1,4 @@
 from . import mem
-from . import analyzer
\ No newline at end of file
+from . import analyzer
+from . import effects
+from . import incremental
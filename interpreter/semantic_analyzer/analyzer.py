@@ -1,7 +1,38 @@
-from ..syntax_analyzer.syntax_tree import NodeVisitor, Type
-from ..syntax_analyzer.parser import INTEGER_CONST, CHAR_CONST, AND_OP, OR_OP, XOR_OP
+from ..syntax_analyzer.syntax_tree import NodeVisitor, LazyFunctionBody
+from ..syntax_analyzer.parser import Parser, INTEGER_CONST, CHAR_CONST, AND_OP, OR_OP, XOR_OP
+from ..lexer_analyzer.token_type import (
+    LT_OP, GT_OP, LE_OP, GE_OP, EQ_OP, NE_OP, LOG_AND_OP, LOG_OR_OP, LOG_NEG,
+    CHAR, INT, FLOAT, DOUBLE,
+)
 from .mem import *
-from ..utils.utils import get_functions, get_name, MessageColor
+from ..interpreter.number import Operation
+from ..utils.utils import get_name, MessageColor
+from ..utils.registry import library
+
+# binary operators whose result is an int whatever their operands are
+INT_RESULT_OPERATORS = frozenset((
+    LT_OP, GT_OP, LE_OP, GE_OP, EQ_OP, NE_OP, LOG_AND_OP, LOG_OR_OP,
+))
+
+_library_symbols = {}
+
+
+def library_symbols(name):
+    """ FunctionSymbols of the builtins of a library, built once per process """
+    symbols = _library_symbols.get(name)
+    if symbols is None:
+        symbols = _library_symbols[name] = []
+        for func in library(name).values():
+            func_symbol = FunctionSymbol(func.__name__, type=BuiltinTypeSymbol(func.return_type))
+            if func.arg_types is None:
+                func_symbol.params = None
+            else:
+                for i, param_type in enumerate(func.arg_types):
+                    var_symbol = VarSymbol('param{:02d}'.format(i + 1), BuiltinTypeSymbol(param_type))
+                    func_symbol.params.append(var_symbol)
+            symbols.append(func_symbol)
+    return symbols
+
 
 class SemanticError(Exception):
     pass
@@ -29,6 +60,14 @@ class SemanticAnalyzer(NodeVisitor):
         def __eq__(self, other):
             return SemanticAnalyzer.CType.types[self.type] == SemanticAnalyzer.CType.types[other.type]
 
+        def coercion(self, other):
+            """ Type a value of type other must be converted to in order to be
+            stored as this type, or None if it is an int or a float already """
+            types = SemanticAnalyzer.CType.types
+            if self.type not in types or other is None or other.type not in types:
+                return None
+            return self.type if types[self.type] != types[other.type] else None
+
         def __repr__(self):
             return '{}'.format(self.type)
 
@@ -37,13 +76,30 @@ class SemanticAnalyzer(NodeVisitor):
 
     def __init__(self):
         self.current_scope = None
+        self.warnings = []
+        # slots given out so far in the global segment and in the frame of
+        # the function being analyzed (None outside of functions)
+        self.global_size = 0
+        self.frame_size = None
+        # return type of the function being analyzed
+        self.return_type = None
 
     def error(self, message):
         raise SemanticError(message)
 
-    def warning(self, message):
+    def warning(self, message, line):
+        message = '{} at line {}'.format(message, line)
+        self.warnings.append(message)
+        self.report(message)
+
+    @staticmethod
+    def report(message):
         print(MessageColor.WARNING + message + MessageColor.ENDC)
 
+    def lookup(self, name):
+        """ Symbol that a name used in an expression refers to """
+        return self.current_scope.lookup(name)
+
     def visit_Program(self, node):
         global_scope = ScopedSymbolTable(
             scope_name='global',
@@ -60,6 +116,7 @@ class SemanticAnalyzer(NodeVisitor):
             self.error(
                 "Error: Undeclared mandatory function main"
             )
+        node.global_size = self.global_size
 
         self.current_scope = self.current_scope.enclosing_scope
 
@@ -80,32 +137,25 @@ class SemanticAnalyzer(NodeVisitor):
                 )
             )
 
+        self.allocate(node.var_node, var_symbol)
         self.current_scope.insert(var_symbol)
 
+    def allocate(self, var_node, var_symbol):
+        """ Give a new variable the next slot of the global segment or frame """
+        if self.frame_size is None:
+            var_symbol.depth, var_symbol.slot = GLOBAL, self.global_size
+            self.global_size += 1
+        else:
+            var_symbol.depth, var_symbol.slot = LOCAL, self.frame_size
+            self.frame_size += 1
+        var_node.depth, var_node.slot = var_symbol.depth, var_symbol.slot
+
     def visit_IncludeLibrary(self, node):
         """ #include <library_name.h> """
 
-        functions = get_functions('interpreter.__builtins__.{}'.format(
-            node.library_name
-        ))
-
-        for func in functions:
-            type_symbol = self.current_scope.lookup(func.return_type)
-
-            func_name = func.__name__
-            if self.current_scope.lookup(func_name):
+        for func_symbol in library_symbols(node.library_name):
+            if self.current_scope.lookup(func_symbol.name):
                 continue
-
-            func_symbol = FunctionSymbol(func_name, type=type_symbol)
-
-            if func.arg_types == None:
-                func_symbol.params = None
-            else:
-                for i, param_type in enumerate(func.arg_types):
-                    type_symbol = self.current_scope.lookup(param_type)
-                    var_symbol = VarSymbol('param{:02d}'.format(i + 1), type_symbol)
-                    func_symbol.params.append(var_symbol)
-
             self.current_scope.insert(func_symbol)
 
     def visit_FunctionDeclaration(self, node):
@@ -128,14 +178,24 @@ class SemanticAnalyzer(NodeVisitor):
             enclosing_scope=self.current_scope
         )
         self.current_scope = procedure_scope
+        self.frame_size = 0
+        self.return_type = SemanticAnalyzer.CType(type_name)
 
         for param in node.params:
             func_symbol.params.append(self.visit(param))
 
-        self.visit(node.body)
+        if isinstance(node.body, LazyFunctionBody):
+            node.body.scope = self.current_scope
+        else:
+            self.visit(node.body)
+        node.frame_size = self.frame_size
 
+        self.frame_size = self.return_type = None
         self.current_scope = self.current_scope.enclosing_scope
 
+    def visit_LazyFunctionBody(self, node):
+        pass
+
     def visit_FunctionBody(self, node):
         """ { children } """
         for child in node.children:
@@ -158,6 +218,7 @@ class SemanticAnalyzer(NodeVisitor):
                 )
             )
 
+        self.allocate(node.var_node, var_symbol)
         self.current_scope.insert(var_symbol)
         return var_symbol
 
@@ -187,13 +248,23 @@ class SemanticAnalyzer(NodeVisitor):
                     rtype.type,
                     node.line
                 ))
-        return ltype + rtype 
+        if node.op.type in INT_RESULT_OPERATORS:
+            result = SemanticAnalyzer.CType("int")
+        else:
+            result = ltype + rtype
+        node.ctype = result.type
+        node.operation = Operation.select(node.op.type, result.type)
+        return result
 
     def visit_UnaryOperator(self, node):
 
-        if isinstance(node.op, Type):
+        # a cast's operator is the token of its type
+        if node.op.type in (CHAR, INT, FLOAT, DOUBLE):
             self.visit(node.expr)
             return SemanticAnalyzer.CType(node.op.value)
+        if node.op.type == LOG_NEG:
+            self.visit(node.expr)
+            return SemanticAnalyzer.CType("int")
         return self.visit(node.expr)
 
     def visit_TernaryOperator(self, node):
@@ -202,11 +273,11 @@ class SemanticAnalyzer(NodeVisitor):
         texpr = self.visit(node.texpression)
         fexpr = self.visit(node.fexpression)
         if texpr != fexpr:
-            self.warning("Incompatibile types at ternary operator texpr:<{}> fexpr:<{}> at line {}".format(
+            self.warning("Incompatibile types at ternary operator texpr:<{}> fexpr:<{}>".format(
                 texpr,
-                fexpr,
-                node.line
-            ))
+                fexpr
+            ), node.line)
+        node.coerce = texpr.coercion(fexpr)
         return texpr
 
     def visit_Assign(self, node):
@@ -214,17 +285,17 @@ class SemanticAnalyzer(NodeVisitor):
         right = self.visit(node.right)
         left = self.visit(node.left)
         if left != right:
-            self.warning("Incompatible types when assigning to type <{}> from type <{}> at line {}".format(
+            self.warning("Incompatible types when assigning to type <{}> from type <{}>".format(
                 left,
-                right,
-                node.line
-            ))
+                right
+            ), node.line)
+        node.coerce = left.coercion(right)
         return right
 
     def visit_Var(self, node):
         """ value """
         var_name = node.value
-        var_symbol = self.current_scope.lookup(var_name)
+        var_symbol = self.lookup(var_name)
         if var_symbol is None:
             self.error(
                 "Symbol(identifier) not found '{}' at line {}".format(
@@ -232,6 +303,8 @@ class SemanticAnalyzer(NodeVisitor):
                     node.line
                 )
             )
+        if isinstance(var_symbol, VarSymbol):
+            node.depth, node.slot = var_symbol.depth, var_symbol.slot
         return SemanticAnalyzer.CType(var_symbol.type.name)
 
     def visit_Type(self, node):
@@ -262,13 +335,16 @@ class SemanticAnalyzer(NodeVisitor):
 
     def visit_ReturnStmt(self, node):
         """ return expression """
-        return self.visit(node.expression)
+        expression = self.visit(node.expression)
+        if self.return_type is not None:
+            node.coerce = self.return_type.coercion(expression)
+        return expression
 
     def visit_Num(self, node):
         """ value """
-        if node.token.type == INTEGER_CONST:
+        if node.type == INTEGER_CONST:
             return SemanticAnalyzer.CType("int")
-        elif node.token.type == CHAR_CONST:
+        elif node.type == CHAR_CONST:
             return SemanticAnalyzer.CType("char")
         else:
             return SemanticAnalyzer.CType("float")
@@ -281,7 +357,7 @@ class SemanticAnalyzer(NodeVisitor):
 
     def visit_FunctionCall(self, node):
         func_name = node.name
-        func_symbol = self.current_scope.lookup(func_name)
+        func_symbol = self.lookup(func_name)
         if func_symbol is None:
             self.error(
                 "Function '{}' not found at line {}".format(
@@ -321,14 +397,16 @@ class SemanticAnalyzer(NodeVisitor):
             expected.append(param_type)
             found.append(arg_type)
 
+        coerce = [param_type.coercion(arg_type) for param_type, arg_type in zip(expected, found)]
+        node.coerce = coerce if any(coerce) else None
+
         if expected != found:
-            self.warning("Incompatibile argument types for function <{}{}> but found <{}{}> at line {}".format(
+            self.warning("Incompatibile argument types for function <{}{}> but found <{}{}>".format(
                 func_name,
                 str(expected).replace('[', '(').replace(']', ')'),
                 func_name,
-                str(found).replace('[', '(').replace(']', ')'),
-                node.line
-            ))
+                str(found).replace('[', '(').replace(']', ')')
+            ), node.line)
 
         return SemanticAnalyzer.CType(func_symbol.type.name)
 
@@ -340,5 +418,27 @@ class SemanticAnalyzer(NodeVisitor):
 
     @staticmethod
     def analyze(tree):
+        """ Analyze a program and return the warnings it reported """
         semantic_analyzer = SemanticAnalyzer()
-        semantic_analyzer.visit(tree)
\ No newline at end of file
+        semantic_analyzer.visit(tree)
+        return semantic_analyzer.warnings
+
+    @staticmethod
+    def analyze_body(node, body):
+        """ Analyze the body of a lazily parsed function declaration in the
+        scope of its parameters, and update its frame size """
+        semantic_analyzer = SemanticAnalyzer()
+        semantic_analyzer.current_scope = node.body.scope
+        semantic_analyzer.frame_size = node.frame_size
+        semantic_analyzer.return_type = SemanticAnalyzer.CType(node.type_node.value)
+        semantic_analyzer.visit(body)
+        node.frame_size = semantic_analyzer.frame_size
+
+    @staticmethod
+    def load_body(node):
+        """ Parse and analyze the body of a function of a lazily parsed
+        program, in place of its LazyFunctionBody """
+        lazy = node.body
+        body = Parser(lazy.tokens).parse_body(lazy)
+        SemanticAnalyzer.analyze_body(node, body)
+        node.body = body
\ No newline at end of file
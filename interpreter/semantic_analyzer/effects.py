@@ -0,0 +1,130 @@
+from ..lexer_analyzer.token_type import AND_OP
+from ..syntax_analyzer.syntax_tree import (
+    Node, Var, UnaryOperator, FunctionCall, FunctionDeclaration, IncludeLibrary,
+    LazyFunctionBody,
+)
+from .mem import LOCAL
+from ..utils.registry import library
+
+
+def calls(node):
+    """ Names of the functions called anywhere under node """
+    names = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, FunctionCall):
+            names.add(node.name)
+        for field in node._fields:
+            value = getattr(node, field)
+            if isinstance(value, Node):
+                stack.append(value)
+            elif isinstance(value, list):
+                stack.extend(item for item in value if isinstance(item, Node))
+    return names
+
+
+def library_functions(tree):
+    """ name -> builtin function, for the libraries the program includes """
+    functions = {}
+    for node in tree.children:
+        if isinstance(node, IncludeLibrary):
+            functions.update(library(node.library_name))
+    return functions
+
+
+def reached_builtins(tree, entry='main'):
+    """ Builtins that can be called from the global declarations and entry
+
+    None when an unparsed (lazy) body is reachable, since its calls are
+    not known.
+    """
+    declarations = {}
+    pending = [entry]
+    for node in tree.children:
+        if isinstance(node, FunctionDeclaration):
+            declarations[node.func_name] = node
+        elif not isinstance(node, IncludeLibrary):
+            pending.extend(calls(node))
+
+    library = library_functions(tree)
+    reached, seen = set(), set()
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        declaration = declarations.get(name)
+        if declaration is None:
+            if name in library:
+                reached.add(library[name])
+        elif isinstance(declaration.body, LazyFunctionBody):
+            return None
+        else:
+            pending.extend(calls(declaration.body))
+    return reached
+
+
+def input_free(tree):
+    """ Whether no builtin that reads input can be reached, so that every run
+    of the program prints the same output """
+    reached = reached_builtins(tree)
+    return reached is not None and not any(function.reads_input for function in reached)
+
+
+def _local_effects(declaration):
+    """ (clean, called names) of a function body
+
+    A body is clean when every variable it reads or writes is one of its
+    params or locals and it takes no addresses. Variables are told apart by
+    the address the analyzer gave them, so locals the optimizer adds
+    without a declaration count as locals too.
+    """
+    called = set()
+    clean = True
+    stack = [declaration.body]
+    while stack and clean:
+        node = stack.pop()
+        if isinstance(node, Var):
+            clean = node.depth == LOCAL
+        elif isinstance(node, UnaryOperator) and node.prefix and node.op.type == AND_OP:
+            clean = False
+        else:
+            if isinstance(node, FunctionCall):
+                called.add(node.name)
+            for field in node._fields:
+                value = getattr(node, field)
+                if isinstance(value, Node):
+                    stack.append(value)
+                elif isinstance(value, list):
+                    stack.extend(item for item in value if isinstance(item, Node))
+    return clean, called
+
+
+def pure_functions(tree):
+    """ Names of the functions whose result depends only on their arguments
+
+    A function is pure when its body only touches its params and locals,
+    does no I/O and calls only pure builtins and pure functions; functions
+    that call each other are pure together unless one of them is not.
+    """
+    library = library_functions(tree)
+    effects = {}
+    for node in tree.children:
+        if isinstance(node, FunctionDeclaration) and not isinstance(node.body, LazyFunctionBody):
+            effects[node.func_name] = _local_effects(node)
+
+    pure = set(name for name, (clean, _) in effects.items() if clean)
+    changed = True
+    while changed:
+        changed = False
+        for name in list(pure):
+            for callee in effects[name][1]:
+                if callee in pure:
+                    continue
+                if callee not in effects and getattr(library.get(callee), 'pure', False):
+                    continue
+                pure.discard(name)
+                changed = True
+                break
+    return pure
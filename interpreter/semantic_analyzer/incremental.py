@@ -0,0 +1,186 @@
+from ..syntax_analyzer.syntax_tree import Node, LazyFunctionBody
+from .analyzer import SemanticAnalyzer
+from .mem import VarSymbol, FunctionSymbol
+
+# node fields the analyzer fills in
+ANNOTATIONS = frozenset(('depth', 'slot', 'ctype', 'operation', 'coerce', 'frame_size'))
+
+
+def signature(symbol):
+    """ What a body analyzed against a global symbol relies on """
+    if isinstance(symbol, VarSymbol):
+        return 'var', symbol.type.name, symbol.depth, symbol.slot
+    if isinstance(symbol, FunctionSymbol):
+        params = None if symbol.params is None else tuple(param.type.name for param in symbol.params)
+        return 'function', symbol.type.name, params
+    return type(symbol).__name__, symbol.name
+
+
+def _children(node_class):
+    """ Fields of a node class that can hold nodes, and those holding lists """
+    fields = tuple(field for field in node_class._fields if field not in ANNOTATIONS)
+    return fields, frozenset(field for field in fields if field in LIST_FIELDS)
+
+
+# fields holding lists of nodes
+LIST_FIELDS = frozenset(('children', 'params', 'args'))
+_children_fields = {}
+
+
+def descendants(node):
+    """ Every node below `node`, each once """
+    result = []
+    seen = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        node_class = type(node)
+        fields = _children_fields.get(node_class)
+        if fields is None:
+            fields = _children_fields[node_class] = _children(node_class)
+        fields, lists = fields
+        for field in fields:
+            value = getattr(node, field)
+            if field in lists:
+                children = value
+            elif isinstance(value, Node):
+                children = (value,)
+            else:
+                continue
+            for child in children:
+                if id(child) not in seen:
+                    seen.add(id(child))
+                    result.append(child)
+                    stack.append(child)
+    return result
+
+
+class FunctionResult(object):
+    __slots__ = ('text', 'node', 'symbol', 'dependencies', 'warnings', '_nodes')
+
+    def __init__(self, text, node, symbol, dependencies, warnings):
+        self.text = text
+        self.node = node
+        self.symbol = symbol
+        # name -> signature of the global symbols the body refers to
+        self.dependencies = dependencies
+        # (message, line relative to the declaration) pairs
+        self.warnings = warnings
+        self._nodes = None
+
+    def move(self, offset, lines):
+        """ Shift the location of the nodes below the declaration """
+        if self._nodes is None:
+            self._nodes = descendants(self.node)
+        for node in self._nodes:
+            node.line += lines
+            node.start += offset
+            node.end += offset
+
+
+class IncrementalAnalyzer(SemanticAnalyzer):
+    """ Analyzes successive versions of a program, reusing unchanged functions
+
+    The result of each function declaration is kept with its source text and
+    the signatures of the global variables and functions its body refers to.
+    A declaration whose text is the same and whose dependencies still have
+    the same signatures, in the global scope built so far, is not visited
+    again: its symbol is reinserted and the new declaration node takes over
+    the analyzed params and body, moved to its location. Everything else is
+    analyzed as SemanticAnalyzer would.
+
+    Reused bodies move from one tree to the next, so an older tree must not
+    be used after a newer one was analyzed, and trees parsed with shared
+    leaves are not supported.
+    """
+
+    def __init__(self):
+        SemanticAnalyzer.__init__(self)
+        self.results = {}
+        self.text = None
+        self.previous = {}
+        # names of the functions analyzed by the last call of analyze
+        self.reanalyzed = []
+        self.dependencies = None
+        self.located_warnings = None
+
+    def analyze(self, tree, text):
+        """ Analyze a tree parsed from text and return its warnings """
+        SemanticAnalyzer.__init__(self)
+        self.text = text
+        self.previous, self.results = self.results, {}
+        self.reanalyzed = []
+        try:
+            self.visit(tree)
+        except Exception:
+            # a failed analysis leaves nothing to reuse but the old results
+            self.results = self.previous
+            raise
+        finally:
+            self.previous = {}
+        for message in self.warnings:
+            self.report(message)
+        return self.warnings
+
+    def warning(self, message, line):
+        self.warnings.append('{} at line {}'.format(message, line))
+        if self.located_warnings is not None:
+            self.located_warnings.append((message, line))
+
+    def lookup(self, name):
+        symbol = self.current_scope.lookup(name)
+        if self.dependencies is not None and symbol is not None:
+            scope = self.current_scope
+            while name not in scope._symbols:
+                scope = scope.enclosing_scope
+            if scope.enclosing_scope is None:
+                self.dependencies[name] = signature(symbol)
+        return symbol
+
+    def visit_FunctionDeclaration(self, node):
+        text = self.text[node.start:node.end]
+        result = self.previous.get(node.func_name)
+        if result is not None and self.reusable(result, node, text):
+            return self.reuse(result, node)
+
+        self.reanalyzed.append(node.func_name)
+        self.dependencies, self.located_warnings = {}, []
+        try:
+            SemanticAnalyzer.visit_FunctionDeclaration(self, node)
+            dependencies, warnings = self.dependencies, self.located_warnings
+        finally:
+            self.dependencies = self.located_warnings = None
+        # a recursive call is covered by the text of the declaration itself
+        dependencies.pop(node.func_name, None)
+        self.results[node.func_name] = FunctionResult(
+            text, node, self.current_scope.lookup(node.func_name), dependencies,
+            [(message, line - node.line) for message, line in warnings]
+        )
+
+    def reusable(self, result, node, text):
+        if isinstance(node.body, LazyFunctionBody) or result.text != text:
+            return False
+        if node.column != result.node.column:
+            # the nodes on its first line would move by another column
+            return False
+        if self.current_scope.lookup(node.func_name) is not None:
+            # a duplicate, reported by the full analysis
+            return False
+        for name, dependency in result.dependencies.items():
+            symbol = self.current_scope.lookup(name)
+            if symbol is None or signature(symbol) != dependency:
+                return False
+        return True
+
+    def reuse(self, result, node):
+        analyzed = result.node
+        offset, lines = node.start - analyzed.start, node.line - analyzed.line
+        if offset or lines:
+            result.move(offset, lines)
+        node.type_node, node.params = analyzed.type_node, analyzed.params
+        node.body, node.frame_size = analyzed.body, analyzed.frame_size
+        self.current_scope.insert(result.symbol)
+        for message, line in result.warnings:
+            self.warning(message, node.line + line)
+        result.node = node
+        self.results[node.func_name] = result
@@ -1,5 +1,8 @@
 from collections import OrderedDict
 
+# depth of a variable address: the global segment or the running call's frame
+GLOBAL, LOCAL = 0, 1
+
 
 class Symbol(object):
     def __init__(self, name, type=None):
@@ -8,8 +11,10 @@ class Symbol(object):
 
 
 class VarSymbol(Symbol):
-    def __init__(self, name, type):
+    def __init__(self, name, type, depth=None, slot=None):
         super(VarSymbol, self).__init__(name, type)
+        self.depth = depth
+        self.slot = slot
 
     def __str__(self):
         return "<{class_name}(name='{name}', type='{type}')>".format(
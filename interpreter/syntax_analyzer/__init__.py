@@ -1,2 +1,4 @@
 from . import syntax_tree
-from . import parser
\ No newline at end of file
+from . import parser
+from . import arena
+from . import parallel
\ No newline at end of file
@@ -0,0 +1,167 @@
+from array import array
+
+from .syntax_tree import Node, NODE_CLASSES
+
+NODE, CONSTANT, LIST, NONE = range(4)
+
+KINDS = {node_class: kind for kind, node_class in enumerate(NODE_CLASSES)}
+
+
+class Arena(object):
+    """ Flat form of a syntax tree
+
+    Node i has kind kinds[i] (an index into NODE_CLASSES), its location in
+    lines/columns/starts/ends, and its fields, in the order of the class
+    `_fields`, as consecutive entries of `operands` starting at first[i].
+    An operand is tagged in its two low bits: a node index, an index into
+    `constants` (values and operator tokens, deduplicated), the position
+    in `lists` of a length-prefixed list of operands, or None.
+
+    Arena.pack(tree) builds an arena, arena.unpack() rebuilds the tree and
+    arena.root is a view of the root node that visitors can walk in place.
+    """
+    __slots__ = (
+        'kinds', 'first', 'lines', 'columns', 'starts', 'ends',
+        'operands', 'lists', 'constants', '_constant_index',
+    )
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.first = array('i')
+        self.lines = array('i')
+        self.columns = array('i')
+        self.starts = array('i')
+        self.ends = array('i')
+        self.operands = array('i')
+        self.lists = array('i')
+        self.constants = []
+        self._constant_index = {}
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @classmethod
+    def pack(cls, tree):
+        arena = cls()
+        arena._pack_node(tree, {})
+        arena._constant_index = None
+        return arena
+
+    def _pack_node(self, node, packed):
+        # nodes shared by the parser are stored once
+        index = packed.get(id(node))
+        if index is not None:
+            return index
+        operands = [self._pack(getattr(node, field), packed) for field in node._fields]
+
+        index = packed[id(node)] = len(self.kinds)
+        self.kinds.append(KINDS[type(node)])
+        self.first.append(len(self.operands))
+        for name, values in (
+            ('line', self.lines), ('column', self.columns),
+            ('start', self.starts), ('end', self.ends),
+        ):
+            value = getattr(node, name)
+            values.append(-1 if value is None else value)
+        self.operands.extend(operands)
+        return index
+
+    def _pack(self, value, packed):
+        if value is None:
+            return NONE
+        if isinstance(value, Node):
+            return self._pack_node(value, packed) << 2 | NODE
+        if isinstance(value, list):
+            items = [self._pack(item, packed) for item in value]
+            position = len(self.lists)
+            self.lists.append(len(items))
+            self.lists.extend(items)
+            return position << 2 | LIST
+        key = (type(value), value) if isinstance(value, (str, int, float)) else id(value)
+        constant = self._constant_index.get(key)
+        if constant is None:
+            constant = self._constant_index[key] = len(self.constants)
+            self.constants.append(value)
+        return constant << 2 | CONSTANT
+
+    @property
+    def root(self):
+        return self.view(len(self.kinds) - 1)
+
+    def view(self, index):
+        return VIEW_CLASSES[self.kinds[index]](self, index)
+
+    def field(self, index, position, unpack=None):
+        return self._operand(self.operands[self.first[index] + position], unpack)
+
+    def _operand(self, operand, unpack):
+        tag, value = operand & 3, operand >> 2
+        if tag == NODE:
+            return unpack(value) if unpack else self.view(value)
+        if tag == CONSTANT:
+            return self.constants[value]
+        if tag == LIST:
+            return [
+                self._operand(self.lists[value + 1 + i], unpack)
+                for i in range(self.lists[value])
+            ]
+        return None
+
+    def unpack(self):
+        """ Rebuild the tree of Node objects """
+        nodes = {}
+
+        def unpack(index):
+            node = nodes.get(index)
+            if node is None:
+                node_class = NODE_CLASSES[self.kinds[index]]
+                node = nodes[index] = node_class.__new__(node_class)
+                for name, values in (
+                    ('line', self.lines), ('column', self.columns),
+                    ('start', self.starts), ('end', self.ends),
+                ):
+                    setattr(node, name, None if values[index] == -1 else values[index])
+                for position, field in enumerate(node_class._fields):
+                    setattr(node, field, self.field(index, position, unpack))
+            return node
+
+        return unpack(len(self.kinds) - 1)
+
+
+def _location(values_name):
+    def get(self):
+        value = getattr(self._arena, values_name)[self._index]
+        return None if value == -1 else value
+    return property(get)
+
+
+def _operand(position):
+    def get(self):
+        return self._arena.field(self._index, position)
+    return property(get)
+
+
+def _view_class(node_class):
+    """ Subclass of a node class whose fields are read from an arena on access
+
+    It keeps the name of the node class so that NodeVisitor dispatches to the
+    same visit_ method, and isinstance checks against node classes hold.
+    """
+    namespace = dict(
+        __slots__=('_arena', '_index'),
+        line=_location('lines'),
+        column=_location('columns'),
+        start=_location('starts'),
+        end=_location('ends'),
+    )
+    for position, field in enumerate(node_class._fields):
+        namespace[field] = _operand(position)
+
+    def __init__(self, arena, index):
+        self._arena = arena
+        self._index = index
+    namespace['__init__'] = __init__
+    return type(node_class.__name__, (node_class,), namespace)
+
+
+VIEW_CLASSES = tuple(_view_class(node_class) for node_class in NODE_CLASSES)
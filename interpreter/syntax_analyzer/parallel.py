@@ -0,0 +1,83 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from ..lexer_analyzer.token_buffer import TokenBuffer
+from ..lexer_analyzer.token_type import KINDS, LBRACKET, RBRACKET, EOF
+from .parser import Parser
+from .syntax_tree import Program
+
+
+def split(tokens):
+    """ Indices just after every '}' that closes a top-level block """
+    lbracket, rbracket = KINDS[LBRACKET], KINDS[RBRACKET]
+    boundaries = []
+    depth = 0
+    for index, kind in enumerate(tokens.kinds):
+        if kind == lbracket:
+            depth += 1
+        elif kind == rbracket:
+            depth -= 1
+            if depth == 0:
+                boundaries.append(index + 1)
+    return boundaries
+
+
+def chunk(tokens, start, end):
+    """ tokens[start:end] followed by an EOF token, as a new TokenBuffer """
+    result = TokenBuffer(tokens.newlines)
+    result.names = tokens.names
+    result.kinds = tokens.kinds[start:end]
+    result.values = tokens.values[start:end]
+    result.starts = tokens.starts[start:end]
+    result.ends = tokens.ends[start:end]
+    result.kinds.append(KINDS[EOF])
+    result.values.append(None)
+    result.starts.append(tokens.starts[end])
+    result.ends.append(tokens.starts[end])
+    return result
+
+
+def parse_declarations(tokens):
+    parser = Parser(tokens)
+    declarations = parser.declarations()
+    if parser.type != EOF:
+        parser.error("Expected token <EOF> but found <{}> at line {}".format(
+            parser.type, parser.line
+        ))
+    return declarations
+
+
+def parse(tokens, workers=None, chunks_per_worker=4):
+    """ Parse a TokenBuffer with the top-level declarations split over processes
+
+    The stream is cut after top-level blocks into about chunks_per_worker
+    pieces per worker of similar token counts; each piece is parsed as a
+    list of declarations in a worker and the lists are joined in source
+    order, which gives the same Program as Parser(tokens).parse().
+    """
+    workers = workers or os.cpu_count() or 1
+    count = workers * chunks_per_worker
+    size = max(1, len(tokens) // count)
+
+    bounds = [0]
+    for boundary in split(tokens):
+        if boundary - bounds[-1] >= size:
+            bounds.append(boundary)
+    last = len(tokens) - 1  # the EOF token
+    if bounds[-1] != last:
+        bounds.append(last)
+
+    pieces = [chunk(tokens, start, end) for start, end in zip(bounds, bounds[1:])]
+
+    declarations = []
+    if workers == 1 or len(pieces) == 1:
+        for piece in pieces:
+            declarations.extend(parse_declarations(piece))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for result in executor.map(parse_declarations, pieces):
+                declarations.extend(result)
+
+    parser = Parser(tokens)
+    parser.reset(last)
+    return parser.node(Program, tokens[0], declarations=declarations)
@@ -1,40 +1,127 @@
 from ..lexer_analyzer.token_type import *
 from .syntax_tree import *
-from ..utils.utils import restorable
+from ..lexer_analyzer.token_buffer import TokenBuffer
+from ..lexer_analyzer.lexer import OPERATORS, RESERVED_KEYWORDS
+
+
+# Binding power of the binary operators, loosest first; all of them are
+# left associative. Assignment and ?: bind looser than any of them and
+# associate to the right.
+ASSIGNMENT_POWER, CONDITIONAL_POWER = 1, 2
+
+BINARY_POWER = {
+    LOG_OR_OP: 3,
+    LOG_AND_OP: 4,
+    OR_OP: 5,
+    XOR_OP: 6,
+    AND_OP: 7,
+    EQ_OP: 8, NE_OP: 8,
+    LT_OP: 9, GT_OP: 9, LE_OP: 9, GE_OP: 9,
+    LEFT_OP: 10, RIGHT_OP: 10,
+    ADD_OP: 11, SUB_OP: 11,
+    MUL_OP: 12, DIV_OP: 12, MOD_OP: 12,
+}
+
+ASSIGNMENT_OPERATORS = frozenset((
+    ASSIGN, MUL_ASSIGN, DIV_ASSIGN, MOD_ASSIGN, ADD_ASSIGN, SUB_ASSIGN,
+    LEFT_ASSIGN, RIGHT_ASSIGN, AND_ASSIGN, XOR_ASSIGN, OR_ASSIGN,
+))
 
 
 class Parser(object):
-    def __init__(self, lexer):
-        self.lexer = lexer
-        self.current_token = self.lexer.get_next_token
+    def __init__(self, lexer, share_leaves=False, lazy=False):
+        """ lexer: a Lexer, or an already tokenized TokenBuffer
+
+        With share_leaves, identical Num, String and Type nodes are built
+        once and shared; a shared leaf keeps the location of its first
+        occurrence. Var nodes are never shared since later passes annotate
+        them per occurrence.
+
+        With lazy, function bodies are only brace matched and left as
+        LazyFunctionBody nodes; parse_body parses one when it is needed.
+        """
+        self.tokens = lexer if isinstance(lexer, TokenBuffer) else lexer.tokenize()
+        self.kinds = self.tokens.kinds
+        self.pos = 0
+        # type of the token at pos; the Token itself is only built when a
+        # node needs it
+        self.type = TOKEN_TYPES[self.kinds[0]]
+        self.leaves = {} if share_leaves else None
+        self.lazy = lazy
 
     def error(self, message):
         raise SyntaxError(message)
 
-    def use(self, token_type):
+    @property
+    def current_token(self):
+        return self.tokens[self.pos]
+
+    @property
+    def line(self):
+        return self.tokens.position(self.tokens.starts[self.pos])[0]
+
+    def peek(self, n):
+        """ Type of the token n positions after the current one """
+        return self.tokens.type(min(self.pos + n, len(self.tokens) - 1))
+
+    def mark(self):
+        return self.pos
 
-        if self.current_token.type == token_type:
-            self.current_token = self.lexer.get_next_token
+    def reset(self, mark):
+        self.pos = mark
+        self.type = TOKEN_TYPES[self.kinds[mark]]
+
+    def use(self, token_type):
+        kinds = self.kinds
+        if kinds[self.pos] == KINDS[token_type]:
+            self.pos += 1
+            self.type = TOKEN_TYPES[kinds[self.pos]]
         else:
             self.error(
-                'Expected token <{}> but found <{}> at line {}.'.format(
-                    token_type, self.current_token.type, self.lexer.line
+                'Expected token <{}> but found <{}> at line {}:{}.'.format(
+                    token_type, self.type,
+                    *self.tokens.position(self.tokens.starts[self.pos])
                 )
             )
 
-    def program(self):
-        root = Program(
-            declarations=self.declarations(),
-            line=self.lexer.line
+    def node(self, node_class, first, **kwargs):
+        """ Build a node spanning from `first` (a token, a node or the
+        position of a token) to the last used token """
+        start = self.tokens.starts[first] if first.__class__ is int else first.start
+        end = self.tokens.ends[self.pos - 1] if self.pos else start
+        line, column = self.tokens.position(start)
+        node = node_class(line=line, **kwargs)
+        node.column = column
+        node.start = start
+        node.end = max(start, end)
+        return node
+
+    def leaf(self, node_class, token):
+        if self.leaves is None:
+            return self.node(node_class, token, token=token)
+        key = (node_class, token.type, token.value)
+        node = self.leaves.get(key)
+        if node is None:
+            node = self.leaves[key] = self.node(node_class, token, token=token)
+        return node
 
+    def operator(self, token):
+        """ Shared token of an operator or type keyword, without a source span """
+        return OPERATORS.get(token.value) or RESERVED_KEYWORDS[token.value]
+
+    def program(self):
+        root = self.node(
+            Program,
+            self.pos,
+            declarations=self.declarations()
         )
         return root
 
     def declarations(self):
         declarations = []
 
-        while self.current_token.type in [CHAR, FLOAT, DOUBLE, INT, HASH, VOID]:
-            if self.current_token.type == HASH:
+        while self.type in [CHAR, FLOAT, DOUBLE, INT, HASH, VOID]:
+            if self.type == HASH:
                 declarations.append(self.include_library())
             elif self.check_function():
                 declarations.append(self.function_declaration())
@@ -43,12 +130,13 @@ class Parser(object):
         return declarations
 
     def include_library(self):
+        first = self.pos
         self.use(HASH)
         token = self.current_token
         if token.value != 'include':
             self.error(
                 'Expected token "include" but found {} at line {}.'.format(
-                    token.value, self.lexer.line
+                    token.value, self.line
                 )
             )
 
@@ -60,83 +148,115 @@ class Parser(object):
         extension = self.current_token
         if extension.value != 'h':
             self.error(
-                'You can include only *.h files [line {}]'.format(self.lexer.line)
+                'You can include only *.h files [line {}]'.format(self.line)
             )
         self.use(ID)
         self.use(GT_OP)
-        return IncludeLibrary(
-            library_name=token.value,
-            line=self.lexer.line
+        return self.node(
+            IncludeLibrary,
+            first,
+            library_name=token.value
         )
 
-    @restorable
     def check_function(self):
-        self.use(self.current_token.type)
-        self.use(ID)
-        return self.current_token.type == LPAREN
+        return self.peek(1) == ID and self.peek(2) == LPAREN
 
     def function_declaration(self):
+        first = self.pos
         type_node = self.type_spec()
-        func_name = self.current_token.value
+        func_name = self.tokens.values[self.pos]
         self.use(ID)
         self.use(LPAREN)
         params = self.parameters()
         self.use(RPAREN)
-        return FunctionDeclaration(
+        return self.node(
+            FunctionDeclaration,
+            first,
             type_node=type_node,
             func_name=func_name,
             params=params,
-            body=self.function_body(),
-            line=self.lexer.line
+            body=self.lazy_function_body() if self.lazy else self.function_body()
         )
 
+    def lazy_function_body(self):
+        """ Skip to the token after the '}' matching the current '{' """
+        first = self.pos
+        index = self.pos
+        self.use(LBRACKET)
+        kinds = self.kinds
+        lbracket, rbracket, eof = KINDS[LBRACKET], KINDS[RBRACKET], KINDS[EOF]
+        depth = 1
+        pos = self.pos
+        while depth:
+            kind = kinds[pos]
+            if kind == lbracket:
+                depth += 1
+            elif kind == rbracket:
+                depth -= 1
+            elif kind == eof:
+                self.reset(pos)
+                self.use(RBRACKET)
+            pos += 1
+        self.reset(pos)
+        return self.node(LazyFunctionBody, first, tokens=self.tokens, index=index)
+
+    def parse_body(self, body):
+        """ Parse a LazyFunctionBody read from the same tokens """
+        self.reset(body.index)
+        return self.function_body()
+
     def function_body(self):
+        first = self.pos
         result = []
         self.use(LBRACKET)
-        while self.current_token.type != RBRACKET:
-            if self.current_token.type in (CHAR, INT, FLOAT, DOUBLE):
+        while self.type != RBRACKET:
+            if self.type in (CHAR, INT, FLOAT, DOUBLE):
                 result.extend(self.declaration_list())
             else:
                 result.append(self.statement())
         self.use(RBRACKET)
-        return FunctionBody(
-            children=result,
-            line=self.lexer.line
+        return self.node(
+            FunctionBody,
+            first,
+            children=result
         )
 
     def parameters(self):
 
         nodes = []
-        if self.current_token.type != RPAREN:
-            nodes = [Param(
-                type_node=self.type_spec(),
-                var_node=self.variable(),
-                line=self.lexer.line
-            )]
-            while self.current_token.type == COMMA:
+        if self.type != RPAREN:
+            nodes = [self.parameter()]
+            while self.type == COMMA:
                 self.use(COMMA)
-                nodes.append(Param(
-                    type_node=self.type_spec(),
-                    var_node=self.variable(),
-                    line=self.lexer.line
-                ))
+                nodes.append(self.parameter())
         return nodes
 
+    def parameter(self):
+        first = self.pos
+        return self.node(
+            Param,
+            first,
+            type_node=self.type_spec(),
+            var_node=self.variable()
+        )
+
     def declaration_list(self):
         result = self.declaration()
-        while self.current_token.type == (CHAR, INT, FLOAT, DOUBLE):
+        while self.type == (CHAR, INT, FLOAT, DOUBLE):
             result.extend(self.declaration())
         return result
 
     def declaration(self):
         result = list()
+        first = self.pos
         type_node = self.type_spec()
         for node in self.init_declarator_list():
             if isinstance(node, Var):
-                result.append(VarDeclaration(
+                result.append(self.node(
+                    VarDeclaration,
+                    first,
                     type_node=type_node,
-                    var_node=node,
-                    line=self.lexer.line
+                    var_node=node
                 ))
             else:
                 result.append(node)
@@ -146,7 +266,7 @@ class Parser(object):
     def init_declarator_list(self):
         result = list()
         result.extend(self.init_declarator())
-        while self.current_token.type == COMMA:
+        while self.type == COMMA:
             self.use(COMMA)
             result.extend(self.init_declarator())
         return result
@@ -155,14 +275,15 @@ class Parser(object):
         var = self.variable()
         result = list()
         result.append(var)
-        if self.current_token.type == ASSIGN:
+        if self.type == ASSIGN:
             token = self.current_token
             self.use(ASSIGN)
-            result.append(Assign(
+            result.append(self.node(
+                Assign,
+                var,
                 left=var,
-                op=token,
-                right=self.assignment_expression(),
-                line=self.lexer.line
+                op=self.operator(token),
+                right=self.assignment_expression()
             ))
         return result
 
@@ -177,92 +298,98 @@ class Parser(object):
             return self.compound_statement()
         return self.expression_statement()
 
-    @restorable
     def check_compound_statement(self):
-        return self.current_token.type == LBRACKET
+        return self.type == LBRACKET
 
     def compound_statement(self):
+        first = self.pos
         result = []
         self.use(LBRACKET)
-        while self.current_token.type != RBRACKET:
-            if self.current_token.type in (CHAR, INT, FLOAT, DOUBLE):
+        while self.type != RBRACKET:
+            if self.type in (CHAR, INT, FLOAT, DOUBLE):
                 result.extend(self.declaration_list())
             else:
                 result.append(self.statement())
         self.use(RBRACKET)
-        return CompoundStatement(
-            children=result,
-            line=self.lexer.line
+        return self.node(
+            CompoundStatement,
+            first,
+            children=result
         )
 
-    @restorable
     def check_jump_statement(self):
-        return self.current_token.type in (RETURN, BREAK, CONTINUE)
+        return self.type in (RETURN, BREAK, CONTINUE)
 
     def jump_statement(self):
-        if self.current_token.type == RETURN:
+        first = self.pos
+        if self.type == RETURN:
             self.use(RETURN)
             expression = self.empty()
-            if self.current_token.type != SEMICOLON:
+            if self.type != SEMICOLON:
                 expression = self.expression()
             self.use(SEMICOLON)
-            return ReturnStmt(
-                expression=expression,
-                line=self.lexer.line
+            return self.node(
+                ReturnStmt,
+                first,
+                expression=expression
             )
-        elif self.current_token.type == BREAK:
+        elif self.type == BREAK:
             self.use(BREAK)
             self.use(SEMICOLON)
-            return BreakStatement(
-                line=self.lexer.line
+            return self.node(
+                BreakStatement,
+                first
             )
 
-        elif self.current_token.type == CONTINUE:
+        elif self.type == CONTINUE:
             self.use(CONTINUE)
             self.use(SEMICOLON)
-            return ContinueStatement(
-                line=self.lexer.line
+            return self.node(
+                ContinueStatement,
+                first
             )
 
-    @restorable
     def check_selection_statement(self):
-        return self.current_token.type == IF
+        return self.type == IF
 
     def selection_statement(self):
-        if self.current_token.type == IF:
+        first = self.pos
+        if self.type == IF:
             self.use(IF)
             self.use(LPAREN)
             condition = self.expression()
             self.use(RPAREN)
             tstatement = self.statement()
             fstatement = self.empty()
-            if self.current_token.type == ELSE:
+            if self.type == ELSE:
                 self.use(ELSE)
                 fstatement = self.statement()
-            return IfStatement(
+            return self.node(
+                IfStatement,
+                first,
                 condition=condition,
                 tbody=tstatement,
-                fbody=fstatement,
-                line=self.lexer.line
+                fbody=fstatement
             )
 
-    @restorable
     def check_iteration_statement(self):
-        return self.current_token.type in (WHILE, DO, FOR)
+        return self.type in (WHILE, DO, FOR)
 
     def iteration_statement(self):
-        if self.current_token.type == WHILE:
+        first = self.pos
+        if self.type == WHILE:
             self.use(WHILE)
             self.use(LPAREN)
             expression = self.expression()
             self.use(RPAREN)
             statement = self.statement()
-            return WhileStatement(
+            return self.node(
+                WhileStatement,
+                first,
                 condition=expression,
-                body=statement,
-                line=self.lexer.line
+                body=statement
             )
-        elif self.current_token.type == DO:
+        elif self.type == DO:
             self.use(DO)
             statement = self.statement()
             self.use(WHILE)
@@ -270,310 +397,211 @@ class Parser(object):
             expression = self.expression()
             self.use(RPAREN)
             self.use(SEMICOLON)
-            return DoWhileStatement(
+            return self.node(
+                DoWhileStatement,
+                first,
                 condition=expression,
-                body=statement,
-                line=self.lexer.line
+                body=statement
             )
         else:
             self.use(FOR)
             self.use(LPAREN)
             setup = self.expression_statement()
             condition = self.expression_statement()
-            increment = NoOp(line=self.lexer.line)
-            if self.current_token.type != RPAREN:
+            increment = self.empty()
+            if self.type != RPAREN:
                 increment = self.expression()
             self.use(RPAREN)
             statement = self.statement()
-            return ForStatement(
+            return self.node(
+                ForStatement,
+                first,
                 setup=setup,
                 condition=condition,
                 increment=increment,
-                body=statement,
-                line=self.lexer.line
+                body=statement
             )
 
     def expression_statement(self):
         node = None
-        if self.current_token.type != SEMICOLON:
+        if self.type != SEMICOLON:
             node = self.expression()
+        else:
+            node = self.empty()
         self.use(SEMICOLON)
-        return node and node or NoOp(line=self.lexer.line)
+        return node
 
     def constant_expression(self):
         return self.conditional_expression()
 
     def expression(self):
+        first = self.pos
         result = list()
         result.append(self.assignment_expression())
-        while self.current_token.type == COMMA:
+        while self.type == COMMA:
             self.use(COMMA)
             result.append(self.assignment_expression())
-        return Expression(
-            children=result,
-            line=self.lexer.line
+        return self.node(
+            Expression,
+            first,
+            children=result
         )
 
-    @restorable
-    def check_assignment_expression(self):
-        if self.current_token.type == ID:
-            self.use(ID)
-            return self.current_token.type.endswith('ASSIGN')
-        return False
-
     def assignment_expression(self):
-        if self.check_assignment_expression():
-            node = self.variable()
-            while self.current_token.type.endswith('ASSIGN'):
-                token = self.current_token
-                self.use(token.type)
-                return Assign(
-                    left=node,
-                    op=token,
-                    right=self.assignment_expression(),
-                    line=self.lexer.line
-                )
-        return self.conditional_expression()
+        return self.binary_expression(ASSIGNMENT_POWER)
 
     def conditional_expression(self):
-        node = self.logical_and_expression()
-        if self.current_token.type == QUESTION_MARK:
-            self.use(QUESTION_MARK)
-            texpression = self.expression()
-            self.use(COLON)
-            fexpression = self.conditional_expression()
-            return TernaryOperator(
-                condition=node,
-                texpression=texpression,
-                fexpression=fexpression,
-                line=self.lexer.line
-            )
-        return node
-
-    def logical_and_expression(self):
-        node = self.logical_or_expression()
-        while self.current_token.type == LOG_AND_OP:
-            token = self.current_token
-            self.use(token.type)
-            node = BinaryOperator(
-                left=node,
-                op=token,
-                right=self.logical_or_expression(),
-                line=self.lexer.line
-            )
-        return node
-
-    def logical_or_expression(self):
-        node = self.inclusive_or_expression()
-        while self.current_token.type == LOG_OR_OP:
-            token = self.current_token
-            self.use(token.type)
-            node = BinaryOperator(
-                left=node,
-                op=token,
-                right=self.inclusive_or_expression(),
-                line=self.lexer.line
-            )
-        return node
-
-    def inclusive_or_expression(self):
-        node = self.exclusive_or_expression()
-        while self.current_token.type == OR_OP:
-            token = self.current_token
-            self.use(token.type)
-            node = BinaryOperator(
-                left=node,
-                op=token,
-                right=self.exclusive_or_expression(),
-                line=self.lexer.line
-            )
-        return node
-
-    def exclusive_or_expression(self):
-        node = self.and_expression()
-        while self.current_token.type == XOR_OP:
-            token = self.current_token
-            self.use(token.type)
-            node = BinaryOperator(
-                left=node,
-                op=token,
-                right=self.and_expression(),
-                line=self.lexer.line
-            )
-        return node
-
-    def and_expression(self):
-        node = self.equality_expression()
-        while self.current_token.type == AND_OP:
-            token = self.current_token
-            self.use(token.type)
-            node = BinaryOperator(
-                left=node,
-                op=token,
-                right=self.equality_expression(),
-                line=self.lexer.line
-            )
-        return node
-
-    def equality_expression(self):
-        node = self.relational_expression()
-        while self.current_token.type in (EQ_OP, NE_OP):
-            token = self.current_token
-            self.use(token.type)
-            return BinaryOperator(
-                left=node,
-                op=token,
-                right=self.relational_expression(),
-                line=self.lexer.line
-            )
-        return node
+        return self.binary_expression(CONDITIONAL_POWER)
 
-    def relational_expression(self):
-        node = self.shift_expression()
-        while self.current_token.type in (LE_OP, LT_OP, GE_OP, GT_OP):
-            token = self.current_token
-            self.use(token.type)
-            return BinaryOperator(
-                left=node,
-                op=token,
-                right=self.shift_expression(),
-                line=self.lexer.line
-            )
-        return node
-
-    def shift_expression(self):
-        node = self.additive_expression()
-        while self.current_token.type in (LEFT_OP, RIGHT_OP):
-            token = self.current_token
-            self.use(token.type)
-            return BinaryOperator(
-                left=node,
-                op=token,
-                right=self.additive_expression(),
-                line=self.lexer.line
-            )
-        return node
-
-    def additive_expression(self):
-        node = self.multiplicative_expression()
-
-        while self.current_token.type in (ADD_OP, SUB_OP):
-            token = self.current_token
-            self.use(token.type)
-            node = BinaryOperator(
-                left=node,
-                op=token,
-                right=self.multiplicative_expression(),
-                line=self.lexer.line
-            )
-
-        return node
-
-    def multiplicative_expression(self):
+    def binary_expression(self, power):
+        """ Precedence climbing over the operators binding at least as tight as `power` """
         node = self.cast_expression()
-        while self.current_token.type in (MUL_OP, DIV_OP, MOD_OP):
-            token = self.current_token
-            self.use(token.type)
-            node = BinaryOperator(
-                left=node,
-                op=token,
-                right=self.cast_expression(),
-                line=self.lexer.line
-            )
-        return node
+        while True:
+            token_type = self.type
+            token_power = BINARY_POWER.get(token_type)
+            if token_power is not None:
+                if token_power < power:
+                    return node
+                token = self.current_token
+                self.use(token_type)
+                node = self.node(
+                    BinaryOperator,
+                    node,
+                    left=node,
+                    op=self.operator(token),
+                    right=self.binary_expression(token_power + 1)
+                )
+            elif token_type == QUESTION_MARK:
+                if CONDITIONAL_POWER < power:
+                    return node
+                self.use(QUESTION_MARK)
+                texpression = self.expression()
+                self.use(COLON)
+                node = self.node(
+                    TernaryOperator,
+                    node,
+                    condition=node,
+                    texpression=texpression,
+                    fexpression=self.binary_expression(CONDITIONAL_POWER)
+                )
+            elif token_type in ASSIGNMENT_OPERATORS:
+                if ASSIGNMENT_POWER < power:
+                    return node
+                if not isinstance(node, Var):
+                    self.error("Expression is not assignable at line {}".format(self.line))
+                token = self.current_token
+                self.use(token_type)
+                node = self.node(
+                    Assign,
+                    node,
+                    left=node,
+                    op=self.operator(token),
+                    right=self.binary_expression(ASSIGNMENT_POWER)
+                )
+            else:
+                return node
 
     def parse(self):
         node = self.program()
-        if self.current_token.type != EOF:
-            self.error("Expected token <EOF> but found <{}>".format(self.current_token.type))
+        if self.type != EOF:
+            self.error("Expected token <EOF> but found <{}> at line {}".format(
+                self.type, self.line
+            ))
 
         return node
 
-    @restorable
     def check_cast_expression(self):
-        if self.current_token.type == LPAREN:
-            self.use(LPAREN)
-            if self.current_token.type in [CHAR, DOUBLE, INT, FLOAT]:
-                self.use(self.current_token.type)
-                return self.current_token.type == RPAREN
-        return False
+        return (
+            self.type == LPAREN and
+            self.peek(1) in (CHAR, DOUBLE, INT, FLOAT) and
+            self.peek(2) == RPAREN
+        )
 
     def cast_expression(self):
+        if self.type in (ID, INTEGER_CONST):
+            return self.postfix_expression()
         if self.check_cast_expression():
+            first = self.pos
             self.use(LPAREN)
-            type_node = self.type_spec()
+            type_token = self.current_token
+            self.type_spec()
             self.use(RPAREN)
-            return UnaryOperator(
-                op=type_node.token,
-                expr=self.cast_expression(),
-                line=self.lexer.line
+            return self.node(
+                UnaryOperator,
+                first,
+                op=self.operator(type_token),
+                expr=self.cast_expression()
             )
         else:
             return self.unary_expression()
 
     def unary_expression(self):
-        if self.current_token.type in (INC_OP, DEC_OP):
+        if self.type in (INC_OP, DEC_OP):
             token = self.current_token
             self.use(token.type)
-            return UnaryOperator(
-                op=token,
-                expr=self.unary_expression(),
-                line=self.lexer.line
+            return self.node(
+                UnaryOperator,
+                token,
+                op=self.operator(token),
+                expr=self.unary_expression()
             )
-        elif self.current_token.type in (AND_OP, ADD_OP, SUB_OP, LOG_NEG):
+        elif self.type in (AND_OP, ADD_OP, SUB_OP, LOG_NEG):
             token = self.current_token
             self.use(token.type)
-            return UnaryOperator(
-                op=token,
-                expr=self.cast_expression(),
-                line=self.lexer.line
+            return self.node(
+                UnaryOperator,
+                token,
+                op=self.operator(token),
+                expr=self.cast_expression()
             )
         else:
             return self.postfix_expression()
 
     def postfix_expression(self):
         node = self.primary_expression()
-        if self.current_token.type in (INC_OP, DEC_OP):
+        if self.type in (INC_OP, DEC_OP):
             token = self.current_token
             self.use(token.type)
-            node = UnaryOperator(
-                op=token,
+            node = self.node(
+                UnaryOperator,
+                node,
+                op=self.operator(token),
                 expr=node,
-                line=self.lexer.line,
                 prefix=False
             )
-        elif self.current_token.type == LPAREN:
+        elif self.type == LPAREN:
             self.use(LPAREN)
             args = list()
-            if not self.current_token.type == RPAREN:
+            if not self.type == RPAREN:
                 args = self.argument_expression_list()
             self.use(RPAREN)
             if not isinstance(node, Var):
-                self.error("Function identifier must be string")
-            node = FunctionCall(
+                self.error("Function identifier must be string at line {}".format(node.line))
+            node = self.node(
+                FunctionCall,
+                node,
                 name=node.value,
-                args=args,
-                line=self.lexer.line
+                args=args
             )
         return node
 
     def argument_expression_list(self):
         args = [self.assignment_expression()]
-        while self.current_token.type == COMMA:
+        while self.type == COMMA:
             self.use(COMMA)
             args.append(self.assignment_expression())
         return args
 
     def primary_expression(self):
-        token = self.current_token
-        if token.type == LPAREN:
+        token_type = self.type
+        if token_type == LPAREN:
             self.use(LPAREN)
             node = self.expression()
             self.use(RPAREN)
             return node
-        elif token.type in (INTEGER_CONST, REAL_CONST, CHAR_CONST):
+        elif token_type in (INTEGER_CONST, REAL_CONST, CHAR_CONST):
             return self.constant()
-        elif token.type == STRING:
+        elif token_type == STRING:
             return self.string()
         else:
             return self.variable()
@@ -582,52 +610,39 @@ class Parser(object):
         token = self.current_token
         if token.type == CHAR_CONST:
             self.use(CHAR_CONST)
-            return Num(
-                token=token,
-                line=self.lexer.line
-            )
+            return self.leaf(Num, token)
         elif token.type == INTEGER_CONST:
             self.use(INTEGER_CONST)
-            return Num(
-                token=token,
-                line=self.lexer.line
-            )
+            return self.leaf(Num, token)
         elif token.type == REAL_CONST:
             self.use(REAL_CONST)
-            return Num(
-                token=token,
-                line=self.lexer.line
-            )
+            return self.leaf(Num, token)
 
     def type_spec(self):
         token = self.current_token
         if token.type in (CHAR, INT, FLOAT, DOUBLE, VOID):
             self.use(token.type)
-            return Type(
-                token=token,
-                line=self.lexer.line
-            )
+            return self.leaf(Type, token)
 
     def variable(self):
-        node = Var(
-            token=self.current_token,
-            line=self.lexer.line
-        )
+        token = self.current_token
         self.use(ID)
-        return node
+        return self.node(
+            Var,
+            token,
+            token=token
+        )
 
     def empty(self):
-        return NoOp(
-            line=self.lexer.line
+        return self.node(
+            NoOp,
+            self.pos
         )
 
     def string(self):
         token = self.current_token
         self.use(STRING)
-        return String(
-            token=token,
-            line=self.lexer.line
-        )
+        return self.leaf(String, token)
 
 
 class SyntaxError(Exception):
@@ -1,91 +1,151 @@
 class Node(object):
+    # line and column of the first character and source offsets of the
+    # first and one past the last character, filled in by the parser
+    __slots__ = ('line', 'column', 'start', 'end')
+    _fields = ()
+
     def __init__(self, line):
         self.line = line
+        self.column = self.start = self.end = None
 
 
 class NoOp(Node):
-    pass
+    __slots__ = ()
 
 
 class Num(Node):
+    __slots__ = _fields = ('type', 'value')
+
     def __init__(self, token, line):
         Node.__init__(self, line)
-        self.token = token
+        self.type = token.type
         self.value = token.value
 
 
+class Constant(Node):
+    """ Number an expression evaluates to, worked out before the program runs """
+    __slots__ = _fields = ('number',)
+
+    def __init__(self, number, line):
+        Node.__init__(self, line)
+        self.number = number
+
+
 class String(Node):
+    __slots__ = _fields = ('value',)
+
     def __init__(self, token, line):
         Node.__init__(self, line)
-        self.token = token
         self.value = token.value
 
 
 class Type(Node):
+    __slots__ = _fields = ('value',)
+
     def __init__(self, token, line):
         Node.__init__(self, line)
-        self.token = token
         self.value = token.value
 
 
 class Var(Node):
+    # depth and slot: the address the semantic analyzer resolves it to
+    __slots__ = _fields = ('value', 'depth', 'slot')
+
     def __init__(self, token, line):
         Node.__init__(self, line)
-        self.token = token
         self.value = token.value
+        self.depth = self.slot = None
 
 
 class BinaryOperator(Node):
+    # ctype: type of the result, and operation: the Number operation
+    # specialized to it, both filled in by the semantic analyzer
+    __slots__ = _fields = ('left', 'op', 'right', 'ctype', 'operation')
+
     def __init__(self, left, op, right, line):
         Node.__init__(self, line)
         self.left = left
-        self.token = self.op = op
+        self.op = op
         self.right = right
+        self.ctype = self.operation = None
+
+    @property
+    def token(self):
+        return self.op
 
 
 class UnaryOperator(Node):
+    __slots__ = _fields = ('op', 'expr', 'prefix')
+
     def __init__(self, op, expr, line, prefix=True):
         Node.__init__(self, line)
-        self.token = self.op = op
+        self.op = op
         self.expr = expr
         self.prefix = prefix
 
+    @property
+    def token(self):
+        return self.op
+
 
 class TernaryOperator(Node):
+    # coerce: type the value of fexpression is converted to, if any
+    __slots__ = _fields = ('condition', 'texpression', 'fexpression', 'coerce')
+
     def __init__(self, condition, texpression, fexpression, line):
         Node.__init__(self, line)
         self.condition = condition
         self.texpression = texpression
         self.fexpression = fexpression
+        self.coerce = None
 
 
 class Assign(Node):
+    # coerce: type the assigned value is converted to, if any
+    __slots__ = _fields = ('left', 'op', 'right', 'coerce')
+
     def __init__(self, left, op, right, line):
         Node.__init__(self, line)
         self.left = left
-        self.token = self.op = op
+        self.op = op
         self.right = right
+        self.coerce = None
+
+    @property
+    def token(self):
+        return self.op
 
 
 class Expression(Node):
+    __slots__ = _fields = ('children',)
+
     def __init__(self, children, line):
         Node.__init__(self, line)
         self.children = children
 
 
 class FunctionCall(Node):
+    # coerce: types the arguments are converted to (None for those that
+    # are passed as they are), or None
+    __slots__ = _fields = ('name', 'args', 'coerce')
+
     def __init__(self, name, args, line):
         Node.__init__(self, line)
         self.name = name
         self.args = args
+        self.coerce = None
 
 class WhileStatement(Node):
+    __slots__ = _fields = ('condition', 'body')
+
     def __init__(self, condition, body, line):
         Node.__init__(self, line)
         self.condition = condition
         self.body = body
 
 class IfStatement(Node):
+    __slots__ = _fields = ('condition', 'tbody', 'fbody')
+
     def __init__(self, condition, tbody, line, fbody=None):
         Node.__init__(self, line)
         self.condition = condition
@@ -97,16 +157,22 @@ class IfStatement(Node):
 
 
 class DoWhileStatement(WhileStatement):
-    pass
+    __slots__ = ()
 
 
 class ReturnStmt(Node):
+    # coerce: type the returned value is converted to, if any
+    __slots__ = _fields = ('expression', 'coerce')
+
     def __init__(self, expression, line):
         Node.__init__(self, line)
         self.expression = expression
+        self.coerce = None
 
 
 class ForStatement(Node):
+    __slots__ = _fields = ('setup', 'condition', 'increment', 'body')
+
     def __init__(self, setup, condition, increment, body, line):
         Node.__init__(self, line)
         self.setup = setup
@@ -116,12 +182,16 @@ class ForStatement(Node):
 
 
 class CompoundStatement(Node):
+    __slots__ = _fields = ('children',)
+
     def __init__(self, children, line):
         Node.__init__(self, line)
         self.children = children
 
 
 class VarDeclaration(Node):
+    __slots__ = _fields = ('var_node', 'type_node')
+
     def __init__(self, var_node, type_node, line):
         Node.__init__(self, line)
         self.var_node = var_node
@@ -129,12 +199,16 @@ class VarDeclaration(Node):
 
 
 class IncludeLibrary(Node):
+    __slots__ = _fields = ('library_name',)
+
     def __init__(self, library_name, line):
         Node.__init__(self, line)
         self.library_name = library_name
 
 
 class Param(Node):
+    __slots__ = _fields = ('var_node', 'type_node')
+
     def __init__(self, type_node, var_node, line):
         Node.__init__(self, line)
         self.var_node = var_node
@@ -142,32 +216,67 @@ class Param(Node):
 
 
 class FunctionDeclaration(Node):
+    # frame_size: number of slots of its params and locals
+    __slots__ = _fields = ('type_node', 'func_name', 'params', 'body', 'frame_size')
+
     def __init__(self, type_node, func_name, params, body, line):
         Node.__init__(self, line)
         self.type_node = type_node
         self.func_name = func_name
         self.params = params
         self.body = body
+        self.frame_size = None
 
 
 class FunctionBody(Node):
+    __slots__ = _fields = ('children',)
+
     def __init__(self, children, line):
         Node.__init__(self, line)
         self.children = children
 
 
+class LazyFunctionBody(Node):
+    """ Unparsed body: `index` of its '{' in `tokens`
+
+    The semantic analyzer stores the scope of the function parameters in
+    `scope`, so that the body can be analyzed when it is parsed.
+    """
+    __slots__ = _fields = ('tokens', 'index', 'scope')
+
+    def __init__(self, tokens, index, line):
+        Node.__init__(self, line)
+        self.tokens = tokens
+        self.index = index
+        self.scope = None
+
+
 class Program(Node):
+    # global_size: number of slots of the global variables
+    __slots__ = _fields = ('children', 'global_size')
+
     def __init__(self, declarations, line):
         Node.__init__(self, line)
         self.children = declarations
+        self.global_size = None
 
 
 class BreakStatement(Node):
-    pass
+    __slots__ = ()
 
 
 class ContinueStatement(Node):
-    pass
+    __slots__ = ()
+
+
+# every concrete node class; the index of a class is its kind in an Arena
+NODE_CLASSES = (
+    NoOp, Num, String, Type, Var, BinaryOperator, UnaryOperator, TernaryOperator,
+    Assign, Expression, FunctionCall, WhileStatement, IfStatement, DoWhileStatement,
+    ReturnStmt, ForStatement, CompoundStatement, VarDeclaration, IncludeLibrary,
+    Param, FunctionDeclaration, FunctionBody, Program, BreakStatement, ContinueStatement,
+    LazyFunctionBody, Constant,
+)
 
 
 class NodeVisitor(object):
@@ -178,8 +287,3 @@ class NodeVisitor(object):
 
     def generic_visit(self, node):
         raise Exception('No visit_{} method'.format(type(node).__name__))
-
-
-
-
-
@@ -1 +1,3 @@
-from . import utils
\ No newline at end of file
+from . import utils
+from . import cache
+from . import registry
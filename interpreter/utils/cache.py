@@ -0,0 +1,173 @@
+import gc
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+from .. import __version__
+
+BUILTINS_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(__file__)), '__builtins__')
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser('~'), '.cache', 'cpyter')
+DEFAULT_MAX_SIZE = 64 << 20
+DEFAULT_TTL = 24 * 3600
+# temporary files older than this were left by a writer that died
+STALE_TEMPORARY = 3600
+
+_builtins_digest = None
+
+
+def builtins_digest():
+    """ Hash of the builtin library sources, computed once per process """
+    global _builtins_digest
+    if _builtins_digest is None:
+        digest = hashlib.sha256()
+        for name in sorted(os.listdir(BUILTINS_DIRECTORY)):
+            if name.endswith('.py'):
+                digest.update(name.encode())
+                with open(os.path.join(BUILTINS_DIRECTORY, name), 'rb') as file:
+                    digest.update(file.read())
+        _builtins_digest = digest.digest()
+    return _builtins_digest
+
+
+class Cache(object):
+    """ Pickled values on disk, one file per program
+
+    An entry is named by a hash of the program source, the interpreter
+    version, the Python implementation and the builtin libraries, so a
+    change to any of them misses. Entries are written to a temporary file
+    and renamed into place, so concurrent writers never expose a partial
+    entry; a hit refreshes the entry's mtime and the least recently used
+    entries are removed once those with this cache's suffix grow past
+    max_size bytes.
+    """
+    suffix = None
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    def key(self, source):
+        digest = hashlib.sha256()
+        for part in (__version__, sys.implementation.cache_tag):
+            digest.update(part.encode())
+            digest.update(b'\0')
+        digest.update(builtins_digest())
+        digest.update(source.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def load(self, key):
+        """ The value stored under key, or None """
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except OSError:
+            return None
+
+        # an entry can be many small objects that are all alive, so collecting
+        # while they are created only costs time
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            entry = pickle.loads(data)
+        except Exception:
+            self._remove(path)
+            return None
+        finally:
+            if enabled:
+                gc.enable()
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def store(self, key, entry):
+        """ Store entry under key; values that cannot be written are skipped """
+        try:
+            data = pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, RecursionError):
+            return
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as file:
+                    file.write(data)
+                os.replace(temporary, self.path(key))
+            except OSError:
+                self._remove(temporary)
+                raise
+        except OSError:
+            return
+        self.evict()
+
+    def evict(self):
+        """ Remove least recently used entries until the cache fits in max_size """
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+
+        now = time.time()
+        entries = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if name.endswith(self.suffix):
+                entries.append((stat.st_mtime, stat.st_size, path))
+            elif name.endswith('.tmp') and now - stat.st_mtime > STALE_TEMPORARY:
+                self._remove(path)
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        # another process may have removed it first
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class CompilationCache(Cache):
+    """ (tree, warnings) of analyzed programs, like __pycache__ for C sources """
+    suffix = '.ast'
+
+
+class ResultCache(Cache):
+    """ (output, status) of runs of input-free programs, kept for ttl seconds """
+    suffix = '.out'
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_size=DEFAULT_MAX_SIZE, ttl=DEFAULT_TTL):
+        Cache.__init__(self, directory, max_size)
+        self.ttl = ttl
+
+    def load(self, key):
+        entry = Cache.load(self, key)
+        if entry is None:
+            return None
+        created, output, status = entry
+        if time.time() - created > self.ttl:
+            self._remove(self.path(key))
+            return None
+        return output, status
+
+    def store(self, key, entry):
+        Cache.store(self, key, (time.time(),) + tuple(entry))
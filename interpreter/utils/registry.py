@@ -0,0 +1,22 @@
+from .utils import get_functions
+
+_libraries = {}
+
+
+class Context(object):
+    """ What builtins get as their first argument, besides their own args """
+    __slots__ = ('memory',)
+
+    def __init__(self, memory):
+        self.memory = memory
+
+
+def library(name):
+    """ name -> builtin function of a library, imported once per process """
+    functions = _libraries.get(name)
+    if functions is None:
+        functions = _libraries[name] = {
+            function.__name__: function
+            for function in get_functions('interpreter.__builtins__.{}'.format(name))
+        }
+    return functions
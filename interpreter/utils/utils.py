@@ -1,5 +1,3 @@
-from functools import wraps
-import pickle
 import importlib
 
 def import_module(libname):
@@ -13,25 +11,16 @@ def get_functions(module):
         if callable(func) and not func_name.startswith('__') and func.__module__.endswith(module):
             yield func
 
-def restorable(fn):
-    @wraps(fn)
-    def wrapper(self, *args, **kwargs):
-        state = pickle.dumps(self.__dict__)
-        result = fn(self, *args, **kwargs)
-        self.__dict__ = pickle.loads(state)
-        return result
-    return wrapper
-
-
-def definition(return_type=None, arg_types=[]):
-    def wrapper_decorator(fn):
-        @wraps(fn)
-        def wrapper(*args, **kwargs):
-            return fn(*args, **kwargs)
-        wrapper.return_type = return_type
-        wrapper.arg_types = arg_types
-        return wrapper
-    return wrapper_decorator
+def definition(return_type=None, arg_types=[], reads_input=False, pure=False):
+    """ Declare a builtin: it is called as fn(context, *args) with the raw
+    values of its args and returns a raw value of return_type """
+    def decorator(fn):
+        fn.return_type = return_type
+        fn.arg_types = arg_types
+        fn.reads_input = reads_input
+        fn.pure = pure
+        return fn
+    return decorator
 
 
 def get_name(name):
@@ -47,6 +36,24 @@ def get_name(name):
         )
 
 
+class Tee(object):
+    """ Text stream that writes through to `stream` and keeps a copy """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def getvalue(self):
+        return ''.join(self.parts)
+
+
 class MessageColor:
     HEADER = '\033[95m'
     OKBLUE = '\033[94m'
@@ -0,0 +1,3 @@
+from . import opcodes
+from . import compiler
+from . import machine
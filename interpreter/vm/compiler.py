@@ -0,0 +1,362 @@
+import functools
+import operator
+
+from ..interpreter.memory_mgmt import UNINITIALIZED
+from ..interpreter.number import Number, BINARY_FUNCTIONS, ASSIGN_FUNCTIONS, TESTS
+from ..lexer_analyzer.token_type import *
+from ..semantic_analyzer.mem import GLOBAL
+from ..syntax_analyzer.syntax_tree import *
+from .opcodes import *
+
+OPERATIONS = dict(
+    SS=OPERATION_SS, SL=OPERATION_SL, SC=OPERATION_SC,
+    LL=OPERATION_LL, LC=OPERATION_LC, CL=OPERATION_CL,
+)
+COMPARE_JUMPS = dict(
+    SS=COMPARE_JUMP_SS, SL=COMPARE_JUMP_SL, SC=COMPARE_JUMP_SC,
+    LL=COMPARE_JUMP_LL, LC=COMPARE_JUMP_LC, CL=COMPARE_JUMP_CL,
+)
+# nodes that have no value
+STATEMENTS = (IfStatement, WhileStatement, ForStatement, CompoundStatement, VarDeclaration)
+
+ONE = Number('int', 1)
+ZERO = Number('int', 0)
+negate = functools.partial(operator.mul, Number('int', -1))
+
+
+class Code(object):
+    """ Bytecode of a function
+
+    code holds the instructions as opcode, argument pairs, flat; consts
+    is the constant pool that arguments index.
+    """
+    __slots__ = ('name', 'code', 'consts', 'frame_size')
+
+    def __init__(self, name, code, consts, frame_size):
+        self.name = name
+        self.code = code
+        self.consts = consts
+        self.frame_size = frame_size
+
+    def __str__(self):
+        lines = ['code {} frame {}'.format(self.name, self.frame_size)]
+        for position in range(0, len(self.code), 2):
+            opcode, arg = self.code[position:position + 2]
+            if opcode in POOLED:
+                arg = '{} ({!r})'.format(arg, self.consts[arg])
+            lines.append('{:>6} {:<18} {}'.format(position, NAMES[opcode], arg))
+        return '\n'.join(lines)
+
+
+class Compiler(NodeVisitor):
+    """ Compiles a function of an analyzed tree to bytecode
+
+    visit_ methods emit code that pushes the value of an expression;
+    statement emits code that runs a node for its effects and leaves the
+    stack as it was, and branch code that jumps on the truth of a
+    condition. Variables are read and written by the slot the analyzer
+    gave them, and operators the analyzer specialized are fused with the
+    variables and constants they read.
+
+    The code does what the interpreter does, in the same order: only a
+    return at the top level of the body ends the call, and nodes the
+    interpreter has no visit_ method for raise when they run.
+    """
+
+    def __init__(self):
+        self.code = []
+        self.consts = []
+        self.indices = {}
+
+    @staticmethod
+    def function(node):
+        """ Code of a FunctionDeclaration whose body is parsed """
+        compiler = Compiler()
+        for child in node.body.children:
+            if isinstance(child, ReturnStmt):
+                compiler.visit(child)
+                compiler.emit(RETURN)
+                break
+            compiler.statement(child)
+        else:
+            compiler.emit(LOAD_CONST, compiler.const(None))
+            compiler.emit(RETURN)
+        return Code(node.func_name, compiler.code, compiler.consts, node.frame_size)
+
+    @staticmethod
+    def program(tree):
+        """ Code of the statements of a program outside its functions """
+        compiler = Compiler()
+        for node in tree.children:
+            if not isinstance(node, (FunctionDeclaration, IncludeLibrary)):
+                compiler.statement(node)
+        compiler.emit(LOAD_CONST, compiler.const(None))
+        compiler.emit(RETURN)
+        return Code('<globals>', compiler.code, compiler.consts, tree.global_size)
+
+    def emit(self, opcode, arg=0):
+        self.code += (opcode, arg)
+        return len(self.code) - 2
+
+    def const(self, value):
+        """ Index of value in the constant pool """
+        index = self.indices.get(id(value))
+        if index is None:
+            index = self.indices[id(value)] = len(self.consts)
+            self.consts.append(value)
+        return index
+
+    def place(self, jumps, target=None):
+        """ Make the jumps at the positions given go to target, by default
+        the next instruction """
+        if target is None:
+            target = len(self.code)
+        for position in jumps:
+            if self.code[position] in (JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE):
+                self.code[position + 1] = target
+            else:
+                self.consts[self.code[position + 1]][-1] = target
+
+    def generic_visit(self, node):
+        self.emit(FAIL, self.const('No visit_{} method'.format(type(node).__name__)))
+
+    def statement(self, node):
+        if isinstance(node, STATEMENTS):
+            self.visit(node)
+        elif isinstance(node, Assign):
+            self.assign(node, False)
+        elif isinstance(node, UnaryOperator) and node.op.type in (INC_OP, DEC_OP):
+            self.update(node, False)
+        elif isinstance(node, Expression):
+            for child in node.children:
+                self.statement(child)
+        elif not isinstance(node, NoOp):
+            self.visit(node)
+            self.emit(POP)
+
+    def branch(self, node, when):
+        """ Code that jumps when the truth of node is when; returns the
+        positions of the jumps, for place """
+        if isinstance(node, Expression) and node.children and not isinstance(node.children[-1], STATEMENTS):
+            for child in node.children[:-1]:
+                self.statement(child)
+            node = node.children[-1]
+        if isinstance(node, BinaryOperator):
+            op = node.op.type
+            if op in (LOG_AND_OP, LOG_OR_OP):
+                if (op == LOG_AND_OP) != when:
+                    # either operand decides
+                    return self.branch(node.left, when) + self.branch(node.right, when)
+                decided = self.branch(node.left, not when)
+                jumps = self.branch(node.right, when)
+                self.place(decided)
+                return jumps
+            if node.operation is not None and node.operation.function in TESTS:
+                form, reads = self.operands(node)
+                pooled = list(reads) + [TESTS[node.operation.function], when, None]
+                return [self.emit(COMPARE_JUMPS[form], self.const(pooled))]
+        elif isinstance(node, NoOp):
+            # the interpreter tests None, which is false
+            return [] if when else [self.emit(JUMP)]
+        self.visit(node)
+        return [self.emit(JUMP_IF_TRUE if when else JUMP_IF_FALSE)]
+
+    def operand(self, node):
+        """ Form and slot or value of an operand an instruction can read
+        itself, None for one whose code must push it """
+        if isinstance(node, Var) and node.depth != GLOBAL:
+            return 'L', node.slot
+        if isinstance(node, Num):
+            return 'C', self.number(node).value
+        if isinstance(node, Constant):
+            return 'C', node.number.value
+        return None
+
+    def operands(self, node):
+        """ Emit the code of the operands of a binary operator that the
+        instruction cannot read itself; return its form and what it reads """
+        left, right = self.operand(node.left), self.operand(node.right)
+        # the left operand is read before the right one is evaluated
+        if left is not None and right is not None and left[0] + right[0] != 'CC':
+            return left[0] + right[0], (left[1], right[1])
+        self.visit(node.left)
+        if right is not None:
+            return 'S' + right[0], (right[1],)
+        self.visit(node.right)
+        return 'SS', ()
+
+    def load(self, var):
+        self.emit(LOAD_GLOBAL if var.depth == GLOBAL else LOAD_LOCAL, var.slot)
+
+    def store(self, var):
+        self.emit(STORE_GLOBAL if var.depth == GLOBAL else STORE_LOCAL, var.slot)
+
+    @staticmethod
+    def number(node):
+        if node.type == INTEGER_CONST:
+            return Number('int', node.value)
+        elif node.type == CHAR_CONST:
+            return Number('char', node.value)
+        return Number('float', node.value)
+
+    def visit_NoOp(self, node):
+        self.emit(LOAD_CONST, self.const(None))
+
+    def visit_Num(self, node):
+        self.emit(LOAD_CONST, self.const(self.number(node)))
+
+    def visit_Constant(self, node):
+        self.emit(LOAD_CONST, self.const(node.number))
+
+    def visit_String(self, node):
+        self.emit(LOAD_CONST, self.const(node.value))
+
+    def visit_Var(self, node):
+        self.load(node)
+
+    def visit_VarDeclaration(self, node):
+        self.emit(LOAD_CONST, self.const(UNINITIALIZED))
+        self.store(node.var_node)
+
+    def visit_BinaryOperator(self, node):
+        op = node.op.type
+        if op in (LOG_AND_OP, LOG_OR_OP):
+            jumps = self.branch(node, False)
+            self.emit(LOAD_CONST, self.const(ONE))
+            end = self.emit(JUMP)
+            self.place(jumps)
+            self.emit(LOAD_CONST, self.const(ZERO))
+            self.place([end])
+        elif node.operation is not None:
+            form, reads = self.operands(node)
+            pooled = reads + (node.operation.function, node.operation.type)
+            self.emit(OPERATIONS[form], self.const(pooled))
+        elif op in BINARY_FUNCTIONS:
+            self.visit(node.left)
+            self.visit(node.right)
+            self.emit(BINARY, self.const(BINARY_FUNCTIONS[op]))
+        else:
+            # fails when it runs, not when the program is compiled
+            self.emit(FAIL, self.const('No binary operator {}'.format(node.op.value)))
+
+    def update(self, node, keep):
+        """ ++ and --; keep: push the value of the expression """
+        var = node.expr
+        increment = node.op.type == INC_OP
+        if not keep:
+            if var.depth == GLOBAL:
+                self.emit(INCREMENT_GLOBAL if increment else DECREMENT_GLOBAL, var.slot)
+            else:
+                self.emit(INCREMENT_LOCAL if increment else DECREMENT_LOCAL, var.slot)
+            return
+        self.load(var)
+        if not node.prefix:
+            self.emit(DUP)
+        self.emit(LOAD_CONST, self.const(ONE))
+        self.emit(BINARY, self.const(operator.iadd if increment else operator.isub))
+        if node.prefix:
+            self.emit(DUP)
+        self.store(var)
+
+    def visit_UnaryOperator(self, node):
+        op = node.op.type
+        if op in (INC_OP, DEC_OP):
+            self.update(node, True)
+        elif not node.prefix or op == ADD_OP:
+            self.visit(node.expr)
+        elif op == AND_OP:
+            self.emit(LOAD_CONST, self.const((node.expr.depth, node.expr.slot)))
+        elif op == SUB_OP:
+            self.visit(node.expr)
+            self.emit(UNARY, self.const(negate))
+        elif op == LOG_NEG:
+            self.visit(node.expr)
+            self.emit(UNARY, self.const(Number._not))
+        else:
+            self.visit(node.expr)
+            self.emit(CAST, self.const(node.op.value))
+
+    def assign(self, node, keep):
+        """ keep: push the value of the assignment """
+        function = ASSIGN_FUNCTIONS.get(node.op.type)
+        if function is not None:
+            self.load(node.left)
+            self.visit(node.right)
+            self.emit(BINARY, self.const(function))
+        else:
+            self.visit(node.right)
+            if node.coerce is not None:
+                self.emit(CAST, self.const(node.coerce))
+        if keep:
+            self.emit(DUP)
+        self.store(node.left)
+
+    def visit_Assign(self, node):
+        self.assign(node, True)
+
+    def visit_Expression(self, node):
+        if not node.children:
+            self.emit(LOAD_CONST, self.const(None))
+            return
+        for child in node.children[:-1]:
+            self.statement(child)
+        last = node.children[-1]
+        if isinstance(last, STATEMENTS):
+            self.statement(last)
+            self.emit(LOAD_CONST, self.const(None))
+        else:
+            self.visit(last)
+
+    def visit_FunctionCall(self, node):
+        for arg in node.args:
+            self.visit(arg)
+        coerce = tuple(node.coerce) if node.coerce is not None else None
+        self.emit(CALL, self.const((node.name, len(node.args), coerce)))
+
+    def visit_TernaryOperator(self, node):
+        jumps = self.branch(node.condition, False)
+        self.visit(node.texpression)
+        end = self.emit(JUMP)
+        self.place(jumps)
+        self.visit(node.fexpression)
+        # as in the interpreter, only the false value is coerced
+        if node.coerce is not None:
+            self.emit(CAST, self.const(node.coerce))
+        self.place([end])
+
+    def visit_ReturnStmt(self, node):
+        self.visit(node.expression)
+        if node.coerce is not None:
+            self.emit(CAST, self.const(node.coerce))
+
+    def visit_CompoundStatement(self, node):
+        for child in node.children:
+            self.statement(child)
+
+    def visit_IfStatement(self, node):
+        jumps = self.branch(node.condition, False)
+        self.statement(node.tbody)
+        if isinstance(node.fbody, NoOp):
+            self.place(jumps)
+            return
+        end = self.emit(JUMP)
+        self.place(jumps)
+        self.statement(node.fbody)
+        self.place([end])
+
+    def visit_WhileStatement(self, node):
+        self.loop(node.condition, node.body, None)
+
+    def visit_ForStatement(self, node):
+        self.statement(node.setup)
+        self.loop(node.condition, node.body, node.increment)
+
+    def loop(self, condition, body, increment):
+        # the condition is at the bottom, so an iteration takes one jump
+        start = self.emit(JUMP)
+        top = len(self.code)
+        self.statement(body)
+        if increment is not None:
+            self.statement(increment)
+        self.place([start])
+        self.place(self.branch(condition, True), top)
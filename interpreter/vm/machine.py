@@ -0,0 +1,222 @@
+from ..interpreter.memory_mgmt import Memory
+from ..interpreter.number import Number, box
+from ..semantic_analyzer.analyzer import SemanticAnalyzer
+from ..syntax_analyzer.syntax_tree import FunctionDeclaration, IncludeLibrary, LazyFunctionBody
+from ..utils.registry import Context, library
+from .compiler import Code, Compiler, ONE
+from .opcodes import *
+
+
+class Machine(object):
+    """ Runs a program compiled to bytecode, as the interpreter runs its tree
+
+    A function is compiled on its first call, after its body is parsed if
+    the program was parsed lazily. dump: a file the code of each function
+    is printed to when it is compiled.
+    """
+
+    def __init__(self, dump=None):
+        self.memory = Memory()
+        self.context = Context(self.memory)
+        self.functions = {}
+        # name -> Code of a compiled function, or a builtin
+        self.codes = {}
+        self.dump = dump
+        # the interpreter's memos; calls are not memoized here
+        self.memos = {}
+
+    def interpret(self, tree):
+        for node in tree.children:
+            if isinstance(node, IncludeLibrary):
+                self.functions.update(library(node.library_name))
+            elif isinstance(node, FunctionDeclaration):
+                self.functions[node.func_name] = node
+        self.memory = Memory(tree.global_size)
+        self.context = Context(self.memory)
+        self.execute(self.compiled(Compiler.program(tree)), self.memory.globals)
+        return self.call('main', [])
+
+    def compiled(self, code):
+        if self.dump is not None:
+            print(code, file=self.dump, end='\n\n')
+        return code
+
+    def load(self, name):
+        function = self.functions[name]
+        if isinstance(function, FunctionDeclaration):
+            if isinstance(function.body, LazyFunctionBody):
+                SemanticAnalyzer.load_body(function)
+            function = self.compiled(Compiler.function(function))
+        self.codes[name] = function
+        return function
+
+    def call(self, name, args):
+        function = self.codes.get(name) or self.load(name)
+        if type(function) is Code:
+            memory = self.memory
+            # params have the first slots of the frame
+            memory.new_frame(name, function.frame_size)
+            memory.locals[:len(args)] = args
+            res = self.execute(function, memory.locals)
+            memory.del_frame()
+            return res
+        # builtins take raw values; addresses and strings are passed as is
+        return box(function.return_type, function(self.context, *[
+            arg.value if type(arg) is Number else arg for arg in args
+        ]))
+
+    def execute(self, code, local):
+        """ Run code with the slots of its frame, and return its value """
+        instructions = code.code
+        consts = code.consts
+        memory = self.memory
+        new = object.__new__
+        types = Number.types
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+        # the most frequent opcodes are tested first
+        while True:
+            op = instructions[pc]
+            arg = instructions[pc + 1]
+            pc += 2
+            if op == LOAD_LOCAL:
+                push(local[arg])
+            elif op == OPERATION_LC:
+                slot, value, function, ttype = consts[arg]
+                number = new(Number)
+                number.type = ttype
+                number.value = function(local[slot].value, value)
+                push(number)
+            elif op == OPERATION_SS:
+                function, ttype = consts[arg]
+                right = pop()
+                number = new(Number)
+                number.type = ttype
+                number.value = function(stack[-1].value, right.value)
+                stack[-1] = number
+            elif op == STORE_LOCAL:
+                local[arg] = pop()
+            elif op == OPERATION_LL:
+                left, right, function, ttype = consts[arg]
+                number = new(Number)
+                number.type = ttype
+                number.value = function(local[left].value, local[right].value)
+                push(number)
+            elif op == OPERATION_SL:
+                slot, function, ttype = consts[arg]
+                number = new(Number)
+                number.type = ttype
+                number.value = function(stack[-1].value, local[slot].value)
+                stack[-1] = number
+            elif op == OPERATION_SC:
+                value, function, ttype = consts[arg]
+                number = new(Number)
+                number.type = ttype
+                number.value = function(stack[-1].value, value)
+                stack[-1] = number
+            elif op == COMPARE_JUMP_LL:
+                left, right, test, when, target = consts[arg]
+                if test(local[left].value, local[right].value) is when:
+                    pc = target
+            elif op == COMPARE_JUMP_LC:
+                slot, value, test, when, target = consts[arg]
+                if test(local[slot].value, value) is when:
+                    pc = target
+            elif op == INCREMENT_LOCAL or op == DECREMENT_LOCAL:
+                value = local[arg]
+                if type(value) is Number:
+                    # what += Number('int', 1) makes of a Number
+                    number = new(Number)
+                    number.type = value.type
+                    value = types[value.type](value.value)
+                    number.value = value + 1 if op == INCREMENT_LOCAL else value - 1
+                    local[arg] = number
+                else:
+                    # raises, as += does in the interpreter
+                    if op == INCREMENT_LOCAL:
+                        value += ONE
+                    else:
+                        value -= ONE
+                    local[arg] = value
+            elif op == JUMP:
+                pc = arg
+            elif op == LOAD_CONST:
+                push(consts[arg])
+            elif op == COMPARE_JUMP_SS:
+                test, when, target = consts[arg]
+                right = pop()
+                if test(pop().value, right.value) is when:
+                    pc = target
+            elif op == COMPARE_JUMP_SL:
+                slot, test, when, target = consts[arg]
+                if test(pop().value, local[slot].value) is when:
+                    pc = target
+            elif op == COMPARE_JUMP_SC:
+                value, test, when, target = consts[arg]
+                if test(pop().value, value) is when:
+                    pc = target
+            elif op == JUMP_IF_FALSE:
+                if not pop():
+                    pc = arg
+            elif op == JUMP_IF_TRUE:
+                if pop():
+                    pc = arg
+            elif op == LOAD_GLOBAL:
+                push(memory.globals[arg])
+            elif op == STORE_GLOBAL:
+                memory.globals[arg] = pop()
+            elif op == CALL:
+                name, count, coerce = consts[arg]
+                if count:
+                    args = stack[-count:]
+                    del stack[-count:]
+                else:
+                    args = []
+                if coerce is not None:
+                    args = [
+                        arg if ttype is None else Number(ttype, arg.value)
+                        for ttype, arg in zip(coerce, args)
+                    ]
+                push(self.call(name, args))
+            elif op == RETURN:
+                return pop()
+            elif op == BINARY:
+                right = pop()
+                stack[-1] = consts[arg](stack[-1], right)
+            elif op == DUP:
+                push(stack[-1])
+            elif op == POP:
+                pop()
+            elif op == OPERATION_CL:
+                value, slot, function, ttype = consts[arg]
+                number = new(Number)
+                number.type = ttype
+                number.value = function(value, local[slot].value)
+                push(number)
+            elif op == COMPARE_JUMP_CL:
+                value, slot, test, when, target = consts[arg]
+                if test(value, local[slot].value) is when:
+                    pc = target
+            elif op == UNARY:
+                stack[-1] = consts[arg](stack[-1])
+            elif op == CAST:
+                stack[-1] = Number(consts[arg], stack[-1].value)
+            elif op == INCREMENT_GLOBAL or op == DECREMENT_GLOBAL:
+                value = memory.globals[arg]
+                if type(value) is Number:
+                    number = new(Number)
+                    number.type = value.type
+                    value = types[value.type](value.value)
+                    number.value = value + 1 if op == INCREMENT_GLOBAL else value - 1
+                    memory.globals[arg] = number
+                else:
+                    # raises, as += does in the interpreter
+                    if op == INCREMENT_GLOBAL:
+                        value += ONE
+                    else:
+                        value -= ONE
+                    memory.globals[arg] = value
+            elif op == FAIL:
+                raise Exception(consts[arg])
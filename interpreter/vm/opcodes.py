@@ -0,0 +1,71 @@
+""" Opcodes of the bytecode
+
+Each instruction is two words of Code.code: the opcode and its argument,
+a slot of a variable, a jump target (an index into code) or an index
+into the constant pool of the Code. Instructions with more operands than
+that keep them in a tuple in the pool, and fused jumps their target too,
+in a list the compiler patches when it places the label.
+
+Operand letters: L a local slot, C a constant value, S the stack.
+"""
+
+# loads and stores
+LOAD_LOCAL = 0          # slot
+LOAD_GLOBAL = 1         # slot
+LOAD_CONST = 2          # pool index
+STORE_LOCAL = 3         # slot; pops the value
+STORE_GLOBAL = 4        # slot
+DUP = 5
+POP = 6
+
+# operations the analyzer specialized; the pool holds
+# (function, result type), with the slots and constant values first
+OPERATION_SS = 7        # both operands popped
+OPERATION_SL = 8        # left popped, right a local
+OPERATION_SC = 9        # left popped, right a constant
+OPERATION_LL = 10
+OPERATION_LC = 11
+OPERATION_CL = 12
+
+# the condition of a jump is a comparison whose Number is never made; the
+# pool holds [operands..., comparison, value it jumps on, target]
+COMPARE_JUMP_SS = 13
+COMPARE_JUMP_SL = 14
+COMPARE_JUMP_SC = 15
+COMPARE_JUMP_LL = 16
+COMPARE_JUMP_LC = 17
+COMPARE_JUMP_CL = 18
+
+# ++ and -- whose value is not used
+INCREMENT_LOCAL = 19    # slot
+DECREMENT_LOCAL = 20
+INCREMENT_GLOBAL = 21
+DECREMENT_GLOBAL = 22
+
+JUMP = 23               # target
+JUMP_IF_FALSE = 24      # target; pops the condition
+JUMP_IF_TRUE = 25
+
+BINARY = 26             # pool index of a function of two Numbers
+UNARY = 27              # pool index of a function of a Number
+CAST = 28               # pool index of a type name
+CALL = 29               # pool index of (name, number of args, coerce)
+RETURN = 30             # pops the value
+FAIL = 31               # pool index of the message of the exception
+
+NAMES = (
+    'LOAD_LOCAL', 'LOAD_GLOBAL', 'LOAD_CONST', 'STORE_LOCAL', 'STORE_GLOBAL', 'DUP', 'POP',
+    'OPERATION_SS', 'OPERATION_SL', 'OPERATION_SC', 'OPERATION_LL', 'OPERATION_LC', 'OPERATION_CL',
+    'COMPARE_JUMP_SS', 'COMPARE_JUMP_SL', 'COMPARE_JUMP_SC', 'COMPARE_JUMP_LL', 'COMPARE_JUMP_LC',
+    'COMPARE_JUMP_CL',
+    'INCREMENT_LOCAL', 'DECREMENT_LOCAL', 'INCREMENT_GLOBAL', 'DECREMENT_GLOBAL',
+    'JUMP', 'JUMP_IF_FALSE', 'JUMP_IF_TRUE',
+    'BINARY', 'UNARY', 'CAST', 'CALL', 'RETURN', 'FAIL',
+)
+
+# arguments that are indices into the constant pool
+POOLED = (
+    LOAD_CONST, OPERATION_SS, OPERATION_SL, OPERATION_SC, OPERATION_LL, OPERATION_LC, OPERATION_CL,
+    COMPARE_JUMP_SS, COMPARE_JUMP_SL, COMPARE_JUMP_SC, COMPARE_JUMP_LL, COMPARE_JUMP_LC,
+    COMPARE_JUMP_CL, BINARY, UNARY, CAST, CALL, FAIL,
+)
@@ -0,0 +1,27 @@
+import pytest
+
+from interpreter.interpreter.interpreter import Interpreter
+from interpreter.syntax_analyzer.syntax_tree import Node
+
+
+@pytest.fixture
+def run(capsys):
+    """ run(source, **options): the stdout of Interpreter.run """
+    def run(source, **options):
+        Interpreter.run(source, **options)
+        return capsys.readouterr().out
+    return run
+
+
+@pytest.fixture
+def dump():
+    """ dump(tree): nested tuples of the classes, locations and fields of a tree """
+    def dump(node):
+        if isinstance(node, list):
+            return [dump(item) for item in node]
+        if not isinstance(node, Node):
+            return getattr(node, 'type', None), getattr(node, 'value', node)
+        return (type(node).__name__, node.line, node.column, node.start, node.end) + tuple(
+            dump(getattr(node, field)) for field in node._fields
+        )
+    return dump
@@ -0,0 +1,17 @@
+import pytest
+
+CAST = '''
+#include <stdio.h>
+void main() {
+    int a = 7, b = 2;
+    double d = (double) a / b;
+    int m = (int) 7.5 % b;
+    printf("%f %d", d, m);
+}
+'''
+
+
+@pytest.mark.parametrize('mode', ['', 'optimize', 'ir', 'vm', 'closures'])
+def test_cast_selects_operation(run, mode):
+    options = {mode: True} if mode else {}
+    assert run(CAST, **options).startswith('3.500000 1\n')
@@ -0,0 +1,62 @@
+""" Differential tests: every mode prints what the tree interpreter prints """
+import glob
+import io
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROGRAMS = dict(
+    (os.path.basename(path), path) for path in glob.glob(os.path.join(ROOT, 'test_*.c'))
+)
+# programs that broke a mode
+SOURCES = {
+    'lazy-global': '''
+        #include <stdio.h>
+        int g = 5;
+        int f() { return g; }
+        void main() { printf("%d", f()); }
+    ''',
+    'unexecuted-shift': '''
+        #include <stdio.h>
+        void main() {
+            int x;
+            x = 1;
+            if (x > 5) { x = x << 1; }
+            printf("%d", x);
+        }
+    ''',
+}
+# enough lines for the scanf calls of any of them
+INPUT = '7\n3\n'
+
+MODES = {
+    'lazy': dict(lazy=True),
+    'optimize': dict(optimize=True),
+    'lazy-optimize': dict(lazy=True, optimize=True),
+    'memoize': dict(memoize=True),
+    'ir': dict(ir=True),
+    'vm': dict(vm=True),
+    'closures': dict(closures=True),
+}
+
+
+@pytest.fixture
+def output(run, monkeypatch):
+    def output(source, **options):
+        monkeypatch.setattr('sys.stdin', io.StringIO(INPUT))
+        return run(source, **options)
+    return output
+
+
+@pytest.mark.parametrize('mode', sorted(MODES))
+@pytest.mark.parametrize('name', sorted(PROGRAMS) + sorted(SOURCES))
+def test_same_output(output, name, mode):
+    if name in SOURCES:
+        source = SOURCES[name]
+    else:
+        with open(PROGRAMS[name]) as file:
+            source = file.read()
+    expected = output(source)
+    assert 'status -1' not in expected
+    assert output(source, **MODES[mode]) == expected
@@ -0,0 +1,51 @@
+from interpreter.interpreter.interpreter import Interpreter
+from interpreter.utils.cache import CompilationCache, ResultCache
+
+PROGRAM = '''
+#include <stdio.h>
+void main() { printf("%d", 6 * 7); }
+'''
+
+
+def test_cached_output(run, tmp_path):
+    results = ResultCache(str(tmp_path))
+    first = run(PROGRAM, results=results)
+    assert first.startswith('42')
+    assert run(PROGRAM, results=results) == first
+
+
+def test_stats_bypass_cached_output(capsys, tmp_path):
+    results = ResultCache(str(tmp_path))
+    Interpreter.run(PROGRAM, results=results)
+    capsys.readouterr()
+    Interpreter.run(PROGRAM, results=results, optimize=True, opt_stats=True)
+    assert 'Constant folding removed' in capsys.readouterr().err
+
+
+def test_compilation_cache_misses_changed_source(run, tmp_path):
+    cache = CompilationCache(str(tmp_path))
+    assert run(PROGRAM, cache=cache).startswith('42')
+    assert cache.load(cache.key(PROGRAM)) is not None
+    changed = PROGRAM.replace('6 * 7', '6 * 8')
+    assert cache.load(cache.key(changed)) is None
+    assert run(changed, cache=cache).startswith('48')
+
+
+def test_compilation_cache_keeps_unoptimized_trees(run, capsys, tmp_path):
+    cache = CompilationCache(str(tmp_path))
+    for _ in range(2):
+        Interpreter.run(PROGRAM, cache=cache, optimize=True, opt_stats=True)
+        assert 'Constant folding removed 3 nodes' in capsys.readouterr().err
+    assert run(PROGRAM, cache=cache).startswith('42')
+
+
+def test_result_cache_misses_changed_source(run, tmp_path):
+    results = ResultCache(str(tmp_path))
+    run(PROGRAM, results=results)
+    assert run(PROGRAM.replace('6 * 7', '6 * 8'), results=results).startswith('48')
+
+
+def test_result_cache_expires(run, tmp_path):
+    results = ResultCache(str(tmp_path), ttl=-1)
+    run(PROGRAM, results=results)
+    assert results.load(results.key(PROGRAM)) is None
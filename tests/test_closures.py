@@ -0,0 +1,16 @@
+SHIFT = '''
+#include <stdio.h>
+void main() {
+    int x;
+    x = 1;
+    if (x > 5) { x = x << 1; }
+    printf("%d", x);
+    x = x >> 1;
+}
+'''
+
+
+def test_unsupported_operator_fails_when_run(run):
+    output = run(SHIFT, closures=True)
+    assert output.startswith('1')
+    assert 'No binary operator >>' in output
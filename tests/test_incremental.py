@@ -0,0 +1,116 @@
+from interpreter.interpreter.interpreter import Interpreter
+from interpreter.lexer_analyzer.lexer import Lexer
+from interpreter.syntax_analyzer.parser import Parser
+from interpreter.semantic_analyzer.analyzer import SemanticAnalyzer
+from interpreter.semantic_analyzer.incremental import IncrementalAnalyzer
+
+SOURCE = '''#include <stdio.h>
+int total = 0;
+double scale = 2.0;
+int add(int n) {
+    total = total + n;
+    return total;
+}
+int twice(int n) {
+    int result;
+    result = n * 2;
+    return result;
+}
+int half(int n) {
+    char c = scale;
+    return n / 2;
+}
+void main() {
+    printf("%d %d %d", add(3), twice(4), half(10));
+}
+'''
+
+
+def parse(text):
+    return Parser(Lexer(text).tokenize()).parse()
+
+
+def analyze(analyzer, text):
+    tree = parse(text)
+    warnings = analyzer.analyze(tree, text)
+    return tree, warnings
+
+
+def full(text):
+    tree = parse(text)
+    return tree, SemanticAnalyzer.analyze(tree)
+
+
+def test_first_analysis_visits_every_function(capsys):
+    analyzer = IncrementalAnalyzer()
+    analyze(analyzer, SOURCE)
+    assert analyzer.reanalyzed == ['add', 'twice', 'half', 'main']
+
+
+def test_edit_reanalyzes_only_the_edited_function(dump, capsys):
+    analyzer = IncrementalAnalyzer()
+    analyze(analyzer, SOURCE)
+    # adds a line to twice, moving half and main down
+    text = SOURCE.replace('result = n * 2;', 'result = n * 2;\n    result = result + 1;')
+    tree, warnings = analyze(analyzer, text)
+    # main calls twice, whose signature is the same
+    assert analyzer.reanalyzed == ['twice']
+    expected, expected_warnings = full(text)
+    assert dump(tree) == dump(expected)
+    assert warnings == expected_warnings
+
+
+def test_unchanged_program_reuses_every_function(capsys):
+    analyzer = IncrementalAnalyzer()
+    analyze(analyzer, SOURCE)
+    analyze(analyzer, SOURCE)
+    assert analyzer.reanalyzed == []
+
+
+def test_moved_global_slot_reanalyzes_functions_that_use_it(capsys):
+    analyzer = IncrementalAnalyzer()
+    analyze(analyzer, SOURCE)
+    text = SOURCE.replace('int total = 0;', 'int total = 0;\nint unused;')
+    analyze(analyzer, text)
+    # scale moves to another slot, total keeps its own
+    assert analyzer.reanalyzed == ['half']
+
+
+def test_changed_global_reanalyzes_functions_that_use_it(dump, capsys):
+    analyzer = IncrementalAnalyzer()
+    analyze(analyzer, SOURCE)
+    text = SOURCE.replace('double scale = 2.0;', 'char scale = 2;')
+    tree, warnings = analyze(analyzer, text)
+    assert analyzer.reanalyzed == ['half']
+    expected, expected_warnings = full(text)
+    assert dump(tree) == dump(expected)
+    assert warnings == expected_warnings
+
+
+def test_changed_signature_reanalyzes_callers(capsys):
+    analyzer = IncrementalAnalyzer()
+    analyze(analyzer, SOURCE)
+    text = SOURCE.replace('int twice(int n)', 'int twice(double n)')
+    analyze(analyzer, text)
+    assert analyzer.reanalyzed == ['twice', 'main']
+
+
+def test_reused_warnings_move_with_their_function(capsys):
+    analyzer = IncrementalAnalyzer()
+    _, warnings = analyze(analyzer, SOURCE)
+    assert warnings
+    text = SOURCE.replace('int total = 0;', '/* the sum\n   so far */\nint total = 0;')
+    _, moved = analyze(analyzer, text)
+    assert analyzer.reanalyzed == []
+    assert moved == full(text)[1]
+    assert moved != warnings
+
+
+def test_reanalyzed_tree_runs_like_a_full_analysis(capsys):
+    analyzer = IncrementalAnalyzer()
+    analyze(analyzer, SOURCE)
+    text = SOURCE.replace('return n / 2;', 'return n / 2 + 1;')
+    tree, _ = analyze(analyzer, text)
+    capsys.readouterr()
+    Interpreter().interpret(tree)
+    assert capsys.readouterr().out.startswith('3 8 6')
@@ -0,0 +1,48 @@
+from interpreter.ir.analysis import reaching_definitions
+from interpreter.ir.cfg import Const, Function, Instruction
+from interpreter.semantic_analyzer.mem import LOCAL
+
+X, Y = (LOCAL, 0), (LOCAL, 1)
+
+
+def store(block, target, value):
+    return block.append(Instruction('store', [Const(value)], address=target))
+
+
+def jump(block, target):
+    block.append(Instruction('jump', targets=[target]))
+
+
+def branch(block, taken, not_taken):
+    block.append(Instruction('branch', [Const(1)], targets=[taken, not_taken]))
+
+
+def test_reaching_definitions():
+    """ x = 0; y = 0; while (...) { if (...) x = 1; else { x = 2; x = 3; } y = 1; } """
+    function = Function('f', 'void', [], 2)
+    entry, condition, body = function.block('entry'), function.block('cond'), function.block('body')
+    then, otherwise, join, end = [function.block(kind) for kind in ('then', 'else', 'join', 'end')]
+    x0, y0 = store(entry, X, 0), store(entry, Y, 0)
+    jump(entry, condition)
+    branch(condition, body, end)
+    branch(body, then, otherwise)
+    x1 = store(then, X, 1)
+    jump(then, join)
+    store(otherwise, X, 2)
+    x3 = store(otherwise, X, 3)
+    jump(otherwise, join)
+    y1 = store(join, Y, 1)
+    jump(join, condition)
+    end.append(Instruction('return', [Const(None)]))
+
+    reach_in, reach_out = reaching_definitions(function)
+    assert reach_in[entry] == set()
+    assert reach_out[entry] == {x0, y0}
+    # the stores of the loop reach back to its condition
+    assert reach_in[condition] == {x0, y0, x1, x3, y1}
+    # both branches store x
+    assert reach_in[join] == {x1, x3, y0, y1}
+    # only the last store of a block to a variable leaves it
+    assert reach_out[otherwise] == {x3, y0, y1}
+    assert reach_out[join] == {x1, x3, y1}
+    assert reach_in[end] == reach_in[condition]
@@ -0,0 +1,49 @@
+import pytest
+
+from interpreter.lexer_analyzer.incremental import IncrementalLexer
+from interpreter.lexer_analyzer.lexer import Lexer
+
+SOURCE = '''#include <stdio.h>
+int total = 0;
+/* adds up */
+void main() {
+    int i;
+    for (i = 0; i < 10; i++) {
+        total = total + i;
+    }
+    printf("%d", total);
+}
+'''
+
+
+def tokens(buffer):
+    return [
+        (token.type, token.value, token.start, token.end) for token in buffer
+    ]
+
+
+@pytest.mark.parametrize('old, new', [
+    ('total + i', 'total + i * 2'),
+    ('int i;', 'int i; int j;'),
+    # opens a comment that swallows the tokens up to the existing */
+    ('int total = 0;', '/* int total = 0;'),
+    ('"%d"', '"%d %d", 1'),
+    ('    int i;\n', ''),
+])
+def test_edit_matches_full_lex(old, new):
+    lexer = IncrementalLexer(SOURCE)
+    offset = SOURCE.index(old)
+    index, removed, added = lexer.edit(offset, len(old), new)
+    expected = Lexer(SOURCE.replace(old, new, 1)).tokenize()
+    assert tokens(lexer.tokens) == tokens(expected)
+    assert list(lexer.tokens.newlines) == list(expected.newlines)
+    assert len(lexer.tokens) - added == len(Lexer(SOURCE).tokenize()) - removed
+
+
+def test_failed_edit_leaves_tokens():
+    lexer = IncrementalLexer(SOURCE)
+    before = tokens(lexer.tokens)
+    with pytest.raises(Exception):
+        lexer.edit(SOURCE.index('total +'), 0, '"unterminated')
+    assert lexer.text == SOURCE
+    assert tokens(lexer.tokens) == before
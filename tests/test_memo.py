@@ -0,0 +1,53 @@
+from interpreter.interpreter.interpreter import Interpreter
+from interpreter.interpreter.memo import Memo, MISSING
+from interpreter.interpreter.number import Number
+from interpreter.semantic_analyzer.effects import pure_functions
+
+PROGRAM = '''
+#include <stdio.h>
+int counter = 0;
+int fib(int n) { return n < 2 ? n : fib(n - 1) + fib(n - 2); }
+int square(int n) { return n * n; }
+int sum(int n) { int i; int s = 0; for (i = 0; i < n; i++) { s = s + square(i); } return s; }
+int count(int n) { counter = counter + n; return counter; }
+int twice(int n) { return count(n) * 2; }
+int say(int n) { printf("%d", n); return n; }
+void main() {
+    printf("%d %d %d %d %d\\n", fib(20), sum(10), count(1), count(1), twice(1));
+}
+'''
+
+
+def test_pure_functions():
+    tree = Interpreter.compile(PROGRAM)
+    assert pure_functions(tree) == {'fib', 'square', 'sum'}
+
+
+def test_memoized_run(capsys):
+    expected = Interpreter.compile(PROGRAM)
+    Interpreter().interpret(expected)
+    output = capsys.readouterr().out
+    interpreter = Interpreter(memoize=True)
+    interpreter.interpret(Interpreter.compile(PROGRAM))
+    assert capsys.readouterr().out == output
+    assert output.startswith('6765 285 1 2 6')
+    assert set(interpreter.memos) == {'fib', 'square', 'sum'}
+    fib = interpreter.memos['fib']
+    assert (fib.hits, fib.misses) == (18, 21)
+
+
+def test_memo_evicts_least_recently_used():
+    memo = Memo('f', size=2)
+    keys = [Memo.key([Number('int', value)]) for value in range(3)]
+    memo.put(keys[0], 'zero')
+    memo.put(keys[1], 'one')
+    assert memo.get(keys[0]) == 'zero'
+    memo.put(keys[2], 'two')
+    assert memo.get(keys[1]) is MISSING
+    assert memo.get(keys[0]) == 'zero'
+    assert (memo.hits, memo.misses) == (2, 1)
+
+
+def test_key_of_non_numbers():
+    assert Memo.key([Number('int', 1), 'text']) is None
+    assert Memo.key([Number('int', 1)]) != Memo.key([Number('char', 1)])
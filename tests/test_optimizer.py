@@ -0,0 +1,177 @@
+import io
+
+import pytest
+
+from interpreter.interpreter.interpreter import Interpreter
+from interpreter.interpreter.profile import Profile, Recorder, source_key
+from interpreter.optimizer.inliner import Inliner
+from interpreter.optimizer.transformer import size, walk
+from interpreter.optimizer.values import ValueNumbering
+from interpreter.syntax_analyzer.syntax_tree import FunctionCall, FunctionDeclaration
+
+
+def test_global_read_only_by_lazy_function(run):
+    source = '''
+    #include <stdio.h>
+    int g = 5;
+    int f() { return g; }
+    void main() { printf("%d", f()); }
+    '''
+    assert run(source, lazy=True, optimize=True).startswith('5\n')
+
+
+def test_global_written_by_lazy_function(run):
+    source = '''
+    #include <stdio.h>
+    int g = 5;
+    int f() { g = 7; return 0; }
+    void main() { int x; x = g; f(); printf("%d %d", x, g); }
+    '''
+    assert run(source, lazy=True, optimize=True).startswith('5 7\n')
+
+
+ZERO_TRIP = '''
+#include <stdio.h>
+void main() {
+    int a; int b; int i; int n; int s;
+    n = 0; s = 0; b = 2;
+    while (n > 0) { s = s + a * b + i * 4 + i * 4; i++; n = n - 1; }
+    printf("%d", s);
+}
+'''
+
+
+@pytest.mark.parametrize('mode', ['', 'ir', 'vm', 'closures'])
+def test_loop_that_never_runs_reads_unassigned_locals(run, mode):
+    options = {mode: True} if mode else {}
+    assert run(ZERO_TRIP, optimize=True, **options).startswith('0\n')
+
+
+
+SMALL = '''
+#include <stdio.h>
+int add(int a, int b) { return a + b; }
+int fact(int n) { return n < 2 ? 1 : n * fact(n - 1); }
+void main() { printf("%d %d %d %d", add(1, 2), add(3, 4), add(5, 6), fact(5)); }
+'''
+
+
+def declaration(tree, name):
+    return next(
+        node for node in tree.children
+        if isinstance(node, FunctionDeclaration) and node.func_name == name
+    )
+
+
+def calls(tree):
+    """ Names of the functions main calls, in order """
+    return [node.name for node in walk(declaration(tree, 'main')) if isinstance(node, FunctionCall)]
+
+
+def inline(source, **options):
+    tree = Interpreter.compile(source)
+    inliner = Inliner(**options)
+    inliner.visit(tree)
+    return tree, inliner.inlined
+
+
+def output(tree, capsys):
+    capsys.readouterr()
+    Interpreter().interpret(tree)
+    return capsys.readouterr().out
+
+
+def test_inliner_skips_recursive_functions(capsys):
+    tree, inlined = inline(SMALL)
+    assert inlined == 3
+    assert sorted(calls(tree)) == ['fact', 'printf']
+    assert output(tree, capsys).startswith('3 7 11 120')
+
+
+def test_inliner_max_size_and_budget(capsys):
+    body = size(declaration(Interpreter.compile(SMALL), 'add').body)
+    assert inline(SMALL, max_size=body - 1)[1] == 0
+    # the budget covers two bodies, which leaves the third call
+    tree, inlined = inline(SMALL, max_size=body, budget=2 * body + 1)
+    assert inlined == 2
+    assert calls(tree).count('add') == 1
+    assert output(tree, capsys).startswith('3 7 11 120')
+
+
+PROFILED = '''
+#include <stdio.h>
+int big(int n) { int a = n + 1; int b = a * 2; int c = b - 3; return a + b + c; }
+int one(int n) { return n; }
+void main() {
+    int i; int s = 0; int t = 0;
+    for (i = 0; i < 1000; i++) { s = s + one(i); }
+    for (i = 0; i < 100; i++) { t = t + big(i); }
+    printf("%d %d %d %d", s, t, big(1), i > 0 ? one(1) : big(2));
+}
+'''
+
+
+def trained(source):
+    tree = Interpreter.compile(source)
+    recorder = Recorder()
+    Interpreter(recorder=recorder).interpret(tree)
+    profile = Profile(source_key(source))
+    profile.record(tree, recorder)
+    return profile
+
+
+def test_profile_limits_inlining(capsys):
+    profile = trained(PROFILED)
+    body = size(declaration(Interpreter.compile(PROFILED), 'big').body)
+
+    # without a profile, every call to one and none to big
+    tree, inlined = inline(PROFILED, max_size=body - 1)
+    assert (inlined, calls(tree).count('big'), calls(tree).count('one')) == (2, 3, 0)
+
+    # with one, the hot call in the loop may inline a body of up to
+    # hot_size nodes; big(1) ran too rarely and big(2) never did
+    tree, inlined = inline(PROFILED, max_size=body - 1, profile=profile)
+    assert (inlined, calls(tree).count('big'), calls(tree).count('one')) == (3, 2, 0)
+    assert output(tree, capsys).startswith('499500 24950 7 1')
+
+    tree, inlined = inline(PROFILED, max_size=body - 1, profile=profile, hot_size=body - 1)
+    assert (inlined, calls(tree).count('big'), calls(tree).count('one')) == (2, 3, 0)
+
+    # calls that never ran stay whatever their size
+    tree, inlined = inline(PROFILED, max_size=body, profile=profile)
+    assert (inlined, calls(tree)) == (4, ['printf', 'big'])
+
+
+@pytest.mark.parametrize('body, eliminated, expected', [
+    ('x = a * b + 1; y = a * b + 2;', 1, '7 8'),
+    # a write ends the values that read the variable
+    ('x = a * b; a = 4; y = a * b;', 0, '6 8'),
+    ('x = a * b; a++; y = a * b;', 0, '6 8'),
+    ('x = a * b; c = 4; y = a * b;', 1, '6 6'),
+    # a builtin writes through the addresses it is given
+    ('x = a * b; scanf("%d", &a); y = a * b;', 0, '6 8'),
+    # a user function may write globals, not the locals of its caller
+    ('x = a * b; bump(); y = a * b;', 1, '6 6'),
+    ('x = g * b; bump(); y = g * b;', 0, '6 8'),
+    ('x = g * b; y = g * b;', 1, '6 6'),
+    # values computed in a branch are forgotten after it
+    ('if (a > 0) { x = a * b; } y = a * b;', 0, '6 6'),
+    ('x = a * b; if (a > 0) { y = a * b; }', 1, '6 6'),
+    # a loop ends the values of the variables it writes
+    ('x = a * b; while (a < 4) { a++; } y = a * b;', 0, '6 8'),
+])
+def test_value_numbering_invalidation(body, eliminated, expected, capsys, monkeypatch):
+    monkeypatch.setattr('sys.stdin', io.StringIO('4\n'))
+    source = '''
+    #include <stdio.h>
+    int g = 3;
+    void bump() { g = 4; }
+    void main() {
+        int a = 3; int b = 2; int c = 0; int x = 0; int y = 0;
+        %s
+        printf("%%d %%d", x, y);
+    }
+    ''' % body
+    tree = Interpreter.compile(source)
+    assert ValueNumbering.optimize(tree) == eliminated
+    assert output(tree, capsys) == expected
@@ -0,0 +1,55 @@
+import pytest
+
+from interpreter.lexer_analyzer.lexer import Lexer
+from interpreter.syntax_analyzer import parallel
+from interpreter.syntax_analyzer.parser import Parser, SyntaxError
+
+SOURCE = 'int main() { return a + 2 * b; }'
+
+
+def text(node):
+    return SOURCE[node.start:node.end]
+
+
+def test_spans():
+    function = Parser(Lexer(SOURCE)).parse().children[0]
+    statement = function.body.children[0]
+    operator = statement.expression.children[0]
+    assert text(function) == SOURCE
+    assert text(statement) == 'return a + 2 * b;'
+    assert text(operator) == 'a + 2 * b'
+    assert text(operator.right) == '2 * b'
+    assert operator.op.value == '+'
+
+
+def test_unexpected_token():
+    with pytest.raises(SyntaxError, match='Expected token <SEMICOLON> but found <ID> at line 1:20'):
+        Parser(Lexer('int main() { int x x = 1; }')).parse()
+
+
+PROGRAM = '''
+#include <stdio.h>
+int calls = 0;
+int square(int x) { calls++; return x * x; }
+int cube(int x) { return square(x) * x; }
+double half = 0.5;
+int main() {
+    int i;
+    for (i = 0; i < 3; i++) { printf("%d %d\\n", square(i), cube(i)); }
+    return 0;
+}
+void unused() { if (calls) { calls = 0; } }
+'''
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_parallel_parse_matches_serial(dump, workers):
+    tokens = Lexer(PROGRAM).tokenize()
+    serial = Parser(tokens).parse()
+    assert dump(parallel.parse(tokens, workers=workers, chunks_per_worker=2)) == dump(serial)
+
+
+def test_parallel_parse_error():
+    tokens = Lexer(PROGRAM.replace('return x * x;', 'return x * ;')).tokenize()
+    with pytest.raises(SyntaxError, match='line 4'):
+        parallel.parse(tokens, workers=2, chunks_per_worker=2)
@@ -0,0 +1,72 @@
+import io
+
+from interpreter.interpreter.interpreter import Interpreter
+from interpreter.interpreter.profile import Profile, node_key, source_key
+from interpreter.optimizer.transformer import walk
+from interpreter.syntax_analyzer.syntax_tree import ForStatement, FunctionCall
+
+GUARDED = '''
+#include <stdio.h>
+void main() {
+    int a; int n; int r;
+    scanf("%d", &n);
+    r = 0;
+    if (n > 0) { a = n; }
+    if (n > 0 && a * 2 > 100) { r = 1; }
+    printf("%d", r);
+}
+'''
+
+
+def test_guarded_operand_stays_behind_its_guard(run, monkeypatch, tmp_path):
+    profile = str(tmp_path / 'profile.json')
+    monkeypatch.setattr('sys.stdin', io.StringIO('5\n'))
+    run(GUARDED, train=profile)
+    monkeypatch.setattr('sys.stdin', io.StringIO('0\n'))
+    assert run(GUARDED, profile=profile, optimize=True).startswith('0\n')
+
+
+LOOP = '''
+#include <stdio.h>
+int twice(int n) { return n * 2; }
+void main() {
+    int i; int s = 0;
+    for (i = 0; i < 3; i++) { s = s + twice(i); }
+    printf("%d", s);
+}
+'''
+
+
+def test_profile_round_trip(run, tmp_path):
+    path = str(tmp_path / 'profile.json')
+    assert Profile.load(path, LOOP).runs == 0
+    run(LOOP, train=path)
+    first = Profile.load(path, LOOP)
+    run(LOOP, train=path)
+    run(GUARDED.replace('scanf("%d", &n);', 'n = 1;'), train=path)
+
+    profile = Profile.load(path, LOOP)
+    assert profile.runs == 2
+    assert profile.counts == dict((key, 2 * count) for key, count in first.counts.items())
+    assert profile.trues == dict((key, 2 * count) for key, count in first.trues.items())
+    tree = Interpreter.compile(LOOP)
+    loop = next(node for node in walk(tree) if isinstance(node, ForStatement))
+    calls = dict((node.name, node) for node in walk(tree) if isinstance(node, FunctionCall))
+    call, printf = calls['twice'], calls['printf']
+    assert profile.branches == {node_key(loop): [6, 2]}
+    assert profile.calls == {
+        '{} twice'.format(node_key(call)): 6, '{} printf'.format(node_key(printf)): 2,
+    }
+    assert profile.count(call) == 6 and profile.taken(loop.condition) == 0.75
+    assert profile.hot(call) and profile.peak == max(profile.counts.values())
+    # the other program keeps its own entry
+    assert Profile.load(path, GUARDED.replace('scanf("%d", &n);', 'n = 1;')).runs == 1
+
+
+def test_profile_of_unreadable_file(tmp_path):
+    path = tmp_path / 'profile.json'
+    path.write_text('{')
+    profile = Profile.load(str(path), LOOP)
+    assert (profile.runs, profile.counts) == (0, {})
+    profile.save(str(path))
+    assert Profile.load(str(path), LOOP).key == source_key(LOOP)
@@ -0,0 +1,50 @@
+import os
+
+from interpreter.interpreter.interpreter import Interpreter
+from interpreter.lexer_analyzer.lexer import Lexer
+from interpreter.syntax_analyzer.arena import Arena
+from interpreter.syntax_analyzer.parser import Parser
+from interpreter.syntax_analyzer.syntax_tree import Num, Var
+from interpreter.optimizer.transformer import walk
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SOURCE = '''
+#include <stdio.h>
+int main() {
+    int a = 1, b = 1;
+    a = a + 1 + 1;
+    b = a * 2.5 > 1 ? a : b;
+    printf("%d %d", a, b);
+    return 0;
+}
+'''
+
+
+def distinct(tree, node_class):
+    return len(set(id(node) for node in walk(tree) if isinstance(node, node_class)))
+
+
+def test_unpack_rebuilds_the_tree(dump):
+    tree = Parser(Lexer(SOURCE)).parse()
+    assert dump(Arena.pack(tree).unpack()) == dump(tree)
+
+
+def test_shared_leaves():
+    tree = Parser(Lexer(SOURCE), share_leaves=True).parse()
+    ones = [node for node in walk(tree) if isinstance(node, Num) and node.value == 1]
+    assert len(ones) > 1 and all(node is ones[0] for node in ones)
+    # later passes annotate each occurrence of a variable
+    plain = Parser(Lexer(SOURCE)).parse()
+    assert distinct(tree, Var) == distinct(plain, Var)
+    assert distinct(tree, Num) < distinct(plain, Num)
+
+
+def test_view_runs(capsys):
+    with open(os.path.join(ROOT, 'test_9.c')) as file:
+        source = file.read()
+    Interpreter().interpret(Interpreter.compile(source))
+    expected = capsys.readouterr().out
+    arena = Arena.pack(Interpreter.compile(source))
+    Interpreter().interpret(arena.root)
+    assert capsys.readouterr().out == expected